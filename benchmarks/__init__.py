@@ -0,0 +1 @@
+"""Benchmark suite: ``python -m benchmarks run`` / ``python -m benchmarks compare`` (see benchmarks/suite.py)."""
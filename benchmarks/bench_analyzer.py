@@ -0,0 +1,76 @@
+"""Per-call latency of small in-memory requests: analyze_entry / run_task_compute vs analyzer.Analyzer.
+
+    python benchmarks/bench_analyzer.py --channels 32 --seconds 4 --calls 200 --batch 16
+
+Every request is one (seconds * sfreq, channels) float64 array already in memory. ``analyze_entry`` writes it
+to a subject JSON and runs the file pipeline (pool start-up, JSON outputs), ``run_task_compute`` calls the
+worker function in-process (per-task BaseApp logger, JSON outputs), ``analyzer`` calls Analyzer.analyze and
+``analyzer_batch`` Analyzer.analyze_batch on ``batch`` requests (latency reported per request).
+"""
+import argparse, json, os, tempfile, time
+import numpy as np
+
+def _stats(samples):
+    ms = np.asarray(samples) * 1e3
+    return {"calls": int(ms.size), "p50_ms": float(np.percentile(ms, 50)), "p95_ms": float(np.percentile(ms, 95)),
+            "mean_ms": float(ms.mean())}
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--channels", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=4.0)
+    ap.add_argument("--sfreq", type=float, default=250.0)
+    ap.add_argument("--nperseg", type=int, default=256)
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=16)
+    ap.add_argument("--entry-calls", type=int, default=5, help="analyze_entry is slow; fewer repetitions")
+    args = ap.parse_args()
+    from eegspec.analyze import analyze_entry, run_task_compute
+    from eegspec.analyzer import Analyzer
+    rng = np.random.default_rng(0)
+    n = int(args.seconds * args.sfreq)
+    reqs = [rng.standard_normal((n, args.channels)) for _ in range(max(args.calls, args.batch))]
+    ch_names = (["F3", "F4"] + [f"E{i}" for i in range(args.channels)])[:args.channels]
+    log = dict(log_level="WARNING", log_dir=None, log_prefix="", log_suffix="", log_percentage=None)
+    res = {"channels": args.channels, "seconds": args.seconds, "sfreq": args.sfreq, "nperseg": args.nperseg, "batch": args.batch}
+    with tempfile.TemporaryDirectory() as tmp:
+        t = []
+        for i in range(args.entry_calls):
+            t0 = time.perf_counter()
+            d = os.path.join(tmp, f"req{i}")
+            os.makedirs(d)
+            with open(os.path.join(d, "req.json"), "w") as f:
+                json.dump({"task": reqs[i].T.tolist()}, f)
+            analyze_entry(d, args.sfreq, os.path.join(d, "out"), nperseg=args.nperseg, max_processors=1, log_kwargs=log,
+                          output_format="json", prefetch=0, write_queue=0)
+            t.append(time.perf_counter() - t0)
+        res["analyze_entry"] = _stats(t)
+        t = []
+        for i in range(args.calls):
+            t0 = time.perf_counter()
+            r = run_task_compute("req", f"t{i}", reqs[i], args.sfreq, args.nperseg, None, "hann", ch_names, (8.0, 13.0),
+                                 False, tmp, log)
+            t.append(time.perf_counter() - t0)
+            assert r["ok"], r.get("error")
+        res["run_task_compute"] = _stats(t)
+    an = Analyzer(args.sfreq, ch_names, nperseg=args.nperseg)
+    an.analyze(reqs[0])  # warm-up (scipy.fft import)
+    t = []
+    for i in range(args.calls):
+        t0 = time.perf_counter()
+        an.analyze(reqs[i])
+        t.append(time.perf_counter() - t0)
+    res["analyzer"] = _stats(t)
+    t = []
+    for i in range(0, args.calls - args.batch + 1, args.batch):
+        t0 = time.perf_counter()
+        an.analyze_batch(reqs[i:i + args.batch])
+        t.append((time.perf_counter() - t0) / args.batch)
+    res["analyzer_batch"] = _stats(t)
+    for k in ("analyze_entry", "run_task_compute"):
+        res[f"speedup_vs_{k}"] = res[k]["p50_ms"] / res["analyzer"]["p50_ms"]
+    res["batch_gain"] = res["analyzer"]["p50_ms"] / res["analyzer_batch"]["p50_ms"]
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
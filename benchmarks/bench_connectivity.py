@@ -0,0 +1,42 @@
+"""Native multitaper connectivity vs mne_connectivity.spectral_connectivity_epochs (all methods, 5 bands).
+
+    python benchmarks/bench_connectivity.py --channels 64 --seconds 120 --sfreq 250
+"""
+import argparse, json, time, warnings
+import numpy as np
+
+BANDS = {"delta": (1.0, 4.0), "theta": (4.0, 7.0), "alpha": (8.0, 13.0), "beta": (13.0, 30.0), "gamma": (30.0, 45.0)}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--channels", type=int, default=64)
+    ap.add_argument("--seconds", type=float, default=120.0)
+    ap.add_argument("--sfreq", type=float, default=250.0)
+    ap.add_argument("--epoch-sec", type=float, default=2.0)
+    ap.add_argument("--block-mb", type=float, default=64.0)
+    ap.add_argument("--skip-mne", action="store_true")
+    args = ap.parse_args()
+    from eegspec.connectivity import connectivity_bands, epoch_view, CON_METHODS
+    from eegspec.synthetic import SyntheticConfig, synth_subject
+    x = synth_subject(SyntheticConfig(n_channels=args.channels, seconds=args.seconds, sfreq=args.sfreq, tasks=("rest",)))["rest"].T
+    t0 = time.perf_counter()
+    ours = connectivity_bands(x, args.sfreq, BANDS, epoch_sec=args.epoch_sec, max_block_bytes=int(args.block_mb * 2**20))
+    res = {"channels": args.channels, "seconds": args.seconds, "native_s": time.perf_counter() - t0}
+    if not args.skip_mne:
+        from mne_connectivity import spectral_connectivity_epochs
+        X = np.ascontiguousarray(epoch_view(x, args.sfreq, args.epoch_sec))
+        t0 = time.perf_counter()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            ref = spectral_connectivity_epochs(X, method=list(CON_METHODS), mode="multitaper", sfreq=args.sfreq,
+                                               fmin=tuple(b[0] for b in BANDS.values()), fmax=tuple(b[1] for b in BANDS.values()),
+                                               faverage=True, verbose=False)
+        res["mne_s"] = time.perf_counter() - t0
+        lo = np.tril_indices(args.channels, -1)
+        res["max_abs_diff"] = max(float(np.abs(ours[m][:, lo[0], lo[1]] - c.get_data(output="dense")[lo].T).max())
+                                  for m, c in zip(CON_METHODS, ref))
+        res["speedup"] = res["mne_s"] / res["native_s"]
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
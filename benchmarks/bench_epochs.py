@@ -0,0 +1,77 @@
+"""Epoched features: per-epoch Python loop vs one (epochs, channels, freqs) batch.
+
+    python benchmarks/bench_epochs.py --channels 64 --seconds 600 --epoch-sec 2
+
+``loop`` calls compute_psd_welch and compute_task_metrics once per epoch (the only way before epoched mode);
+``loop_features_py`` additionally uses the standalone features.py functions instead of FeatureEngine.
+``batched`` runs epochs.compute_epoch_psd (variance rejection + one PSD batch) and one compute_tfr_features call;
+``batched_no_reject`` skips the amplitude/variance pass (the loops do no rejection).
+"""
+import argparse, json, time
+import numpy as np
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--channels", type=int, default=64)
+    ap.add_argument("--seconds", type=float, default=600.0)
+    ap.add_argument("--sfreq", type=float, default=250.0)
+    ap.add_argument("--epoch-sec", type=float, default=2.0)
+    ap.add_argument("--nperseg", type=int, default=256)
+    ap.add_argument("--reject-var", type=float, default=5.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    from eegspec.analyze import compute_task_metrics, compute_tfr_features
+    from eegspec.epochs import EpochSpec, compute_epoch_psd
+    from eegspec.features import TOTAL_RANGE, std_bands, bandpower, spectral_entropy, spectral_moments, spectral_edge, median_frequency
+    from eegspec.psd import compute_psd_welch, compute_psd_welch_epochs
+    from eegspec.synthetic import SyntheticConfig, synth_subject
+    cfg = SyntheticConfig(n_channels=args.channels, seconds=args.seconds, sfreq=args.sfreq, n_subjects=1)
+    x = np.ascontiguousarray(next(iter(synth_subject(cfg, 0).values())).T)  # (n_times, n_channels)
+    ch = [f"Ch{i}" for i in range(args.channels)]
+    spec = EpochSpec(args.epoch_sec, reject_var=args.reject_var)
+    L = int(round(args.epoch_sec * args.sfreq))
+    starts = np.arange(0, x.shape[0] - L + 1, L)
+    bands = std_bands((8.0, 13.0))
+
+    def loop():
+        for s in starts:
+            f, p = compute_psd_welch(x[s:s + L], args.sfreq, nperseg=args.nperseg)
+            compute_task_metrics(p, f, ch, (8.0, 13.0), False)
+
+    def loop_features_py():
+        for s in starts:
+            f, p = compute_psd_welch(x[s:s + L], args.sfreq, nperseg=args.nperseg)
+            bandpower(p, f, bands); bandpower(p, f, bands, relative=True, total_range=TOTAL_RANGE)
+            spectral_entropy(p, f); spectral_moments(p, f); spectral_edge(p, f); median_frequency(p, f)
+
+    def batched():
+        f, psd_e, info = compute_epoch_psd(x, args.sfreq, spec, "task", args.nperseg, None)
+        compute_tfr_features(info["onsets"], f, psd_e, ch, (8.0, 13.0), False)
+        return psd_e[info["keep"]].mean(axis=0)
+
+    def batched_no_reject():
+        f, psd_e = compute_psd_welch_epochs(x, args.sfreq, starts, L, nperseg=args.nperseg)
+        compute_tfr_features(starts / args.sfreq, f, psd_e, ch, (8.0, 13.0), False)
+        return psd_e.mean(axis=0)
+
+    batched()  # warm-up (scipy.fft import, engine caches)
+    res = {"channels": args.channels, "seconds": args.seconds, "sfreq": args.sfreq, "epoch_sec": args.epoch_sec,
+           "epochs": int(starts.size), "nperseg": args.nperseg}
+    for name, fn in (("loop", loop), ("loop_features_py", loop_features_py), ("batched", batched),
+                     ("batched_no_reject", batched_no_reject)):
+        res[f"{name}_s"] = _best(fn, args.repeat)
+    res["speedup_vs_loop"] = res["loop_s"] / res["batched_s"]
+    res["speedup_vs_loop_features_py"] = res["loop_features_py_s"] / res["batched_s"]
+    res["speedup_no_reject_vs_loop"] = res["loop_s"] / res["batched_no_reject_s"]
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
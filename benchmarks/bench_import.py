@@ -0,0 +1,52 @@
+"""CLI start-up and worker spawn cost: fresh-interpreter wall times (best of N) and the heavy modules each entry loads.
+
+    python benchmarks/bench_import.py --repeat 5
+
+``spawn_worker`` is the time from creating a ``spawn`` process pool to the first result of a function in
+``eegspec.analyze`` (the worker imports the module to unpickle the task) - the per-worker start-up cost on
+macOS/Windows. ``psd_worker`` additionally runs one small PSD, i.e. includes the lazily imported scipy.fft.
+"""
+import argparse, json, subprocess, sys, time
+
+HEAVY = ("numpy", "scipy", "scipy.signal", "matplotlib", "mne")
+ENTRIES = {
+    "python": "pass",
+    "cli --version": "import sys; from eegspec.cli import main\ntry: main(['--version'])\nexcept SystemExit: pass",
+    "cli --help": "import sys; from eegspec.cli import main\ntry: main(['analyze', '--help'])\nexcept SystemExit: pass",
+    "import analyze": "import eegspec.analyze",
+    "spawn_worker": ("import multiprocessing as mp, concurrent.futures as cf\nfrom eegspec.analyze import std_bands\n"
+                     "with cf.ProcessPoolExecutor(1, mp_context=mp.get_context('spawn')) as ex: ex.submit(std_bands, (8.0, 13.0)).result()"),
+    "psd_worker": ("import multiprocessing as mp, concurrent.futures as cf, numpy as np\nfrom eegspec.psd import compute_psd_welch\n"
+                   "with cf.ProcessPoolExecutor(1, mp_context=mp.get_context('spawn')) as ex:\n"
+                   "    ex.submit(compute_psd_welch, np.zeros((1000, 4)), 250.0, 256).result()"),
+}
+
+def _child(code):
+    t0 = time.perf_counter()
+    exec(compile(code, "<bench>", "exec"), {"__name__": "__bench__"})
+    wall = time.perf_counter() - t0
+    print(json.dumps({"wall_s": wall, "loaded": [m for m in HEAVY if m in sys.modules]}))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--child", default=None)
+    args = ap.parse_args()
+    if args.child:
+        return _child(ENTRIES[args.child])
+    res = {}
+    for name in ENTRIES:
+        best, loaded = None, None
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            out = subprocess.run([sys.executable, __file__, "--child", name], check=True, capture_output=True, text=True).stdout
+            total = time.perf_counter() - t0  # interpreter start-up included
+            r = json.loads(out.strip().splitlines()[-1])
+            if best is None or total < best:
+                best, loaded = total, r["loaded"]
+        res[name] = {"process_s": best, "heavy_modules": loaded}
+        print(f"{name:>15}: {best * 1e3:8.1f} ms   loads {', '.join(loaded) or '-'}", flush=True)
+    return res
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""IPC bytes and parent peak RSS: pickled recordings (previous scheduler) vs task descriptors.
+
+    python benchmarks/bench_ipc.py --subjects 100 --channels 32 --seconds 30
+
+Each mode runs in a fresh interpreter so ru_maxrss reflects only that mode's parent process.
+"""
+import argparse, json, os, pickle, subprocess, sys, tempfile, time
+import numpy as np
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+def make_dataset(folder, n_subjects, n_channels, seconds, sfreq, fmt, seed=0):
+    from eegspec.synthetic import SyntheticConfig, write_cohort
+    write_cohort(folder, SyntheticConfig(n_channels=n_channels, seconds=seconds, sfreq=sfreq, n_subjects=n_subjects, seed=seed), fmt)
+
+def run_child(mode, data_dir, out_dir, sfreq, workers):
+    import concurrent.futures
+    from eegspec.analyze import analyze_entry, run_task_compute
+    from eegspec.sources import describe_subject, release_shared
+    from eegspec.utils import list_subject_jsons, load_subject_tasks, subject_id_from_path
+    log_kwargs = dict(log_level="WARNING", log_dir=None, log_prefix="", log_suffix="", log_percentage=None)
+    ch = [f"Ch{i+1}" for i in range(512)]
+    t0 = time.perf_counter()
+    ipc = 0
+    if mode == "legacy":
+        schedule = []
+        for spath in list_subject_jsons(data_dir):
+            sid = subject_id_from_path(spath)
+            for tname, data in load_subject_tasks(spath).items():
+                schedule.append((sid, tname, np.array(data)))  # fully materialised, as the old loader did
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+            futs = []
+            for sid, tname, data in schedule:
+                args = (sid, tname, data, sfreq, 256, None, "hann", ch[:data.shape[1]], (8.0, 13.0), False, out_dir, log_kwargs, "npz")
+                ipc += len(pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))
+                futs.append(ex.submit(run_task_compute, *args))
+            for f in futs:
+                f.result()
+    else:
+        for spath in list_subject_jsons(data_dir):
+            sources, shms = describe_subject(spath)
+            ipc += sum(len(pickle.dumps((subject_id_from_path(spath), t, src, sfreq, 256, None, "hann", ch[:src.shape[0]], (8.0, 13.0),
+                                         False, out_dir, log_kwargs, "npz"), protocol=pickle.HIGHEST_PROTOCOL)) for t, src in sources.items())
+            for shm in shms.values():
+                release_shared(shm)
+        analyze_entry(data_dir, sfreq, out_dir, nperseg=256, max_processors=workers, log_kwargs=log_kwargs)
+    print(json.dumps({"mode": mode, "ipc_bytes": ipc, "parent_peak_rss_mb": _peak_rss_mb(), "wall_s": time.perf_counter() - t0}))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--subjects", type=int, default=100)
+    ap.add_argument("--channels", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=30.0)
+    ap.add_argument("--sfreq", type=float, default=250.0)
+    ap.add_argument("--format", choices=["raw", "json"], default="raw")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--child", choices=["legacy", "descriptor"], default=None)
+    ap.add_argument("--data-dir", default=None)
+    ap.add_argument("--out-dir", default=None)
+    args = ap.parse_args()
+    if args.child:
+        return run_child(args.child, args.data_dir, args.out_dir, args.sfreq, args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "in")
+        make_dataset(data_dir, args.subjects, args.channels, args.seconds, args.sfreq, args.format)
+        rows = []
+        for mode in ("legacy", "descriptor"):
+            out = subprocess.run([sys.executable, __file__, "--child", mode, "--data-dir", data_dir, "--out-dir", os.path.join(tmp, mode),
+                                  "--sfreq", str(args.sfreq), "--workers", str(args.workers)],
+                                 check=True, capture_output=True, text=True).stdout
+            rows.append(json.loads(out.strip().splitlines()[-1]))
+    for r in rows:
+        rss = "n/a" if r["parent_peak_rss_mb"] is None else f"{r['parent_peak_rss_mb']:.0f} MB"
+        print(f"{r['mode']:>10}: IPC {r['ipc_bytes'] / 2**20:9.2f} MB   parent peak RSS {rss:>8}   wall {r['wall_s']:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Per-task logging overhead in pool workers: BaseApp/DualHandler per task (``task``) vs QueueHandler + parent listener (``queue``).
+
+    python benchmarks/bench_logging.py --tasks 5000 --workers 4 --records 4
+
+Each task only sets up its logger and emits ``--records`` INFO lines, so the wall time per task is the logging
+cost. Every mode runs in a fresh interpreter with stderr discarded; ``worker_fds`` is the largest open-fd count
+seen in a worker at the end of the run (Linux).
+"""
+import argparse, json, os, subprocess, sys, tempfile, time
+
+def _task(i, log_kwargs, n_records):
+    from eegspec.logqueue import worker_logger
+    from eegspec.base import BaseApp
+    t0 = time.perf_counter()
+    sid, tname = f"sub{i // 2:04d}", f"task{i % 2}"
+    logger = worker_logger(sid, tname)
+    if logger is None:
+        kw = dict(log_kwargs); kw["log_suffix"] = f"_{sid}_{tname}"
+        logger = BaseApp(**kw).logger
+    for k in range(n_records):
+        logger.info(f"[Task step] subject={sid} task={tname} step={k}")
+    dt = time.perf_counter() - t0
+    return dt, len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+
+def run_child(mode, n_tasks, workers, n_records, log_dir, task_logs):
+    import concurrent.futures
+    from eegspec.logqueue import LogListener, init_worker_logging
+    log_kwargs = dict(log_level="INFO", log_dir=log_dir, log_prefix="", log_suffix="", log_percentage=None)
+    listener = LogListener(log_kwargs, per_task=task_logs).start() if mode == "queue" else None
+    pool_kw = dict(initializer=init_worker_logging, initargs=listener.worker_args()) if listener else {}
+    t0 = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, **pool_kw) as ex:
+        res = list(ex.map(_task, range(n_tasks), [log_kwargs] * n_tasks, [n_records] * n_tasks, chunksize=16))
+    wall_pool = time.perf_counter() - t0
+    if listener is not None:
+        listener.stop()
+    wall = time.perf_counter() - t0
+    fds = [r[1] for r in res if r[1] is not None]
+    print(json.dumps({"mode": mode, "tasks": n_tasks, "wall_s": wall, "pool_s": wall_pool,
+                      "per_task_us": 1e6 * wall * workers / n_tasks, "in_task_us": 1e6 * sum(r[0] for r in res) / n_tasks,
+                      "worker_fds": max(fds) if fds else None, "log_files": len(os.listdir(log_dir))}))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--tasks", type=int, default=5000)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--records", type=int, default=4)
+    ap.add_argument("--task-logs", action="store_true", help="queue mode also writes per-task files")
+    ap.add_argument("--child", choices=["task", "queue"], default=None)
+    ap.add_argument("--log-dir", default=None)
+    args = ap.parse_args()
+    if args.child:
+        return run_child(args.child, args.tasks, args.workers, args.records, args.log_dir, args.task_logs)
+
+    rows = []
+    for mode in ("task", "queue"):
+        with tempfile.TemporaryDirectory() as tmp:
+            cmd = [sys.executable, __file__, "--child", mode, "--tasks", str(args.tasks), "--workers", str(args.workers),
+                   "--records", str(args.records), "--log-dir", tmp] + (["--task-logs"] if args.task_logs else [])
+            out = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+            rows.append(json.loads(out.strip().splitlines()[-1]))
+    for r in rows:
+        print(f"{r['mode']:>6}: wall {r['wall_s']:6.2f} s   {r['per_task_us']:8.1f} us/task (worker-time)   "
+              f"in-task {r['in_task_us']:8.1f} us   worker fds {r['worker_fds']}   log files {r['log_files']}")
+
+if __name__ == "__main__":
+    main()
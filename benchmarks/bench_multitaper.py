@@ -0,0 +1,52 @@
+"""Multitaper PSD (eegspec.psd.compute_psd_multitaper) vs mne.time_frequency.psd_array_multitaper.
+
+    python benchmarks/bench_multitaper.py --channels 64 --seconds 120 --sfreq 250 --bandwidth 1
+
+Both get the same recording and bandwidth; times are best of ``--repeat`` after one warm-up call (which
+also fills the DPSS taper cache), peak memory is the tracemalloc peak of one call.
+"""
+import argparse, json, time, tracemalloc, warnings
+import numpy as np
+
+def _measure(fn, repeat):
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return best, peak, out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--channels", type=int, default=64)
+    ap.add_argument("--seconds", type=float, default=120.0)
+    ap.add_argument("--sfreq", type=float, default=250.0)
+    ap.add_argument("--bandwidth", type=float, default=1.0, help="Full bandwidth in Hz")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--block-mb", type=float, default=64.0)
+    ap.add_argument("--skip-mne", action="store_true")
+    args = ap.parse_args()
+    from eegspec.psd import compute_psd_multitaper
+    from eegspec.synthetic import SyntheticConfig, synth_subject
+    x = synth_subject(SyntheticConfig(n_channels=args.channels, seconds=args.seconds, sfreq=args.sfreq, tasks=("rest",)))["rest"].T
+    res = {"channels": args.channels, "seconds": args.seconds, "sfreq": args.sfreq, "bandwidth": args.bandwidth}
+    for adaptive in (False, True):
+        key = "adaptive" if adaptive else "fixed"
+        t, peak, (f, ours) = _measure(lambda: compute_psd_multitaper(x, args.sfreq, bandwidth=args.bandwidth, adaptive=adaptive,
+                                                                     max_block_bytes=int(args.block_mb * 2**20)), args.repeat)
+        res[key] = {"native_s": t, "native_peak_mb": peak}
+        if not args.skip_mne:
+            from mne.time_frequency import psd_array_multitaper
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                t, peak, (ref, _) = _measure(lambda: psd_array_multitaper(x.T, args.sfreq, bandwidth=args.bandwidth, adaptive=adaptive,
+                                                                          normalization="full", verbose=False), args.repeat)
+            res[key].update(mne_s=t, mne_peak_mb=peak, speedup=t / res[key]["native_s"],
+                            max_rel_diff=float(np.max(np.abs(ours - ref)) / np.max(np.abs(ref))))
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Overlapped I/O (--prefetch / --write-queue) on slow storage: wall time and CPU utilization, synchronous vs overlapped.
+
+    python benchmarks/bench_overlap.py --subjects 8 --latency-ms 10 --read-mbps 40 --write-mbps 20
+
+Slow storage (spinning disk, NFS) is emulated by sleeping ``latency + bytes / bandwidth`` around every subject
+read and every output write (describe_subject, save_json, write_subject_npz), one operation at a time across all
+processes (a single device); the sleep releases the GIL like real blocking I/O. Each configuration runs in a
+fresh interpreter with the fork start method (workers inherit the throttle). ``cpu_util`` is (parent + worker CPU seconds) / wall seconds, i.e. cores kept busy on average.
+"""
+import argparse, json, os, subprocess, sys, tempfile, time
+
+CONFIGS = {"sync": dict(prefetch=0, write_queue=0), "overlapped": dict(prefetch=2, write_queue=8)}
+
+def _throttle(fn, device, latency, mbps, path_arg, after=False):
+    def wait(path):
+        with device:
+            time.sleep(latency + os.path.getsize(path) / (mbps * 2**20))
+
+    def wrapped(*args, **kw):
+        if not after:
+            wait(args[path_arg])
+        out = fn(*args, **kw)
+        if after:
+            wait(args[path_arg])
+        return out
+    return wrapped
+
+def _child(args, name):
+    import resource
+    import multiprocessing as mp
+    mp.set_start_method("fork", force=True)
+    import eegspec.analyze as an, eegspec.store as st
+    lat, device = args.latency_ms / 1e3, mp.Lock()  # inherited by the forked workers
+    an.describe_subject = _throttle(an.describe_subject, device, lat, args.read_mbps, 0)
+    an.save_json = _throttle(an.save_json, device, lat, args.write_mbps, 1, after=True)
+    st.write_subject_npz = _throttle(st.write_subject_npz, device, lat, args.write_mbps, 0, after=True)
+    log = dict(log_level="WARNING", log_dir=None, log_prefix="", log_suffix="", log_percentage=None)
+    t0 = time.perf_counter()
+    s = an.analyze_entry(os.path.join(args.tmp, "in"), 250.0, os.path.join(args.tmp, name + "_" + args.output_format),
+                         nperseg=512, max_processors=args.workers, output_format=args.output_format, log_kwargs=log,
+                         **CONFIGS[name])
+    wall = time.perf_counter() - t0
+    cpu = sum(getattr(resource.getrusage(w), f) for w in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+              for f in ("ru_utime", "ru_stime"))
+    print(json.dumps(dict(wall_s=wall, cpu_s=cpu, tasks_ok=s["run"]["tasks_ok"], io=s["io"])))
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--subjects", type=int, default=8)
+    ap.add_argument("--channels", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--output-format", choices=["json", "npz"], default="json")
+    ap.add_argument("--latency-ms", type=float, default=10.0, help="Per-operation latency")
+    ap.add_argument("--read-mbps", type=float, default=40.0)
+    ap.add_argument("--write-mbps", type=float, default=20.0)
+    ap.add_argument("--child", default=None)
+    ap.add_argument("--tmp", default=None)
+    args = ap.parse_args()
+    if args.child:
+        return _child(args, args.child)
+    from eegspec.synthetic import SyntheticConfig, write_cohort
+    res = {"subjects": args.subjects, "channels": args.channels, "seconds": args.seconds, "workers": args.workers,
+           "output_format": args.output_format, "latency_ms": args.latency_ms, "read_mbps": args.read_mbps,
+           "write_mbps": args.write_mbps}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_cohort(os.path.join(tmp, "in"), SyntheticConfig(n_channels=args.channels, seconds=args.seconds,
+                                                              n_subjects=args.subjects), "json")
+        res["input_mb"] = sum(os.path.getsize(os.path.join(tmp, "in", f)) for f in os.listdir(os.path.join(tmp, "in"))) / 2**20
+        for name in CONFIGS:
+            out = subprocess.run([sys.executable, __file__, *sys.argv[1:], "--child", name, "--tmp", tmp], check=True,
+                                 capture_output=True, text=True).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            r["cpu_util"] = r["cpu_s"] / r["wall_s"]
+            res[name] = r
+    res["speedup"] = res["sync"]["wall_s"] / res["overlapped"]["wall_s"]
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""PSD report rendering: seconds per figure, legacy viz.plot_psd vs the batch report (reused Agg figure, log-binned LineCollection).
+
+    python benchmarks/bench_report.py --subjects 16 --channels 64,256 --workers 4
+
+For each channel count a JSON output folder with ``subjects`` x 2 tasks of synthetic PSDs (nperseg 2048 at
+250 Hz, 1025 bins) is written, then rendered three ways: ``legacy`` (plot_psd to PNG, one pyplot figure per
+call, every bin of every channel as its own line; serial), ``serial`` (report.render_report, max_workers=1)
+and ``pool`` (render_report with ``workers`` processes, wall time including pool start-up and index.html).
+"""
+import argparse, json, os, tempfile, time
+import numpy as np
+
+TASKS = ("rest", "task")
+
+def _write_outputs(out_dir, n_subjects, n_channels, nfft=2048, sfreq=250.0, seed=0):
+    rng = np.random.default_rng(seed)
+    freqs = np.fft.rfftfreq(nfft, 1.0 / sfreq)
+    base = (1.0 / (1.0 + freqs) ** 1.5) * (1.0 + 3.0 * np.exp(-(freqs - 10.0) ** 2 / 4.0))
+    for s in range(n_subjects):
+        sdir = os.path.join(out_dir, "subjects", f"sub{s:03d}")
+        os.makedirs(sdir, exist_ok=True)
+        for task in TASKS:
+            psd = base[None, :] * np.exp(0.3 * rng.standard_normal((n_channels, freqs.size)))
+            with open(os.path.join(sdir, f"psd_{task}.json"), "w", encoding="utf-8") as f:
+                json.dump({"freqs": freqs.tolist(), "psd": psd.tolist(), "channels": [f"E{i}" for i in range(n_channels)]}, f)
+    return freqs
+
+def _legacy(out_dir, png_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    from eegspec.viz import plot_psd
+    os.makedirs(png_dir, exist_ok=True)
+    n = 0
+    t0 = time.perf_counter()
+    for sid in sorted(os.listdir(os.path.join(out_dir, "subjects"))):
+        for task in TASKS:
+            with open(os.path.join(out_dir, "subjects", sid, f"psd_{task}.json"), encoding="utf-8") as f:
+                d = json.load(f)
+            plot_psd(np.asarray(d["freqs"]), np.asarray(d["psd"]), title=f"{sid} - {task}",
+                     out_png=os.path.join(png_dir, f"psd_{sid}_{task}.png"))
+            n += 1
+    return (time.perf_counter() - t0) / n
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--subjects", type=int, default=16)
+    ap.add_argument("--channels", type=str, default="64,256")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--dpi", type=int, default=100)
+    ap.add_argument("--skip-legacy", action="store_true")
+    args = ap.parse_args()
+    from eegspec.report import render_report
+    res = {"subjects": args.subjects, "figures_per_run": 2 * args.subjects, "workers": args.workers, "cpu_count": os.cpu_count(),
+           "per_figure_s": {}}
+    for n_ch in [int(c) for c in args.channels.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            _write_outputs(tmp, args.subjects, n_ch)
+            r = {}
+            if not args.skip_legacy:
+                r["legacy"] = _legacy(tmp, os.path.join(tmp, "legacy"))
+            r["serial"] = render_report(tmp, os.path.join(tmp, "serial"), max_workers=1, dpi=args.dpi)["wall_per_figure_s"]
+            rep = render_report(tmp, os.path.join(tmp, "pool"), max_workers=args.workers, dpi=args.dpi)
+            r["pool"] = rep["wall_per_figure_s"]
+            r["pool_render_only"] = rep["render_per_figure_s"]
+            if "legacy" in r:
+                r["speedup_serial"] = r["legacy"] / r["serial"]
+                r["speedup_pool"] = r["legacy"] / r["pool"]
+            res["per_figure_s"][str(n_ch)] = r
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Decimation pre-stage (--target-sfreq): per-task PSD + features and end-to-end analyze, native rate vs resampled.
+
+    python benchmarks/bench_resample.py --channels 32 --seconds 120 --sfreq 2000 --target auto
+
+The recording is the suite's base config at a high sample rate; ``nperseg`` is 2 s at the native rate (the
+resampled run scales it, keeping the resolution). ``max_rel_diff`` is the largest relative difference of the
+relative band powers and IAF between the two runs.
+"""
+import argparse, json, os, tempfile, time
+import numpy as np
+
+def _best(fn, repeat):
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = fn(); best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--channels", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=120.0)
+    ap.add_argument("--sfreq", type=float, default=2000.0)
+    ap.add_argument("--target", default="auto", help="Target rate in Hz or 'auto'")
+    ap.add_argument("--subjects", type=int, default=2)
+    ap.add_argument("--connectivity", default=None, help="e.g. coh,wpli for the end-to-end runs")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    from eegspec.analyze import analyze_entry, compute_task_metrics
+    from eegspec.features import TOTAL_RANGE
+    from eegspec.psd import compute_psd_welch
+    from eegspec.resample import plan_resample, apply_plan
+    from eegspec.store import ResultStore
+    from eegspec.synthetic import SyntheticConfig, synth_subject, write_cohort
+    nperseg = int(2 * args.sfreq)
+    plan = plan_resample(args.sfreq, nperseg, None, args.target, fmax=TOTAL_RANGE[1])
+    if plan is None:
+        raise SystemExit(f"No resampling for --target {args.target} at {args.sfreq} Hz")
+    cfg = SyntheticConfig(n_channels=args.channels, seconds=args.seconds, sfreq=args.sfreq, tasks=("rest",))
+    x = synth_subject(cfg)["rest"].T
+    ch = [f"Ch{i + 1}" for i in range(args.channels)]
+
+    def native():
+        f, p = compute_psd_welch(x, args.sfreq, nperseg=nperseg)
+        return compute_task_metrics(p, f, ch, (8.0, 13.0), False)
+
+    def resampled():
+        y = apply_plan(x, plan)
+        f, p = compute_psd_welch(y, plan.sfreq, nperseg=plan.nperseg, noverlap=plan.noverlap)
+        return compute_task_metrics(p, f, ch, (8.0, 13.0), False)
+
+    t_nat, m_nat = _best(native, args.repeat)
+    t_res, m_res = _best(resampled, args.repeat)
+    t_dec, _ = _best(lambda: apply_plan(x, plan), args.repeat)
+    diff = max(float(np.max(np.abs(np.asarray(m_res["bands_rel"][b]) / np.asarray(m_nat["bands_rel"][b]) - 1)))
+               for b in m_nat["bands_rel"])
+    diff = max(diff, float(np.max(np.abs(np.asarray(m_res["IAF"]["peak"]) / np.asarray(m_nat["IAF"]["peak"]) - 1))))
+    res = {"channels": args.channels, "seconds": args.seconds, "plan": plan.as_dict(),
+           "task": {"native_s": t_nat, "resampled_s": t_res, "resample_stage_s": t_dec, "speedup": t_nat / t_res,
+                    "max_rel_diff": diff}}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_cohort(os.path.join(tmp, "in"), SyntheticConfig(**dict(cfg.as_dict(), n_subjects=args.subjects, tasks=("rest", "task"))), "raw")
+        kw = dict(sfreq=args.sfreq, nperseg=nperseg, max_processors=2, connectivity=args.connectivity.split(",") if args.connectivity else None,
+                  log_kwargs=dict(log_level="WARNING", log_dir=None, log_prefix="", log_suffix="", log_percentage=None))
+        e2e = {}
+        for name, target in (("native", None), ("resampled", args.target)):
+            out = os.path.join(tmp, name)
+            t0 = time.perf_counter()
+            analyze_entry(os.path.join(tmp, "in"), out_dir=out, target_sfreq=target, **kw)
+            e2e[f"{name}_s"] = time.perf_counter() - t0
+            e2e[f"{name}_feature"] = ResultStore(out).load_feature("rel_alpha")
+        a, b = e2e.pop("native_feature"), e2e.pop("resampled_feature")
+        e2e["speedup"] = e2e["native_s"] / e2e["resampled_s"]
+        e2e["max_rel_diff_rel_alpha"] = max(float(np.max(np.abs(b[s] / a[s] - 1))) for s in a)
+        res["e2e"] = dict(e2e, subjects=args.subjects, connectivity=args.connectivity)
+    print(json.dumps(res, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Latency / throughput of the online streaming analyzer.
+
+    python benchmarks/bench_stream.py --channels 64 --sfreq 1000 --seconds 60
+    python benchmarks/bench_stream.py --socket --seconds 20     # real-time paced publisher over local TCP
+
+In-process mode pushes synthetic chunks as fast as possible and reports how many times faster than
+real time the analyzer ingests; socket mode runs the synthetic publisher in a thread at ``--sfreq``
+and verifies that the analyzer keeps up (per-update latency stays bounded).
+"""
+import argparse, socket, threading, time
+from eegspec.stream import StreamAnalyzer, latency_stats, run_stream, serve_synthetic, synthetic_chunks
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def bench_inprocess(args):
+    ch = [f"Ch{i+1}" for i in range(args.channels)]
+    an = StreamAnalyzer(ch, args.sfreq, nperseg=args.nperseg, avg_segments=args.avg_segments)
+    total = int(args.seconds * args.sfreq)
+    chunks = synthetic_chunks(args.channels, args.sfreq, args.chunk_samples)
+    pre = [next(chunks) for _ in range(64)]  # keep generation out of the timed loop
+    t0 = time.perf_counter()
+    n = 0
+    while n < total:
+        c = pre[(n // args.chunk_samples) % len(pre)]
+        an.push(c)
+        n += c.shape[0]
+    return latency_stats(an, time.perf_counter() - t0)
+
+def bench_socket(args):
+    port = _free_port()
+    th = threading.Thread(target=serve_synthetic, args=(port, args.channels, args.sfreq, args.seconds),
+                          kwargs=dict(chunk_samples=args.chunk_samples, realtime=True), daemon=True)
+    th.start()
+    time.sleep(0.2)
+    ch = [f"Ch{i+1}" for i in range(args.channels)]
+    stats = run_stream(f"tcp://127.0.0.1:{port}", ch, args.sfreq, out=None, chunk_samples=args.chunk_samples,
+                       nperseg=args.nperseg, avg_segments=args.avg_segments)
+    th.join()
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--channels", type=int, default=64)
+    ap.add_argument("--sfreq", type=float, default=1000.0)
+    ap.add_argument("--seconds", type=float, default=60.0)
+    ap.add_argument("--nperseg", type=int, default=512)
+    ap.add_argument("--avg-segments", type=int, default=8)
+    ap.add_argument("--chunk-samples", type=int, default=32)
+    ap.add_argument("--socket", action="store_true")
+    args = ap.parse_args()
+    stats = bench_socket(args) if args.socket else bench_inprocess(args)
+    rt = stats["samples_per_s"] / args.sfreq
+    print(f"{args.channels} ch @ {args.sfreq:g} Hz, chunk {args.chunk_samples}: {stats['samples']} samples, {stats['updates']} updates, "
+          f"{stats['samples_per_s']:.0f} samples/s ({rt:.1f}x real time)")
+    print(f"update latency ms: p50 {stats['latency_ms_p50']:.2f}  p99 {stats['latency_ms_p99']:.2f}  max {stats['latency_ms_max']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Reproducible throughput / memory benchmarks on seeded synthetic EEG (eegspec.synthetic).
+
+    python -m benchmarks run --preset quick --out bench.json
+    python -m benchmarks compare baseline.json bench.json --tolerance 0.15
+
+Each benchmark scales one dimension (channels, duration, sample rate, subjects) around a base config and
+records the best-of-N wall time and the peak memory (tracemalloc for in-process stages, ru_maxrss of a fresh
+interpreter for the end-to-end CLI). ``compare`` matches rows by (bench, dim, value) and exits with status 1
+if any time or memory figure grew by more than the tolerance.
+"""
+import argparse, json, os, platform, subprocess, sys, tempfile, time, tracemalloc
+import numpy as np
+
+PRESETS = {
+    "quick": dict(base=dict(n_channels=16, seconds=30.0, sfreq=250.0), repeat=3,
+                  channels=[8, 32, 64], seconds=[15.0, 60.0], sfreq=[250.0, 500.0], subjects=[2, 4]),
+    "full": dict(base=dict(n_channels=32, seconds=120.0, sfreq=250.0), repeat=5,
+                 channels=[8, 32, 128, 256], seconds=[30.0, 120.0, 600.0], sfreq=[250.0, 500.0, 1000.0], subjects=[4, 16, 64]),
+}
+METRICS = ("time_s", "peak_mb")
+
+def _peak_rss_mb(children: bool = False):
+    """Peak RSS of this process (or of its largest waited-for child), None where ``resource`` is missing."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+def _measure(fn, repeat):
+    """(best wall time, tracemalloc peak MB of one call)."""
+    fn()  # warm-up (imports, caches)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak / 2**20
+
+def _configs(preset, dims):
+    from eegspec.synthetic import SyntheticConfig
+    p = PRESETS[preset]
+    for dim in dims:
+        key = {"channels": "n_channels", "seconds": "seconds", "sfreq": "sfreq"}[dim]
+        for v in p[dim]:
+            yield dim, v, SyntheticConfig(**dict(p["base"], **{key: v}), tasks=("rest",))
+
+def bench_psd(preset, repeat):
+    from eegspec.synthetic import synth_subject
+    from eegspec.psd import compute_psd_welch
+    for dim, v, cfg in _configs(preset, ("channels", "seconds", "sfreq")):
+        x = synth_subject(cfg)["rest"].T
+        nperseg = int(2 * cfg.sfreq)
+        t, peak = _measure(lambda: compute_psd_welch(x, cfg.sfreq, nperseg=nperseg), repeat)
+        yield dict(bench="psd", dim=dim, value=v, time_s=t, peak_mb=peak,
+                   extra=dict(samples_per_s=x.size / t, nperseg=nperseg))
+
+def bench_features(preset, repeat):
+    from eegspec.synthetic import synth_subject
+    from eegspec.psd import compute_psd_welch
+    from eegspec.analyze import compute_task_metrics
+    for dim, v, cfg in _configs(preset, ("channels", "sfreq")):
+        x = synth_subject(cfg)["rest"].T
+        freqs, psd = compute_psd_welch(x, cfg.sfreq, nperseg=int(2 * cfg.sfreq))
+        ch = [f"Ch{i+1}" for i in range(cfg.n_channels)]
+        t, peak = _measure(lambda: compute_task_metrics(psd, freqs, ch, (8.0, 13.0), False), repeat)
+        yield dict(bench="features", dim=dim, value=v, time_s=t, peak_mb=peak)
+
+def bench_io(preset, repeat):
+    from eegspec.synthetic import SyntheticConfig, write_cohort
+    from eegspec.utils import load_subject_tasks
+    cfg = SyntheticConfig(**PRESETS[preset]["base"])
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in ("json", "raw", "npz"):
+            folder = os.path.join(tmp, fmt)
+            t_w, _ = _measure(lambda: write_cohort(folder, cfg, fmt), 1)
+            path = write_cohort(folder, cfg, fmt)[0]
+            size = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+            t_r, peak = _measure(lambda: [float(np.asarray(a).sum()) for a in load_subject_tasks(path).values()], repeat)
+            yield dict(bench="io_read", dim="format", value=fmt, time_s=t_r, peak_mb=peak,
+                       extra=dict(write_s=t_w, bytes=size, mb_per_s=size / 2**20 / t_r))
+
+def bench_e2e(preset, repeat):
+    """End-to-end `eegspec analyze` in a fresh interpreter per point (so ru_maxrss is per run)."""
+    from eegspec.synthetic import SyntheticConfig, write_cohort
+    p = PRESETS[preset]
+    for n in p["subjects"]:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = SyntheticConfig(**p["base"], n_subjects=n)
+            write_cohort(os.path.join(tmp, "in"), cfg, "raw")
+            best = None
+            for _ in range(max(1, repeat // 2)):
+                out = subprocess.run([sys.executable, "-m", "benchmarks.suite", "_e2e", os.path.join(tmp, "in"), os.path.join(tmp, "out"),
+                                      str(cfg.sfreq)], check=True, capture_output=True, text=True).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                best = r if best is None or r["time_s"] < best["time_s"] else best
+            yield dict(bench="e2e", dim="subjects", value=n, time_s=best["time_s"], peak_mb=best["parent_rss_mb"],
+                       extra=dict(worker_rss_mb=best["worker_rss_mb"], tasks_per_s=n * len(cfg.tasks) / best["time_s"]))
+
+def _e2e_child(in_dir, out_dir, sfreq):
+    from eegspec.cli import main as cli_main
+    t0 = time.perf_counter()
+    cli_main(["analyze", "--input", in_dir, "--out-dir", out_dir, "--sfreq", sfreq, "--nperseg", str(int(2 * float(sfreq))),
+              "--max-processors", "2", "--no-cache", "--log-level", "WARNING"])
+    print(json.dumps(dict(time_s=time.perf_counter() - t0, parent_rss_mb=_peak_rss_mb(),
+                          worker_rss_mb=_peak_rss_mb(children=True))))
+
+BENCHES = {"psd": bench_psd, "features": bench_features, "io": bench_io, "e2e": bench_e2e}
+
+def _meta(preset):
+    import scipy
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return dict(preset=preset, python=platform.python_version(), numpy=np.__version__, scipy=scipy.__version__,
+                machine=platform.machine(), system=platform.system(), cpus=os.cpu_count(), commit=commit,
+                timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+def run(preset="quick", benches=None, out=None, repeat=None):
+    repeat = repeat or PRESETS[preset]["repeat"]
+    rows = []
+    for name in benches or list(BENCHES):
+        for r in BENCHES[name](preset, repeat):
+            rows.append(r)
+            print(f"{r['bench']:>9} {r['dim']:>9}={r['value']!s:<7} {r['time_s'] * 1e3:10.1f} ms  {r['peak_mb'] or 0:8.1f} MB", flush=True)
+    res = {"meta": _meta(preset), "results": rows}
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(res, f, indent=2)
+    return res
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.15, mem_tolerance: float = None):
+    """Rows (key, metric, base, new, ratio, regressed) for every metric present in both result sets."""
+    mem_tolerance = tolerance if mem_tolerance is None else mem_tolerance
+    base = {(r["bench"], r["dim"], str(r["value"])): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        b = base.get((r["bench"], r["dim"], str(r["value"])))
+        if b is None:
+            continue
+        for m in METRICS:
+            if b.get(m) and r.get(m) is not None:
+                ratio = r[m] / b[m]
+                tol = tolerance if m == "time_s" else mem_tolerance
+                rows.append(((r["bench"], r["dim"], r["value"]), m, b[m], r[m], ratio, ratio > 1.0 + tol))
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("run")
+    sp.add_argument("--preset", choices=list(PRESETS), default="quick")
+    sp.add_argument("--bench", action="append", choices=list(BENCHES), help="Repeatable; default all")
+    sp.add_argument("--repeat", type=int, default=None)
+    sp.add_argument("--out", default="bench.json")
+    sp = sub.add_parser("compare")
+    sp.add_argument("baseline")
+    sp.add_argument("current")
+    sp.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative slowdown")
+    sp.add_argument("--mem-tolerance", type=float, default=None, help="Allowed relative memory growth (default: --tolerance)")
+    sp = sub.add_parser("_e2e")
+    sp.add_argument("in_dir"); sp.add_argument("out_dir"); sp.add_argument("sfreq")
+    args = ap.parse_args(argv)
+    if args.cmd == "_e2e":
+        return _e2e_child(args.in_dir, args.out_dir, args.sfreq)
+    if args.cmd == "run":
+        run(args.preset, args.bench, args.out, args.repeat)
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.tolerance, args.mem_tolerance)
+    for key, m, b, n, ratio, bad in rows:
+        print(f"{'REGRESSION' if bad else 'ok':>10}  {'/'.join(map(str, key)):<28} {m:<8} {b:10.4g} -> {n:10.4g}  x{ratio:.2f}")
+    n_bad = sum(r[-1] for r in rows)
+    print(f"{len(rows)} comparison(s), {n_bad} regression(s)")
+    sys.exit(1 if n_bad else 0)
+
+if __name__ == "__main__":
+    main()
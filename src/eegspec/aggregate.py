@@ -0,0 +1,184 @@
+"""Cohort-level aggregation: dense (subject, task, channel, feature) arrays, TRP and group statistics.
+
+Per-task feature tables are collected into one NaN-padded cube (missing tasks stay NaN), from which
+
+- band powers form the (subject, task, channel, band) arrays ``abs``/``rel``
+- TRP against a baseline task is computed for every subject at once (``trp.trp_from_bandpowers``)
+- group mean, SD, count and percentiles are taken over the subject axis
+
+in single vectorized NumPy calls. ``aggregate_outputs`` reads an existing output folder in parallel subject
+shards; ``analyze_entry(aggregate=True)`` feeds the same ``CohortTable`` from the in-memory results instead.
+Results go to ``<out>/aggregate.npz``.
+"""
+import os, json, uuid, warnings
+import numpy as np
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .store import ResultStore, metrics_feature_table
+from .trp import trp_from_bandpowers
+
+DEFAULT_PERCENTILES = (5.0, 25.0, 50.0, 75.0, 95.0)
+AGGREGATE_FILE = "aggregate.npz"
+
+class CohortTable:
+    """Collects (task, channel, feature) tables per subject and stacks them into dense cohort arrays."""
+    def __init__(self):
+        self._rows: Dict[str, Dict[str, Tuple[np.ndarray, float]]] = {}
+        self.channels: Optional[List[str]] = None
+        self.feature_names: Optional[List[str]] = None
+        self.tasks: List[str] = []
+        self.skipped: List[str] = []
+
+    def expect(self, task_names: Sequence[str]):
+        """Fix the task order (e.g. file order) before results arrive in completion order."""
+        for t in task_names:
+            if t not in self.tasks:
+                self.tasks.append(t)
+
+    def add(self, subject_id: str, task: str, feature_names: Sequence[str], table: np.ndarray, faa: float,
+            channels: Optional[Sequence[str]] = None):
+        """One task of one subject: table (n_ch, n_feat). Subjects whose montage or features differ from
+        the first subject added are skipped (listed in ``skipped``)."""
+        table = np.asarray(table, dtype=np.float32)
+        if channels is None:
+            channels = [f"Ch{i+1}" for i in range(table.shape[0])]
+        if self.channels is None:
+            self.channels, self.feature_names = list(channels), list(feature_names)
+        if table.shape[0] != len(self.channels) or list(feature_names) != self.feature_names:
+            if subject_id not in self.skipped:
+                self.skipped.append(subject_id)
+            self._rows.pop(subject_id, None)
+            return
+        if subject_id in self.skipped:
+            return
+        if task not in self.tasks:
+            self.tasks.append(task)
+        self._rows.setdefault(subject_id, {})[task] = (table, float(faa))
+
+    def add_subject(self, subject_id: str, tasks: Sequence[str], feature_names: Sequence[str], features: np.ndarray,
+                    faa: Sequence[float], channels: Optional[Sequence[str]] = None):
+        for i, t in enumerate(tasks):
+            self.add(subject_id, str(t), feature_names, features[i], faa[i], channels)
+
+    def subjects(self) -> List[str]:
+        return sorted(self._rows)
+
+    def dense(self) -> Dict[str, Any]:
+        """subjects, tasks, channels, feature_names, features (n_subj, n_task, n_ch, n_feat) float32, faa (n_subj, n_task)."""
+        sids = self.subjects()
+        n_ch = len(self.channels or [])
+        n_feat = len(self.feature_names or [])
+        cube = np.full((len(sids), len(self.tasks), n_ch, n_feat), np.nan, dtype=np.float32)
+        faa = np.full((len(sids), len(self.tasks)), np.nan)
+        tix = {t: i for i, t in enumerate(self.tasks)}
+        for si, sid in enumerate(sids):
+            for t, (table, v) in self._rows[sid].items():
+                cube[si, tix[t]] = table
+                faa[si, tix[t]] = v
+        return {"subjects": sids, "tasks": list(self.tasks), "channels": list(self.channels or []),
+                "feature_names": list(self.feature_names or []), "features": cube, "faa": faa}
+
+def _group_stats(x: np.ndarray, percentiles: Sequence[float]) -> Dict[str, np.ndarray]:
+    """NaN-aware statistics over axis 0 (subjects)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN slices (task missing for everyone)
+        return {"mean": np.nanmean(x, axis=0), "sd": np.nanstd(x, axis=0, ddof=1) if x.shape[0] > 1 else np.full(x.shape[1:], np.nan),
+                "n": np.sum(~np.isnan(x), axis=0), "pct": np.nanpercentile(x, percentiles, axis=0)}
+
+def aggregate_arrays(dense: Dict[str, Any], baseline: Optional[str] = None, trp_mode: str = "ratio",
+                     percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+    """Band cubes, TRP vs ``baseline`` and group statistics from ``CohortTable.dense()`` output."""
+    names = dense["feature_names"]
+    cube = dense["features"]
+    bands = [n[4:] for n in names if n.startswith("abs_")]
+    out = dict(dense, bands=bands, percentiles=np.asarray(percentiles, dtype=np.float64))
+    out["abs"] = cube[..., [names.index("abs_" + b) for b in bands]]
+    out["rel"] = cube[..., [names.index("rel_" + b) for b in bands]]
+    for key, x in (("features", cube), ("faa", dense["faa"])):
+        for stat, v in _group_stats(x, percentiles).items():
+            out[f"{key}_{stat}"] = v
+    if baseline is not None:
+        if baseline not in dense["tasks"]:
+            raise ValueError(f"Baseline task '{baseline}' not found; tasks: {dense['tasks']}")
+        base = out["abs"][:, dense["tasks"].index(baseline)][:, None]
+        trp = trp_from_bandpowers(base.astype(np.float64), out["abs"].astype(np.float64), mode=trp_mode)
+        out.update(baseline=baseline, trp_mode=trp_mode, trp=trp.astype(np.float32))
+        for stat, v in _group_stats(trp, percentiles).items():
+            out[f"trp_{stat}"] = v
+    return out
+
+def write_aggregate(path: str, agg: Dict[str, Any]):
+    arrays = {k: (np.array(v) if isinstance(v, (list, str)) else v) for k, v in agg.items()}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"  # concurrent aggregate/merge runs never share a temp file
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+def list_outputs(out_dir: str) -> Tuple[str, List[str]]:
+    """('npz'|'json', subject ids) of an analyze output folder."""
+    sdir = os.path.join(out_dir, "subjects")
+    if not os.path.isdir(sdir):
+        return "npz", []
+    names = sorted(os.listdir(sdir))
+    npz = [n[:-4] for n in names if n.endswith(".npz")]
+    if npz:
+        return "npz", npz
+    return "json", [n for n in names if os.path.isdir(os.path.join(sdir, n))]
+
+def _json_channels(sdir: str, task: str) -> Optional[List[str]]:
+    """Channel names stored in ``psd_<task>.json`` (None if the file is missing or has none)."""
+    try:
+        with open(os.path.join(sdir, f"psd_{task}.json"), "r", encoding="utf-8") as f:
+            ch = json.load(f).get("channels")
+    except (OSError, ValueError):
+        return None
+    return [str(c) for c in ch] if ch else None
+
+def _load_shard(out_dir: str, fmt: str, subject_ids: List[str]) -> List[Tuple]:
+    """(sid, tasks, channels, feature_names, features, faa) for each readable subject of one shard."""
+    rows = []
+    if fmt == "npz":
+        store = ResultStore(out_dir)
+        for sid in subject_ids:
+            d = store.load_subject(sid, ["tasks", "channels", "feature_names", "features", "faa"])
+            rows.append((sid, [str(t) for t in d["tasks"]], [str(c) for c in d["channels"]],
+                         [str(n) for n in d["feature_names"]], np.array(d["features"]), np.array(d["faa"])))
+        return rows
+    for sid in subject_ids:
+        sdir = os.path.join(out_dir, "subjects", sid)
+        tasks, tables, faa, names = [], [], [], None
+        for fn in sorted(os.listdir(sdir)):
+            if fn.startswith("metrics_") and fn.endswith(".json"):
+                with open(os.path.join(sdir, fn), "r", encoding="utf-8") as f:
+                    m = json.load(f)
+                names, table = metrics_feature_table(m)
+                tasks.append(m.get("task", fn[len("metrics_"):-5])); tables.append(table); faa.append(m.get("FAA", np.nan))
+        if tasks:
+            rows.append((sid, tasks, _json_channels(sdir, tasks[0]), names, np.stack(tables), np.asarray(faa, dtype=np.float64)))
+    return rows
+
+def aggregate_outputs(out_dir: str, baseline: Optional[str] = None, trp_mode: str = "ratio",
+                      percentiles: Sequence[float] = DEFAULT_PERCENTILES, max_workers: int = 4,
+                      shard_size: Optional[int] = None, path: Optional[str] = None) -> Dict[str, Any]:
+    """Aggregate an existing npz or json output folder and write ``aggregate.npz``.
+    Subjects are read in shards by up to ``max_workers`` processes."""
+    fmt, sids = list_outputs(out_dir)
+    if not sids:
+        raise FileNotFoundError(f"No subject outputs under {out_dir}")
+    if shard_size is None:
+        shard_size = max(1, -(-len(sids) // (4 * max(1, max_workers))))
+    shards = [sids[i:i + shard_size] for i in range(0, len(sids), shard_size)]
+    table = CohortTable()
+    if max_workers > 1 and len(shards) > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(_load_shard, [out_dir] * len(shards), [fmt] * len(shards), shards))
+    else:
+        results = [_load_shard(out_dir, fmt, s) for s in shards]
+    for rows in results:
+        for sid, tasks, channels, names, feats, faa in rows:
+            table.add_subject(sid, tasks, names, feats, faa, channels)
+    agg = aggregate_arrays(table.dense(), baseline, trp_mode, percentiles)
+    agg["skipped"] = list(table.skipped)
+    write_aggregate(path or os.path.join(out_dir, AGGREGATE_FILE), agg)
+    return agg
@@ -1,133 +1,589 @@
-import os, json, traceback
+import os, json, itertools, time, traceback
 import numpy as np
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Union
 from .base import BaseApp
-from .utils import load_subject_tasks_json, list_subject_jsons, subject_id_from_path, resolve_channels, save_json
-from .psd import compute_psd_welch
-from .features import bandpower, spectral_entropy, spectral_moments, spectral_edge, median_frequency
-from .iaf import estimate_iaf
-from .faa import faa_from_psd
+from .utils import subject_id_from_path, resolve_channels, save_json
+from .psd import compute_psd_welch, compute_psd_welch_windows, compute_psd_multitaper, PSD_METHODS
+from .features import FeatureEngine, TOTAL_RANGE, std_bands
+from .iaf import IAFEstimator, individual_bands
+from .connectivity import connectivity_bands
+from .aggregate import CohortTable, aggregate_arrays, write_aggregate, AGGREGATE_FILE
+from .store import OUTPUT_FORMATS, NpzResultWriter, metrics_feature_table
+from .sources import TaskSource, open_task, describe_subject, release_shared, release_subject, shared_bytes_estimate
+from .cache import ResultCache, DEFAULT_CACHE_BYTES, data_digest
+from .scheduler import ScheduledTask, LookaheadWindow, iter_subject_files, run_pipeline
+from .profiling import make_profiler, rollup, write_chrome_trace, TRACE_FILE
+from .logqueue import LogListener, init_worker_logging, worker_logger
+from .shard import WorkQueue, shard_filter, shard_tag, DEFAULT_LEASE_TIMEOUT, SUMMARY_FILE
+from .resample import ResamplePlan, plan_resample, apply_plan
+from .writeback import BackgroundWriter, worker_writer, DEFAULT_WRITE_QUEUE
+from .epochs import EpochSpec, compute_epoch_psd, load_events
 
-def run_task_compute(subject_id: str, task_name: str, data_txc: np.ndarray, sfreq: float,
+OUTPUT_KEYS = ("psd", "metrics", "tfr", "conn", "epochs")  # per-task output files of the JSON format
+
+def compute_task_metrics(psd: np.ndarray, freqs: np.ndarray, ch_names: List[str],
+                         alpha_band: Tuple[float,float], use_db_faa: bool, individualize: bool = False) -> Dict[str, Any]:
+    """All per-task metrics from a (n_channels, n_freqs) PSD, JSON-ready.
+    IAF (peak and centre of gravity per channel) comes from the same PSD. With ``individualize`` theta and
+    alpha are re-centred on the channel-median IAF peak before band powers are taken (standard bands
+    are kept if no peak is found); the bands used are reported under ``bands``."""
+    iaf = IAFEstimator.for_grid(freqs).compute(psd)
+    bands = std_bands(alpha_band)
+    if individualize:
+        peaks = iaf["peak"][np.isfinite(iaf["peak"])]
+        bands.update(individual_bands(float(np.median(peaks)) if peaks.size else None) or {})
+    eng = FeatureEngine.for_grid(freqs, bands, total_range=TOTAL_RANGE)
+    feats = eng.compute(psd)
+    bp_abs, bp_rel, ent, moms = feats["bands_abs"], feats["bands_rel"], feats["entropy"], feats["moments"]
+    sef95, f50 = feats["SEF95"], feats["F50"]
+    faa_val = eng.faa(bp_abs, ch_names, left="F3", right="F4", band="alpha", use_db=use_db_faa)
+    return {
+        "bands_abs": {k: v.tolist() for k, v in bp_abs.items()},
+        "bands_rel": {k: v.tolist() for k, v in bp_rel.items()},
+        "entropy": ent.tolist(),
+        "moments": {k: v.tolist() for k, v in moms.items()},
+        "SEF95": sef95.tolist(),
+        "F50": f50.tolist(),
+        "IAF": {k: v.tolist() for k, v in iaf.items()},
+        "FAA": faa_val,
+        "alpha_band": list(alpha_band),
+        "bands": {k: list(v) for k, v in bands.items()}
+    }
+
+def compute_tfr_features(times: np.ndarray, freqs: np.ndarray, psd_t: np.ndarray, ch_names: List[str],
+                         alpha_band: Tuple[float,float], use_db_faa: bool,
+                         bands: Dict[str, Tuple[float,float]] = None) -> Dict[str, Any]:
+    """Features of a (n_windows, n_channels, n_freqs) PSD stack in one batched FeatureEngine call.
+    ``bands`` (default: the standard bands with ``alpha_band``) should be the task's, e.g. compute_task_metrics'
+    ``bands`` with ``individualize``. Returns times, feature_names, features float32 (time, channel, feature)
+    and faa (n_windows,)."""
+    eng = FeatureEngine.for_grid(freqs, bands or std_bands(alpha_band), total_range=TOTAL_RANGE)
+    feats = eng.compute(psd_t)
+    feats["IAF"] = IAFEstimator.for_grid(freqs).compute(psd_t)
+    names, table = metrics_feature_table(feats)
+    faa = eng.faa(feats["bands_abs"], ch_names, left="F3", right="F4", band="alpha", use_db=use_db_faa)
+    return {"times": np.asarray(times, dtype=np.float64), "feature_names": names, "features": table,
+            "faa": np.broadcast_to(np.asarray(faa, dtype=np.float64), times.shape).copy()}
+
+def run_task_compute(subject_id: str, task_name: str, data_txc: Union[np.ndarray, TaskSource], sfreq: float,
                      nperseg: int, noverlap: int, window: str,
                      ch_names: List[str], alpha_band: Tuple[float,float],
                      use_db_faa: bool, out_dir: str,
-                     log_kwargs: Dict[str, Any]) -> Dict[str, Any]:
-    app = BaseApp(**log_kwargs)
+                     log_kwargs: Dict[str, Any], output_format: str = "json",
+                     cache_dir: str = None,
+                     window_sec: float = None, step_sec: float = None,
+                     connectivity: List[str] = None, conn_epoch_sec: float = 2.0,
+                     individualize: bool = False, psd_method: str = "welch", mt_bandwidth: float = None, mt_adaptive: bool = False,
+                     profile: bool = False, submitted_at: float = None, resample: ResamplePlan = None,
+                     write_queue: int = 0, epochs: EpochSpec = None) -> Dict[str, Any]:
+    """Compute PSD and metrics for one task. ``data_txc`` is an (n_times, n_channels) array or a TaskSource
+    that the worker opens itself (memory-mapped file or shared memory).
+    With ``output_format="json"`` the worker writes psd_/metrics_ JSON files itself (with ``write_queue`` > 0
+    on this process's background writer, see writeback.worker_writer, so the next task can start at once);
+    with ``"npz"`` it returns float32 arrays for the parent's NpzResultWriter.
+    With ``cache_dir`` the PSD and the metrics are looked up in / stored to a ResultCache; the result's
+    ``cache`` entry reports "hit"/"miss" per stage.
+    With ``window_sec`` the task is also analysed in sliding windows (``step_sec``, default ``window_sec``):
+    each FFT segment is computed once and all features are stored as a (time, channel, feature) array.
+    With ``connectivity`` (method names) band-averaged multitaper connectivity over ``conn_epoch_sec`` epochs
+    is added for the standard bands: {method: (n_bands, n_ch, n_ch)}.
+    ``individualize`` derives theta/alpha from the task's IAF (see compute_task_metrics).
+    ``psd_method="multitaper"`` replaces the Welch PSD of the whole task by a DPSS multitaper estimate
+    (``mt_bandwidth`` Hz, optional adaptive weighting) averaged onto the same ``nperseg`` grid; the sliding-window
+    output stays Welch-based.
+    ``resample`` (a resample.ResamplePlan) first downsamples the data; ``sfreq``, ``nperseg`` and ``noverlap``
+    then refer to the resampled data.
+    With ``epochs`` (an epochs.EpochSpec) the task is cut into fixed-length or event-locked epochs: all epoch
+    PSDs are one (epoch, channel, freq) batch, bad epochs are rejected, the task PSD is the mean over the kept
+    epochs and every epoch's features are stored as (epoch, channel, feature) float32 with ``keep``.
+    With ``profile`` the result carries ``profile`` (per-stage records, see profiling.StageProfiler) and
+    ``finished_at``; ``submitted_at`` (parent wall clock) adds the queue/IPC wait as a stage.
+    In a pool started with ``logqueue.init_worker_logging`` records go to the parent's LogListener;
+    otherwise a per-task BaseApp is built from ``log_kwargs``."""
+    t_wall, t0 = time.time(), time.perf_counter()
+    prof = make_profiler(profile, proc="worker", subject=subject_id, task=task_name)
+    if profile and submitted_at is not None:
+        prof.add("queue_wait", submitted_at, max(0.0, t_wall - submitted_at))  # pickling + pool queue + IPC
+    with prof.stage("log_setup"):
+        logger = worker_logger(subject_id, task_name) or BaseApp(**log_kwargs).logger
     try:
-        app.logger.info(f"[Task start] subject={subject_id} task={task_name} shape={data_txc.shape}")
-        freqs, psd = compute_psd_welch(data_txc, sfreq=sfreq, nperseg=nperseg, noverlap=noverlap, window=window)
-        std_bands = {"delta":(1.0,4.0), "theta":(4.0,7.0), "alpha":alpha_band, "beta":(13.0,30.0), "gamma":(30.0,45.0)}
-        bp_abs = bandpower(psd, freqs, std_bands, relative=False)
-        bp_rel = bandpower(psd, freqs, std_bands, relative=True, total_range=(1.0,45.0))
-        ent = spectral_entropy(psd, freqs, fmin=1.0, fmax=45.0, log_base=np.e)
-        moms = spectral_moments(psd, freqs, fmin=1.0, fmax=45.0)
-        sef95 = spectral_edge(psd, freqs, percent=0.95, fmin=1.0, fmax=45.0)
-        f50 = median_frequency(psd, freqs, fmin=1.0, fmax=45.0)
-        faa_val = faa_from_psd(psd, freqs, ch_names, left="F3", right="F4", alpha=alpha_band, use_db=use_db_faa)
+        res = _task_body(logger, prof, subject_id, task_name, data_txc, sfreq, nperseg, noverlap, window, ch_names, alpha_band,
+                         use_db_faa, out_dir, output_format, cache_dir, window_sec, step_sec, connectivity, conn_epoch_sec, individualize,
+                         (psd_method, mt_bandwidth, mt_adaptive), resample, write_queue, epochs)
+    except Exception as e:
+        logger.error(f"[Task error] subject={subject_id} task={task_name}: {e}")
+        logger.debug(traceback.format_exc())
+        res = {"ok": False, "subject": subject_id, "task": task_name, "error": str(e)}
+    if profile:
+        prof.add("task", t_wall, time.perf_counter() - t0)
+        res["profile"] = prof.records
+        res["finished_at"] = time.time()
+    return res
+
+def _task_body(logger, prof, subject_id, task_name, data_txc, sfreq, nperseg, noverlap, window, ch_names, alpha_band,
+               use_db_faa, out_dir, output_format, cache_dir, window_sec, step_sec, connectivity, conn_epoch_sec, individualize,
+               psd_opts=("welch", None, False), resample=None, write_queue=0, epochs=None):
+    psd_method, mt_bandwidth, mt_adaptive = psd_opts
+    if psd_method not in PSD_METHODS:
+        raise ValueError(f"psd_method must be one of {PSD_METHODS}")
+    mt = dict(bandwidth=mt_bandwidth, adaptive=bool(mt_adaptive)) if psd_method == "multitaper" else None
+    cache = ResultCache(cache_dir) if cache_dir else None
+    cache_info = {}
+    with prof.stage("open"), open_task(data_txc) as data:
+        logger.info(f"[Task start] subject={subject_id} task={task_name} shape={data.shape}")
+        hit = tfr_in = ep_in = None  # tfr_in / ep_in are featurized below, with the bands the task's metrics use
+        if cache is not None:
+            with prof.stage("hash"):
+                digest = data_digest(data)
+            with prof.stage("cache_read"):
+                key_args = (digest, sfreq, nperseg, nperseg // 2 if noverlap is None else noverlap, window)
+                key_extra = dict(**(dict(method="multitaper", **mt) if mt else {}),
+                                 **(dict(resample=resample.as_dict()) if resample else {}),
+                                 **(dict(epochs=epochs.as_dict(task_name)) if epochs else {}))
+                psd_key = cache.psd_key(*key_args, **key_extra)
+                hit = cache.get_psd(psd_key)
+                if window_sec:
+                    tfr_key = cache.psd_key(*key_args, windows=[float(window_sec), step_sec], **key_extra)
+                    # only with the task PSD cached too: otherwise the windowed pass computes it anyway
+                    tfr_in = cache.get_psd_windows(tfr_key) if hit is not None else None
+            cache_info["psd"] = "miss" if hit is None else "hit"
+            if window_sec:
+                cache_info["tfr"] = "miss" if tfr_in is None else "hit"
+        need_tfr = bool(window_sec) and tfr_in is None
+        if resample is not None and (hit is None or need_tfr or connectivity or epochs):
+            with prof.stage("resample"):
+                data = apply_plan(data, resample)
+        if need_tfr:
+            with prof.stage("psd_windows"):
+                times, freqs, psd_t, psd = compute_psd_welch_windows(data, sfreq=sfreq, nperseg=nperseg, noverlap=noverlap, window=window,
+                                                                    window_sec=window_sec, step_sec=step_sec)
+            tfr_in = (times, freqs, psd_t)
+            del psd_t
+            if cache is not None:
+                with prof.stage("cache_write"):
+                    cache.put_psd_windows(tfr_key, *tfr_in)
+        if epochs is not None:
+            with prof.stage("epochs"):
+                freqs, psd_e, info = compute_epoch_psd(data, sfreq, epochs, task_name, nperseg, noverlap, window)
+                keep = info["keep"]
+                if not keep.any():
+                    raise ValueError(f"all {keep.size} epochs rejected")
+                psd = psd_e[keep].mean(axis=0)
+            ep_in = (freqs, psd_e, info)
+        if hit is None and ep_in is None and (mt or not window_sec):
+            with prof.stage("psd"):
+                if mt:
+                    freqs, psd = compute_psd_multitaper(data, sfreq, nperseg=nperseg, **mt)
+                else:
+                    freqs, psd = compute_psd_welch(data, sfreq=sfreq, nperseg=nperseg, noverlap=noverlap, window=window)
+        if hit is None:
+            if cache is not None:
+                with prof.stage("cache_write"):
+                    cache.put_psd(psd_key, freqs, psd)
+        else:
+            freqs, psd = hit
+        conn = None
+        if connectivity:
+            with prof.stage("connectivity"):
+                bands = std_bands(alpha_band)
+                conn = {m: v.astype(np.float32) for m, v in
+                        connectivity_bands(data, sfreq, bands, connectivity, epoch_sec=conn_epoch_sec).items()}
+                conn["bands"] = np.array(list(bands))
+
+    metrics = None
+    if cache is not None:
+        feat_key = cache.features_key(psd_key, bands=std_bands(alpha_band), total_range=TOTAL_RANGE,
+                                      ch_names=list(ch_names), faa=("F3", "F4", bool(use_db_faa)),
+                                      iaf=True, individualize=bool(individualize))
+        with prof.stage("cache_read"):
+            metrics = cache.get_features(feat_key)
+        cache_info["features"] = "miss" if metrics is None else "hit"
+    if metrics is None:
+        with prof.stage("features"):
+            metrics = compute_task_metrics(psd, freqs, ch_names, alpha_band, use_db_faa, individualize)
+        if cache is not None:
+            with prof.stage("cache_write"):
+                cache.put_features(feat_key, metrics)
+    metrics = dict({"subject": subject_id, "task": task_name}, **metrics)
+    faa_val = metrics["FAA"]
+    task_bands = {k: tuple(v) for k, v in metrics["bands"].items()}
+    tfr = ep = None
+    if tfr_in is not None:
+        with prof.stage("tfr_features"):
+            tfr = compute_tfr_features(*tfr_in, ch_names, alpha_band, use_db_faa, task_bands)
+        del tfr_in
+    if ep_in is not None:
+        freqs_e, psd_e, info = ep_in
+        del ep_in
+        with prof.stage("epoch_features"):
+            f = compute_tfr_features(info["onsets"], freqs_e, psd_e, ch_names, alpha_band, use_db_faa, task_bands)
+            ep = {"onsets": f["times"], "index": info["index"], "keep": info["keep"], "features": f["features"], "faa": f["faa"]}
+        del psd_e
 
+    if output_format == "npz":
+        with prof.stage("payload"):
+            names, table = metrics_feature_table(metrics)
+            payload = {"task": task_name, "freqs": freqs, "psd": psd.astype(np.float32), "feature_names": names,
+                       "features": table, "faa": faa_val, "alpha_band": list(alpha_band), "tfr": tfr, "conn": conn, "epochs": ep}
+        logger.info(f"[Task done] subject={subject_id} task={task_name} -> npz store")
+        res = {"ok": True, "subject": subject_id, "task": task_name, "payload": payload, "cache": cache_info}
+        if ep is not None:
+            res["epochs_kept"] = [int(ep["keep"].sum()), int(ep["keep"].size)]
+        return res
+
+    with prof.stage("write"):
         subj_dir = os.path.join(out_dir, "subjects", subject_id)
         os.makedirs(subj_dir, exist_ok=True)
         psd_path = os.path.join(subj_dir, f"psd_{task_name}.json")
         metrics_path = os.path.join(subj_dir, f"metrics_{task_name}.json")
+        names, table = metrics_feature_table(metrics)
+        res = {"ok": True, "subject": subject_id, "task": task_name, "psd": psd_path, "metrics": metrics_path, "cache": cache_info,
+               "feature_names": names, "features": table, "faa": faa_val}
+        if tfr is not None:
+            res["tfr"] = os.path.join(subj_dir, f"tfr_{task_name}.npz")
+        if conn is not None:
+            res["conn"] = os.path.join(subj_dir, f"conn_{task_name}.npz")
+        if ep is not None:
+            res["epochs"] = os.path.join(subj_dir, f"epochs_{task_name}.npz")
+            res["epochs_kept"] = [int(ep["keep"].sum()), int(ep["keep"].size)]
+        args = (logger, res, freqs, psd, ch_names, metrics, tfr, conn, ep)
+        if write_queue:
+            for k in OUTPUT_KEYS:  # a file left by an earlier run must not pass for this run's output
+                if k in res:
+                    try:
+                        os.unlink(res[k])
+                    except FileNotFoundError:
+                        pass
+            worker_writer(write_queue).submit(_write_task_outputs, *args, label=f"{subject_id}/{task_name}")
+        else:
+            _write_task_outputs(*args)
+    logger.info(f"[Task done] subject={subject_id} task={task_name} -> psd:{psd_path} metrics:{metrics_path}")
+    return res
 
-        save_json({"freqs": freqs.tolist(), "psd": psd.tolist(), "channels": ch_names}, psd_path)
-
-        metrics = {
-            "subject": subject_id,
-            "task": task_name,
-            "bands_abs": {k: v.tolist() for k, v in bp_abs.items()},
-            "bands_rel": {k: v.tolist() for k, v in bp_rel.items()},
-            "entropy": ent.tolist(),
-            "moments": {k: v.tolist() for k, v in moms.items()},
-            "SEF95": sef95.tolist(),
-            "F50": f50.tolist(),
-            "FAA": faa_val,
-            "alpha_band": list(alpha_band)
-        }
-        save_json(metrics, metrics_path)
-        app.logger.info(f"[Task done] subject={subject_id} task={task_name} -> psd:{psd_path} metrics:{metrics_path}")
-        return {"ok": True, "subject": subject_id, "task": task_name, "psd": psd_path, "metrics": metrics_path}
+def _write_task_outputs(logger, res, freqs, psd, ch_names, metrics, tfr, conn, ep=None):
+    try:
+        save_json({"freqs": freqs.tolist(), "psd": psd.tolist(), "channels": ch_names}, res["psd"])
+        save_json(metrics, res["metrics"])
+        if tfr is not None:
+            np.savez(res["tfr"], channels=np.array(list(ch_names)), **{k: np.asarray(v) for k, v in tfr.items()})
+        if conn is not None:
+            np.savez(res["conn"], channels=np.array(list(ch_names)), **conn)
+        if ep is not None:
+            np.savez(res["epochs"], channels=np.array(list(ch_names)), feature_names=np.array(metrics_feature_table(metrics)[0]), **ep)
     except Exception as e:
-        app.logger.error(f"[Task error] subject={subject_id} task={task_name}: {e}")
-        app.logger.debug(traceback.format_exc())
-        return {"ok": False, "subject": subject_id, "task": task_name, "error": str(e)}
+        logger.error(f"[Write error] subject={res['subject']} task={res['task']}: {e}")
+        for k in OUTPUT_KEYS:  # no partial outputs: a task's files exist only if all of them were written
+            if k in res:
+                try:
+                    os.unlink(res[k])
+                except FileNotFoundError:
+                    pass
+        raise
+
+def _index_store(summary: Dict[str, Any], subject_id: str, store_path: str):
+    for entry in summary.get("subjects", {}).get(subject_id, {}).values():
+        entry["store"] = store_path
 
 def analyze_entry(input_path: str, sfreq: float, out_dir: str,
                   nperseg: int = 1024, noverlap: int = None, window: str = "hann",
                   channels_file: str = None,
                   alpha: str = "8,13", faa_db: bool = False,
                   max_processors: int = 4,
-                  log_kwargs: Dict[str, Any] = None) -> Dict[str, Any]:
+                  log_kwargs: Dict[str, Any] = None,
+                  output_format: str = "npz",
+                  lookahead_tasks: int = None, lookahead_bytes: int = None,
+                  cache_dir: str = None, cache_max_bytes: int = DEFAULT_CACHE_BYTES,
+                  window_sec: float = None, step_sec: float = None,
+                  connectivity: List[str] = None, conn_epoch_sec: float = 2.0,
+                  aggregate: bool = False, baseline: str = None, trp_mode: str = "ratio",
+                  individualize: bool = False, profile: bool = False,
+                  log_mode: str = "queue", task_logs: bool = False,
+                  psd_method: str = "welch", mt_bandwidth: float = None, mt_adaptive: bool = False,
+                  shard: Tuple[int, int] = None, work_queue: str = None,
+                  lease_timeout: float = DEFAULT_LEASE_TIMEOUT, target_sfreq: Union[float, str] = None,
+                  prefetch: int = 2, write_queue: int = DEFAULT_WRITE_QUEUE,
+                  epoch_sec: float = None, epoch_step_sec: float = None, events: Union[str, Dict[str, Any]] = None,
+                  epoch_tmin: float = 0.0, reject_ptp: float = None, reject_var: float = None) -> Dict[str, Any]:
+    """Analyze every subject under ``input_path`` with a pipelined scheduler.
+    Subjects are opened lazily while at most ``lookahead_tasks`` (default ``2 * max_processors``) tasks
+    and, optionally, ``lookahead_bytes`` of samples are queued or running.
+    ``cache_dir`` enables the content-addressed ResultCache; it is trimmed to ``cache_max_bytes`` after the run
+    unless ``shard`` or ``work_queue`` is set (other processes may be reading or writing the same entries).
+    ``window_sec``/``step_sec`` add the time-resolved (time, channel, feature) output per task.
+    ``connectivity`` (e.g. ["coh", "wpli"]) adds band-averaged channel x channel connectivity per task.
+    ``aggregate`` collects every task's feature table as it finishes and writes ``aggregate.npz`` (cohort
+    arrays, group statistics and, with ``baseline``, TRP) at the end, without re-reading the outputs.
+    ``individualize`` uses IAF-based theta/alpha bands per task.
+    ``profile`` times every worker and parent stage (with RSS samples), rolls the totals up into
+    ``summary["profile"]`` and writes a Chrome trace to ``<out_dir>/profile_trace.json``.
+    ``psd_method`` ("welch" or "multitaper", with ``mt_bandwidth``/``mt_adaptive``) selects the task PSD estimator.
+    ``target_sfreq`` (Hz or "auto", see resample.plan_resample) downsamples every task before the PSD, with
+    ``nperseg``/``noverlap`` scaled to keep the segment length and frequency resolution; ``summary["resample"]``
+    records the plan.
+    ``prefetch`` subject files are read and decoded on threads ahead of the scheduler (a JSON read in flight
+    counts its file size against ``lookahead_bytes``); outputs are written
+    behind bounded queues of ``write_queue`` jobs (the npz store on a parent thread, JSON files on a thread in
+    each worker; with a work queue JSON writes stay synchronous so a subject is only marked done once its files
+    exist). 0 disables either. Tasks enter the summary and ``run["tasks_ok"]`` only once their outputs are
+    written; failed writes count as failed tasks and in ``run["writes_failed"]``.
+    ``epoch_sec`` switches to epoched mode (see epochs.EpochSpec): fixed-length epochs every ``epoch_step_sec``
+    or, for tasks listed in ``events`` (path of an events JSON or the loaded dict), epochs starting ``epoch_tmin``
+    s from each onset; ``reject_ptp``/``reject_var`` drop artefact epochs before the task PSD is averaged.
+    ``log_mode="queue"`` sends worker log records to one batched LogListener in this process (``task_logs``
+    adds per-task files under ``log_dir``); ``"task"`` builds a BaseApp per task in the workers.
+    ``shard=(i, n)`` analyzes every n-th subject file starting at i; ``work_queue`` (a directory shared by
+    all cooperating processes) claims subjects one at a time through lease files (see shard.WorkQueue).
+    Either writes ``summary_<tag>.json`` (combine with shard.merge_summaries) and defers ``aggregate`` to the merge."""
     if log_kwargs is None:
         log_kwargs = dict(log_level="INFO", log_dir=None, log_prefix="", log_suffix="", log_percentage=None)
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {OUTPUT_FORMATS}")
+    if log_mode not in ("queue", "task"):
+        raise ValueError("log_mode must be 'queue' or 'task'")
+    if psd_method not in PSD_METHODS:
+        raise ValueError(f"psd_method must be one of {PSD_METHODS}")
+    if lookahead_tasks is None:
+        lookahead_tasks = 2 * max_processors
+    plan = plan_resample(sfreq, nperseg, noverlap, target_sfreq, fmax=TOTAL_RANGE[1])
+    epoch_spec = events_map = None
+    if epoch_sec:
+        if psd_method != "welch":
+            raise ValueError("epoched mode uses Welch PSDs; psd_method must be 'welch'")
+        events_map = load_events(events) if events is not None else None
+        epoch_spec = EpochSpec(float(epoch_sec), epoch_step_sec, float(epoch_tmin), None, reject_ptp, reject_var)
+    elif events is not None or reject_ptp is not None or reject_var is not None:
+        raise ValueError("events / reject_ptp / reject_var require epoch_sec")
     app = BaseApp(**log_kwargs)
+    wq = WorkQueue(work_queue, lease_timeout) if work_queue else None
+    tag = shard_tag(shard, wq)
+    if tag and aggregate:
+        app.logger.warning("Sharded run: aggregate.npz is written by 'eegspec merge --aggregate' once all shards are done")
+        aggregate = False
+    prof = make_profiler(profile, proc="parent")
+    trace: List[Dict[str, Any]] = []
+    t_run = time.perf_counter()
     os.makedirs(out_dir, exist_ok=True)
+    bg = BackgroundWriter(write_queue, on_error=lambda label, e: app.logger.error(f"Write failed: {label}: {e}")) \
+        if write_queue and output_format == "npz" else None
+    worker_write_queue = write_queue if output_format == "json" and wq is None else 0
+    writer = NpzResultWriter(out_dir, background=bg) if output_format == "npz" else None
+    cohort = CohortTable() if aggregate else None
 
     try:
-        subjects = list_subject_jsons(input_path)
-        if not subjects:
-            raise FileNotFoundError("No JSON files found under input path")
-        app.logger.info(f"Found {len(subjects)} subject file(s)")
+        subjects = iter_subject_files(input_path)
+        first = next(subjects, None)
+        if first is None:
+            raise FileNotFoundError("No subject files found under input path")
+        subjects = itertools.chain([first], subjects)
+        if shard is not None:
+            subjects = shard_filter(subjects, *shard)
+        if wq is not None:
+            subjects = wq.claim_iter(subjects)
     except Exception as e:
         app.logger.error(f"Failed to enumerate input: {e}")
         raise
 
-    schedule = []
     alpha_band = tuple(map(float, alpha.split(",")))
-    for spath in subjects:
+    summary = {"subjects": {}, "alpha": list(alpha_band), "sfreq": sfreq, "nperseg": nperseg, "window": window,
+               "output_format": output_format, "window_sec": window_sec, "step_sec": step_sec,
+               "connectivity": list(connectivity) if connectivity else None, "conn_epoch_sec": conn_epoch_sec if connectivity else None,
+               "individual_bands": bool(individualize), "psd_method": psd_method,
+               "mt_bandwidth": mt_bandwidth if psd_method == "multitaper" else None,
+               "mt_adaptive": bool(mt_adaptive) if psd_method == "multitaper" else None,
+               "resample": plan.as_dict() if plan else None, "epochs": dict(epoch_spec.as_dict(), events=events if isinstance(events, str) else bool(events)) if epoch_spec else None}
+    if plan is not None:
+        app.logger.info(f"Resampling {plan.sfreq_in:g} Hz -> {plan.sfreq:g} Hz (x{plan.up}/{plan.down}); nperseg {nperseg} -> {plan.nperseg}")
+    if target_sfreq is not None and plan is None:
+        app.logger.info(f"--target-sfreq {target_sfreq}: {sfreq:g} Hz is kept")
+    if tag:
+        summary["shard"] = {"tag": tag, "shard": list(shard) if shard else None, "work_queue": work_queue,
+                            "owner": wq.owner if wq else None}
+    remaining: Dict[str, int] = {}  # tasks still running per subject; a subject is complete at 0
+    pending: Dict[str, Dict[str, Any]] = {}  # summary entries of finished tasks whose outputs are not written yet
+    unverified: List[str] = []  # subjects whose JSON outputs are still queued in the workers
+    task_failures: Dict[str, int] = {}
+    stats = {"subjects_loaded": 0, "subjects_failed": 0, "tasks_ok": 0, "tasks_failed": 0, "writes_failed": 0}
+    cache_stats = {"psd_hits": 0, "psd_misses": 0, "tfr_hits": 0, "tfr_misses": 0, "features_hits": 0, "features_misses": 0}
+
+    def read_subject(spath: str):
+        with prof.stage("load_subject", subject_file=os.path.basename(spath)):
+            return describe_subject(spath)  # task -> TaskSource; no samples for binary formats
+
+    def load_subject(spath: str, read) -> List[ScheduledTask]:
         sid = subject_id_from_path(spath)
         try:
-            tasks = load_subject_tasks_json(spath)  # task -> (n_times, n_channels)
-            sample_task = next(iter(tasks.values()))
-            n_ch = sample_task.shape[1]
+            sources, shms = read()
+        except Exception as e:
+            app.logger.error(f"Failed to parse subject {sid}: {e}")
+            stats["subjects_failed"] += 1
+            if wq is not None:
+                wq.release(sid)  # no done marker: the next run retries it
+            return []
+        try:
+            n_ch = next(iter(sources.values())).shape[0]
             ch_names = resolve_channels(channels_file, n_channels=n_ch)
             if len(ch_names) != n_ch:
                 app.logger.warning(f"Channel count mismatch for {sid}: using placeholders Ch1..Ch{n_ch}")
-            for tname, data in tasks.items():
-                schedule.append((sid, tname, data, ch_names))
         except Exception as e:
+            for shm in shms.values():
+                release_shared(shm)
             app.logger.error(f"Failed to parse subject {sid}: {e}")
+            stats["subjects_failed"] += 1
+            if wq is not None:
+                wq.release(sid)  # no done marker: the next run retries it
+            return []
+        if writer is not None:
+            writer.expect(sid, list(sources), ch_names)
+        if cohort is not None:
+            cohort.expect(list(sources))
+        stats["subjects_loaded"] += 1
+        remaining[sid] = len(sources)
+        if not sources and wq is not None:
+            wq.complete(sid, ok=True, tasks=0)
+        app.logger.info(f"Subject loaded: {sid} ({len(sources)} task(s))")
+        return [ScheduledTask(sid, t, src, ch_names, release=(lambda shm=shms[t]: release_shared(shm)) if t in shms else None)
+                for t, src in sources.items()]
 
-    summary = {"subjects": {}, "alpha": list(alpha_band), "sfreq": sfreq, "nperseg": nperseg, "window": window}
-    total = len(schedule)
-    app.logger.info(f"Total tasks to run: {total} (max_processors={max_processors})")
-    if total == 0:
-        save_json(summary, os.path.join(out_dir, "summary.json"))
-        return summary
-
-    import concurrent.futures
-    idx = 0
-    futures = []
-    with concurrent.futures.ProcessPoolExecutor(max_workers=max_processors) as ex:
-        while idx < total and len(futures) < max_processors:
-            sid, tname, data, ch = schedule[idx]; idx += 1
-            task_log_kwargs = dict(log_kwargs); task_log_kwargs["log_suffix"] = f"_{sid}_{tname}"
-            fut = ex.submit(run_task_compute, sid, tname, data, sfreq, nperseg, noverlap, window, ch, alpha_band, faa_db, out_dir, task_log_kwargs)
-            futures.append(fut)
-        done_count = 0
-        while futures:
-            for fut in concurrent.futures.as_completed(futures, timeout=None):
-                try:
-                    res = fut.result()
-                except Exception as e:
-                    app.logger.error(f"Worker crashed: {e}")
-                    res = {"ok": False, "error": str(e)}
-                if res.get("ok"):
-                    sid = res["subject"]; tname = res["task"]
-                    summary.setdefault("subjects", {}).setdefault(sid, {})[tname] = {k: res[k] for k in ("psd","metrics") if k in res}
-                else:
-                    app.logger.error(f"Task failed: {res}")
-                done_count += 1
-                futures.remove(fut)
-                if idx < total:
-                    sid, tname, data, ch = schedule[idx]; idx += 1
-                    task_log_kwargs = dict(log_kwargs); task_log_kwargs["log_suffix"] = f"_{sid}_{tname}"
-                    futures.append(ex.submit(run_task_compute, sid, tname, data, sfreq, nperseg, noverlap, window, ch, alpha_band, faa_db, out_dir, task_log_kwargs))
-                app.logger.info(f"Progress: {done_count}/{total}")
-                break
-
-    summ_path = os.path.join(out_dir, "summary.json")
+    def submit(ex, t: ScheduledTask):
+        task_log_kwargs = dict(log_kwargs); task_log_kwargs["log_suffix"] = f"_{t.subject}_{t.task}"
+        rate, seg, ovl = (plan.sfreq, plan.nperseg, plan.noverlap) if plan else (sfreq, nperseg, noverlap)
+        return ex.submit(run_task_compute, t.subject, t.task, t.source, rate, seg, ovl, window, t.ch_names,
+                         alpha_band, faa_db, out_dir, task_log_kwargs, output_format, cache_dir,
+                         window_sec, step_sec, connectivity, conn_epoch_sec, individualize,
+                         psd_method, mt_bandwidth, mt_adaptive, profile, time.time() if profile else None,
+                         plan, worker_write_queue, epoch_spec.for_subject(events_map, t.subject) if epoch_spec else None)
+
+    def on_done(t: ScheduledTask, res: Dict[str, Any]):
+        if profile and "finished_at" in res:
+            now = time.time()
+            prof.add("result_return", res["finished_at"], max(0.0, now - res["finished_at"]), subject=t.subject, task=t.task)
+            trace.extend(res.pop("profile", []))
+        for stage, state in res.get("cache", {}).items():
+            cache_stats[f"{stage}_{'hits' if state == 'hit' else 'misses'}"] += 1
+        if res.get("ok"):
+            pending.setdefault(t.subject, {})[t.task] = {k: res[k] for k in OUTPUT_KEYS + ("epochs_kept",) if k in res}
+            if cohort is not None:
+                src = res.get("payload", res)
+                cohort.add(t.subject, t.task, src["feature_names"], src["features"], src["faa"], t.ch_names)
+        else:
+            stats["tasks_failed"] += 1
+            task_failures[t.subject] = task_failures.get(t.subject, 0) + 1
+            app.logger.error(f"Task failed: {res}")
+        if writer is not None:
+            with prof.stage("write_subject", subject=t.subject):
+                writer.add(t.subject, res.get("payload"))
+        remaining[t.subject] -= 1
+        if remaining[t.subject] == 0:
+            del remaining[t.subject]
+            if writer is None:
+                (unverified.append if worker_write_queue else finish_subject)(t.subject)
+        if writer is not None:
+            collect_written()
+
+    def finish_subject(sid: str, store_path: str = None, error: BaseException = None):
+        """Count the subject's finished tasks once its outputs exist (``error``: they do not). Only a subject whose
+        tasks all succeeded and were written is marked done; otherwise its lease is released for a later run."""
+        entries = pending.pop(sid, {})
+        failed_tasks = task_failures.pop(sid, 0)
+        if error is not None:
+            stats["writes_failed"] += 1
+            stats["tasks_failed"] += len(entries)
+            stats["subjects_failed"] += 1
+            app.logger.error(f"Subject {sid} not written: {error}")
+        else:
+            stats["tasks_ok"] += len(entries)
+            if entries:
+                summary["subjects"].setdefault(sid, {}).update(entries)
+            if store_path:
+                _index_store(summary, sid, store_path)
+                app.logger.info(f"Subject written: {store_path}")
+        if wq is not None:
+            if error is None and not failed_tasks and sid not in remaining:
+                wq.complete(sid, ok=True, tasks=len(entries))
+            else:
+                wq.release(sid)
+
+    def collect_written():
+        for sid, spath, err in writer.pop_finished():
+            finish_subject(sid, spath, err)
+
+    def on_progress(done: int, discovered: int, exhausted: bool):
+        more = "" if exhausted else " (more subjects pending)"
+        app.logger.info(f"Progress: {done}/{discovered}{more}")
+
+    lookahead = LookaheadWindow(max_tasks=lookahead_tasks, max_bytes=lookahead_bytes)
+    app.logger.info(f"Scheduling with max_processors={max_processors}, lookahead_tasks={lookahead_tasks}, lookahead_bytes={lookahead_bytes}, "
+                    f"prefetch={prefetch}, write_queue={write_queue}")
+    import concurrent.futures, contextlib, multiprocessing
+    if multiprocessing.get_start_method() == "fork":
+        import scipy.fft  # noqa: F401  imported once here and inherited, instead of once per forked worker
+    listener = LogListener(log_kwargs, per_task=task_logs) if log_mode == "queue" else None
+    pool_kw = dict(initializer=init_worker_logging, initargs=listener.worker_args()) if listener else {}
+    with prof.stage("pipeline"), (listener or contextlib.nullcontext()), (wq or contextlib.nullcontext()), \
+            (bg or contextlib.nullcontext()), concurrent.futures.ProcessPoolExecutor(max_workers=max_processors, **pool_kw) as ex:
+        if prefetch and multiprocessing.get_start_method() == "fork":
+            # Fork every worker before prefetch threads exist: a child forked while one of them holds a lock
+            # (e.g. the resource tracker's, taken when a JSON subject is copied to shared memory) can hang on it.
+            ex.submit(int).result()
+        total = run_pipeline(ex, subjects, load_subject, submit, on_done, max_processors, lookahead, on_progress,
+                             read_subject=read_subject, prefetch=prefetch, read_bytes=shared_bytes_estimate,
+                             discard_read=release_subject)
+        if writer is not None:  # before the work queue drops its leases
+            with prof.stage("write_subject"):
+                writer.close()
+                if bg is not None:
+                    bg.close()
+            collect_written()
+    if listener is not None:
+        summary["logging"] = {"mode": log_mode, "records": listener.records, "batches": listener.batches, "task_logs": listener.per_task}
+    for sid in unverified:  # the pool has exited, so every worker's write queue is drained
+        for task, entry in list(pending.get(sid, {}).items()):
+            missing = [entry[k] for k in OUTPUT_KEYS if k in entry and not os.path.exists(entry[k])]
+            if missing:
+                del pending[sid][task]
+                stats["writes_failed"] += 1
+                stats["tasks_failed"] += 1
+                app.logger.error(f"Outputs of {sid}/{task} were not written: {', '.join(missing)}")
+        finish_subject(sid)
+
+    summary["io"] = {"prefetch": prefetch, "write_queue": write_queue, "worker_write_queue": worker_write_queue,
+                     "writer": bg.stats() if bg is not None else None}
+
+    if cache_dir:
+        n_evicted = freed = 0
+        shared_cache = shard is not None or bool(work_queue)
+        if not shared_cache:  # eviction is unlocked: never run it while other shards may use the cache
+            with prof.stage("cache_evict"):
+                n_evicted, freed = ResultCache(cache_dir).evict(cache_max_bytes)
+        summary["cache"] = dict(cache_stats, dir=cache_dir, evicted_files=n_evicted, evicted_bytes=freed,
+                                evict_skipped=shared_cache)
+        app.logger.info(f"Cache: PSD {cache_stats['psd_hits']} hit(s) / {cache_stats['psd_misses']} miss(es), "
+                        f"features {cache_stats['features_hits']} hit(s) / {cache_stats['features_misses']} miss(es); "
+                        + ("eviction skipped (shared cache)" if shared_cache else f"evicted {n_evicted} file(s)"))
+    if cohort is not None:
+        agg_path = os.path.join(out_dir, AGGREGATE_FILE)
+        try:
+            with prof.stage("aggregate"):
+                write_aggregate(agg_path, dict(aggregate_arrays(cohort.dense(), baseline, trp_mode), skipped=cohort.skipped))
+            summary["aggregate"] = {"path": agg_path, "baseline": baseline, "trp_mode": trp_mode, "skipped": cohort.skipped}
+            app.logger.info(f"Aggregate written: {agg_path} ({len(cohort.subjects())} subject(s))")
+        except Exception as e:
+            app.logger.error(f"Aggregate failed: {e}")
+    summary["run"] = dict(stats, tasks_total=total, peak_lookahead_tasks=lookahead.peak_tasks, peak_lookahead_bytes=lookahead.peak_bytes)
+    app.logger.info(f"Total tasks run: {total} (ok={stats['tasks_ok']}, failed={stats['tasks_failed']}, "
+                    f"failed writes={stats['writes_failed']})")
+    if profile:
+        trace.extend(prof.records)
+        trace_path = os.path.join(out_dir, TRACE_FILE if not tag else TRACE_FILE.replace(".json", f"_{tag}.json"))
+        write_chrome_trace(trace_path, trace)
+        summary["profile"] = dict(rollup(trace), wall_s=time.perf_counter() - t_run, trace=trace_path)
+        top = ", ".join(f"{k} {v['total_s']:.2f}s" for k, v in list(summary["profile"]["stages"].items())[:6])
+        app.logger.info(f"Profile: {top}; trace written: {trace_path}")
+    summ_path = os.path.join(out_dir, SUMMARY_FILE if not tag else f"summary_{tag}.json")
+    if tag:
+        summary["shard"]["summary"] = summ_path
+        if wq is not None:
+            summary["shard"]["reclaimed"] = list(wq.reclaimed)
     save_json(summary, summ_path)
     app.logger.info(f"Summary written: {summ_path}")
     return summary
@@ -0,0 +1,127 @@
+"""In-memory analysis of arrays the caller already holds (no files, no logger, no process pool).
+
+``Analyzer`` is configured once: the Welch window and density scaling, the frequency grid, the FeatureEngine
+band tables and the IAF estimator are built in the constructor, so a call only segments, transforms and
+reduces. ``analyze_batch`` stacks same-shaped recordings into one Welch pass and one feature pass. PSD and
+features are the ones an ``analyze`` run with the same settings stores (compute_psd_welch /
+compute_task_metrics, flattened by store.metrics_feature_table).
+"""
+import numpy as np
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from .psd import (DEFAULT_BLOCK_BYTES, PSD_METHODS, density_scale, segment_view, welch_window, compute_psd_multitaper,
+                  periodogram_blocks)
+from .features import FeatureEngine, TOTAL_RANGE, std_bands
+from .iaf import IAFEstimator, individual_bands
+from .store import metrics_feature_table
+
+@dataclass
+class AnalysisResult:
+    """PSD and features of one recording."""
+    freqs: np.ndarray                       # (n_freqs,)
+    psd: np.ndarray                         # (n_channels, n_freqs)
+    feature_names: List[str]
+    features: np.ndarray                    # (n_channels, n_features) float32
+    faa: float                              # nan without F3/F4 in ch_names
+    bands: Dict[str, Tuple[float, float]]   # bands used (IAF-based theta/alpha with individualize)
+
+    def feature(self, name: str) -> np.ndarray:
+        """(n_channels,) values of one feature, e.g. "abs_alpha", "SEF95", "iaf_peak"."""
+        return self.features[:, self.feature_names.index(name)]
+
+class Analyzer:
+    """Reusable PSD + feature extractor for (n_times, n_channels) arrays at a fixed ``sfreq``.
+    With ``ch_names`` the channel count is checked and FAA (F3/F4) is computed; without, FAA is nan."""
+    def __init__(self, sfreq: float, ch_names: Optional[Sequence[str]] = None, nperseg: int = 1024,
+                 noverlap: Optional[int] = None, window: str = "hann", alpha_band=(8.0, 13.0), use_db_faa: bool = False,
+                 individualize: bool = False, psd_method: str = "welch", mt_bandwidth: float = None,
+                 mt_adaptive: bool = False, dtype=np.float64, max_block_bytes: int = DEFAULT_BLOCK_BYTES):
+        if psd_method not in PSD_METHODS:
+            raise ValueError(f"psd_method must be one of {PSD_METHODS}")
+        self.sfreq = float(sfreq)
+        self.ch_names = None if ch_names is None else list(ch_names)
+        self.nperseg = int(nperseg)
+        self.noverlap = self.nperseg // 2 if noverlap is None else int(noverlap)
+        if self.noverlap >= self.nperseg:
+            raise ValueError("noverlap must be less than nperseg")
+        self.alpha_band = tuple(map(float, alpha_band))
+        self.use_db_faa = use_db_faa
+        self.individualize = individualize
+        self.mt = dict(bandwidth=mt_bandwidth, adaptive=bool(mt_adaptive)) if psd_method == "multitaper" else None
+        self.dtype = np.dtype(dtype)
+        self.max_block_bytes = max_block_bytes
+        self.freqs = np.fft.rfftfreq(self.nperseg, 1.0 / self.sfreq)
+        self._win, win_pow = welch_window(window, self.nperseg, self.dtype.str)
+        self._scale = density_scale(self.freqs.size, self.nperseg, self.sfreq, win_pow, self.dtype)
+        self.bands = std_bands(self.alpha_band)
+        self.engine = FeatureEngine(self.freqs, self.bands, total_range=TOTAL_RANGE)
+        self.iaf = IAFEstimator(self.freqs)
+        self.feature_names = metrics_feature_table(self._metrics(np.ones((1, self.freqs.size)), self.engine))[0]
+
+    def analyze(self, data: np.ndarray) -> AnalysisResult:
+        """PSD and features of one (n_times, n_channels) recording."""
+        return self.analyze_batch([data])[0]
+
+    def analyze_batch(self, arrays: Union[np.ndarray, Sequence[np.ndarray]]) -> List[AnalysisResult]:
+        """Results for a sequence of (n_times, n_channels) arrays or a (batch, n_times, n_channels) array.
+        Recordings of the same shape go through one stacked Welch and feature computation."""
+        arrays = [self._check(a) for a in arrays]
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for i, a in enumerate(arrays):
+            groups.setdefault(a.shape, []).append(i)
+        out: List[Optional[AnalysisResult]] = [None] * len(arrays)
+        for idx in groups.values():
+            x = arrays[idx[0]][None] if len(idx) == 1 else np.stack([arrays[i] for i in idx])
+            for i, res in zip(idx, self._compute(x)):
+                out[i] = res
+        return out
+
+    def _check(self, a: np.ndarray) -> np.ndarray:
+        a = np.asarray(a)
+        if a.ndim != 2:
+            raise ValueError("data must be (n_times, n_channels)")
+        if self.ch_names is not None and a.shape[1] != len(self.ch_names):
+            raise ValueError(f"data has {a.shape[1]} channels, expected {len(self.ch_names)}")
+        if a.shape[0] < self.nperseg:
+            raise ValueError(f"data length {a.shape[0]} is shorter than nperseg={self.nperseg}")
+        return a
+
+    def _psd(self, x: np.ndarray) -> np.ndarray:
+        """(batch, n_channels, n_freqs) PSD of a (batch, n_times, n_channels) stack."""
+        n_b, n_t, n_ch = x.shape
+        if self.mt is not None:
+            return np.stack([compute_psd_multitaper(xi, self.sfreq, nperseg=self.nperseg, dtype=self.dtype,
+                                                    max_block_bytes=self.max_block_bytes, **self.mt)[1] for xi in x])
+        xt = x[0].T if n_b == 1 else x.transpose(0, 2, 1).reshape(n_b * n_ch, n_t)
+        segs = segment_view(xt, self.nperseg, self.nperseg - self.noverlap)
+        acc = np.zeros((n_b * n_ch, self.freqs.size), dtype=self.dtype)
+        for _, pxx in periodogram_blocks(segs, self._win, self.max_block_bytes):
+            acc += pxx.sum(axis=1)
+        acc *= self._scale / segs.shape[1]
+        return acc.reshape(n_b, n_ch, self.freqs.size)
+
+    def _metrics(self, psd: np.ndarray, engine: FeatureEngine) -> Dict[str, object]:
+        feats = engine.compute(psd)
+        feats["IAF"] = self.iaf.compute(psd)
+        return feats
+
+    def _compute(self, x: np.ndarray) -> List[AnalysisResult]:
+        psd = self._psd(x)
+        if self.individualize:
+            parts = []
+            for p in psd:
+                peaks = self.iaf.compute(p)["peak"]
+                peaks = peaks[np.isfinite(peaks)]
+                bands = dict(self.bands, **(individual_bands(float(np.median(peaks)) if peaks.size else None) or {}))
+                parts.append((p[None], bands, FeatureEngine.for_grid(self.freqs, bands, total_range=TOTAL_RANGE)))
+        else:
+            parts = [(psd, self.bands, self.engine)]
+        out = []
+        for p, bands, eng in parts:
+            feats = self._metrics(p, eng)
+            _, table = metrics_feature_table(feats)
+            faa = np.broadcast_to(eng.faa(feats["bands_abs"], self.ch_names or [], left="F3", right="F4", band="alpha",
+                                          use_db=self.use_db_faa), p.shape[:1])
+            out.extend(AnalysisResult(self.freqs, p[i], self.feature_names, table[i], float(faa[i]), bands)
+                       for i in range(p.shape[0]))
+        return out
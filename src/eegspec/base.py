@@ -2,6 +2,13 @@ from dataclasses import dataclass, field
 from .vendor.dualhandler import DualHandler
 import logging
 
+def _close_dual(h: logging.Handler):
+    if isinstance(h, DualHandler):
+        if h.file_handler is not None:
+            h.file_handler.close()
+        h.console_handler.stream.close()  # opened with closefd=False: the fd itself stays open
+    h.close()
+
 @dataclass
 class BaseApp:
     """Base app wrapper installing DualHandler for consistent logging."""
@@ -13,6 +20,8 @@ class BaseApp:
     logger: logging.Logger = field(init=False)
 
     def __post_init__(self):
+        for h in logging.getLogger(DualHandler.__module__).handlers:
+            _close_dual(h)  # a new BaseApp replaces the previous handler; don't leak its file/stream
         self._dh = DualHandler(log_dir=self.log_dir, prefix=self.log_prefix, suffix=self.log_suffix, percentage=self.log_percentage)
         self.logger = self._dh.logger
         self.logger.setLevel(getattr(logging, self.log_level.upper(), logging.INFO))
@@ -0,0 +1,136 @@
+"""Content-addressed on-disk cache for incremental re-analysis.
+
+Entries are keyed by a hash of the task samples plus every parameter of the stage that produced them:
+
+- ``psd/<key>.npz``: (freqs, psd) keyed by data + (sfreq, nperseg, noverlap, window); sliding-window
+  stacks (times, freqs, psd_t) use the same store under a key that adds the window parameters
+- ``features/<key>.json``: the metrics dict keyed by the PSD key + band/FAA parameters
+
+so changing a band definition or ``--alpha`` reuses the cached PSDs. Writes are atomic
+(tmp file + rename), so concurrent workers may share one cache directory. Hits refresh the
+entry's mtime; ``evict`` removes least recently used entries beyond a size budget.
+"""
+import os, json, hashlib, tempfile
+import numpy as np
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_BYTES = 2 * 2**30
+_HASH_BLOCK = 16 * 2**20
+
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else json.dumps(p, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+def data_digest(data: np.ndarray) -> str:
+    """Hash of samples, shape and dtype; reads (n_times, n_channels) data in row blocks (memmap friendly)."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps([list(data.shape), data.dtype.str]).encode("utf-8"))
+    step = max(1, _HASH_BLOCK // max(1, data.shape[1] * data.itemsize))
+    for i in range(0, data.shape[0], step):
+        h.update(np.ascontiguousarray(data[i:i + step]).tobytes())
+    return h.hexdigest()
+
+class ResultCache:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def psd_key(self, data_digest_: str, sfreq: float, nperseg: int, noverlap: int, window, **extra) -> str:
+        return _digest(CACHE_VERSION, "psd", data_digest_,
+                       dict(sfreq=float(sfreq), nperseg=int(nperseg), noverlap=int(noverlap), window=window, **extra))
+
+    def features_key(self, psd_key: str, **params) -> str:
+        return _digest(CACHE_VERSION, "features", psd_key, params)
+
+    def _path(self, kind: str, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, kind, key[:2], key + ext)
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _atomic_write(self, path: str, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def get_psd(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        path = self._path("psd", key, ".npz")
+        try:
+            with np.load(path) as z:
+                out = z["freqs"], z["psd"]
+        except (OSError, KeyError, ValueError):
+            return None
+        self._touch(path)
+        return out
+
+    def put_psd(self, key: str, freqs: np.ndarray, psd: np.ndarray):
+        self._atomic_write(self._path("psd", key, ".npz"), lambda f: np.savez(f, freqs=freqs, psd=psd))
+
+    def get_psd_windows(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        path = self._path("psd", key, ".npz")
+        try:
+            with np.load(path) as z:
+                out = z["times"], z["freqs"], z["psd_t"]
+        except (OSError, KeyError, ValueError):
+            return None
+        self._touch(path)
+        return out
+
+    def put_psd_windows(self, key: str, times: np.ndarray, freqs: np.ndarray, psd_t: np.ndarray):
+        self._atomic_write(self._path("psd", key, ".npz"), lambda f: np.savez(f, times=times, freqs=freqs, psd_t=psd_t))
+
+    def get_features(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path("features", key, ".json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                out = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return out
+
+    def put_features(self, key: str, metrics: Dict[str, Any]):
+        self._atomic_write(self._path("features", key, ".json"), lambda f: f.write(json.dumps(metrics).encode("utf-8")))
+
+    def size(self) -> int:
+        return sum(sz for _, sz, _ in self._entries())
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                p = os.path.join(root, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                yield st.st_mtime, st.st_size, p
+
+    def evict(self, max_bytes: int) -> Tuple[int, int]:
+        """Delete least recently used entries until the cache is at most ``max_bytes``. Returns (files, bytes) removed."""
+        entries = sorted(self._entries())
+        total = sum(sz for _, sz, _ in entries)
+        n = freed = 0
+        for _, sz, p in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(p)
+            except OSError:
+                continue
+            total -= sz; freed += sz; n += 1
+        return n, freed
@@ -1,6 +1,21 @@
 import argparse, sys, os, traceback
 from .base import BaseApp
-from .analyze import analyze_entry
+# Command modules (NumPy/SciPy) are imported inside the cmd_* functions so that --help/--version and argument
+# errors return without loading them; see benchmarks/bench_import.py.
+
+class _VersionAction(argparse.Action):
+    """--version resolved only when requested (importlib.metadata is not free either)."""
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help="Show the version and exit"):
+        super().__init__(option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            v = version("eegspec")
+        except PackageNotFoundError:
+            v = "unknown"
+        parser._print_message(f"eegspec {v}\n", sys.stdout)  # stdout, like argparse's own "version" action
+        parser.exit()
 
 def main(argv=None):
     try:
@@ -13,6 +28,7 @@ def main(argv=None):
 
 def _main_impl(argv=None):
     p = argparse.ArgumentParser(prog="eegspec", description="EEG spectral analysis toolkit")
+    p.add_argument("--version", action=_VersionAction)
     sub = p.add_subparsers(dest="cmd", required=True)
 
     def add_logging_args(sp):
@@ -29,21 +45,125 @@ def _main_impl(argv=None):
     sp.add_argument("--nperseg", type=int, default=1024)
     sp.add_argument("--noverlap", type=int, default=None)
     sp.add_argument("--window", type=str, default="hann")
+    sp.add_argument("--psd-method", choices=["welch", "multitaper"], default="welch",
+                    help="multitaper: DPSS estimate over the whole task, averaged onto the --nperseg grid")
+    sp.add_argument("--mt-bandwidth", type=float, default=None, help="Multitaper full bandwidth in Hz (default 8 * sfreq / n_times)")
+    sp.add_argument("--mt-adaptive", action="store_true", help="Adaptive (Thomson) taper weighting")
+    sp.add_argument("--target-sfreq", type=str, default=None,
+                    help="Downsample (anti-aliased) to this rate in Hz before the PSD, or 'auto' (4x the highest band edge); --nperseg/--noverlap are scaled along")
     sp.add_argument("--channels-file", type=str, default=None, help="Plain text, .csv or .locs")
     sp.add_argument("--alpha", type=str, default="8,13")
     sp.add_argument("--faa-db", action="store_true")
     sp.add_argument("--max-processors", type=int, default=4)
+    sp.add_argument("--lookahead-tasks", type=int, default=None, help="Max tasks loaded ahead (queued + running); default 2x --max-processors")
+    sp.add_argument("--lookahead-mb", type=float, default=None, help="Max MB of task samples loaded ahead (queued + running)")
+    sp.add_argument("--prefetch", type=int, default=2, help="Subject files read and decoded ahead on threads (0: read inline)")
+    sp.add_argument("--write-queue", type=int, default=8, help="Outputs queued for background writing (0: write synchronously)")
+    sp.add_argument("--cache-dir", type=str, default=None,
+                    help="Enable the result cache in this folder (off by default; it keeps a second copy of every PSD)")
+    sp.add_argument("--no-cache", action="store_true", help="Disable the result cache even if --cache-dir is given")
+    sp.add_argument("--cache-max-mb", type=float, default=2048, help="Evict least recently used cache entries beyond this size (not with --shard/--work-queue)")
+    sp.add_argument("--window-sec", type=float, default=None, help="Also compute time-resolved features in sliding windows of this length")
+    sp.add_argument("--step-sec", type=float, default=None, help="Step between windows (default: --window-sec); rounded to whole Welch segment hops")
+    sp.add_argument("--connectivity", type=str, default=None, help="Connectivity methods per task: 'all' or a subset of coh,imcoh,plv,pli,wpli")
+    sp.add_argument("--conn-epoch-sec", type=float, default=2.0, help="Epoch length for multitaper connectivity (50%% overlap)")
+    sp.add_argument("--epoch-sec", type=float, default=None, help="Epoched mode: per-epoch features and a task PSD averaged over the kept epochs")
+    sp.add_argument("--epoch-step-sec", type=float, default=None, help="Step between fixed-length epochs (default: --epoch-sec)")
+    sp.add_argument("--events", type=str, default=None, help="Events JSON ({task: [onset_s, ...]} or {subject: {task: [...]}}): event-locked epochs")
+    sp.add_argument("--epoch-tmin", type=float, default=0.0, help="Epoch start relative to each event onset (s)")
+    sp.add_argument("--reject-ptp", type=float, default=None, help="Reject epochs with any channel's peak-to-peak amplitude above this (data units)")
+    sp.add_argument("--reject-var", type=float, default=None, help="Reject epochs with any channel's variance above this multiple of its median epoch variance")
+    sp.add_argument("--individual-bands", action="store_true", help="Centre theta/alpha on each task's IAF (theta IAF-6..-4, alpha IAF-4..+2 Hz)")
+    sp.add_argument("--profile", action="store_true", help="Per-stage timings/RSS in summary.json plus a Chrome trace (profile_trace.json)")
+    sp.add_argument("--log-mode", choices=["queue", "task"], default="queue",
+                    help="queue: workers log through one batched listener in the parent; task: a log handler per task (previous behaviour)")
+    sp.add_argument("--task-logs", action="store_true", help="With --log-mode queue and --log-dir, also write one log file per task")
+    sp.add_argument("--aggregate", action="store_true", help="Also write aggregate.npz (cohort arrays, group stats, TRP)")
+    sp.add_argument("--baseline", type=str, default=None, help="Baseline task for TRP (with --aggregate)")
+    sp.add_argument("--trp-mode", choices=["ratio", "db"], default="ratio")
+    sp.add_argument("--output-format", choices=["npz", "json"], default="npz",
+                    help="npz: one compact subjects/<sid>.npz per subject (default); json: legacy psd_/metrics_ JSON per task")
+    sp.add_argument("--shard", type=str, default=None, help="Static partition 'i/N' (0-based): every N-th subject file starting at i")
+    sp.add_argument("--work-queue", type=str, default=None,
+                    help="Shared directory through which several analyze processes (any host) claim subjects with lease files")
+    sp.add_argument("--lease-timeout", type=float, default=600.0, help="Seconds without heartbeat after which a lease is taken over")
     add_logging_args(sp)
     sp.set_defaults(func=cmd_analyze)
 
+    sp = sub.add_parser("convert", help="Convert subject JSONs to memory-mappable binary files (streaming, one task at a time).")
+    sp.add_argument("--input", required=True, help="Folder with many subject.json OR a single subject.json")
+    sp.add_argument("--out-dir", required=True)
+    sp.add_argument("--format", choices=["raw", "npz"], default="raw", help="raw: .hdr sidecar + .bin data; npz: uncompressed .npz")
+    sp.add_argument("--dtype", choices=["float64", "float32"], default="float64")
+    add_logging_args(sp)
+    sp.set_defaults(func=cmd_convert)
+
+    sp = sub.add_parser("stream", help="Online analysis of a live float32 sample stream (stdin or local TCP); one JSON line per update.")
+    sp.add_argument("--source", default="stdin", help="'stdin', 'tcp://127.0.0.1:PORT' or a file of float32 frames")
+    sp.add_argument("--sfreq", type=float, required=True)
+    sp.add_argument("--n-channels", type=int, required=True)
+    sp.add_argument("--channels-file", type=str, default=None, help="Plain text, .csv or .locs")
+    sp.add_argument("--nperseg", type=int, default=512)
+    sp.add_argument("--noverlap", type=int, default=None)
+    sp.add_argument("--window", type=str, default="hann")
+    sp.add_argument("--avg-segments", type=int, default=8, help="Welch average over the last N segments")
+    sp.add_argument("--chunk-samples", type=int, default=32)
+    sp.add_argument("--alpha", type=str, default="8,13")
+    sp.add_argument("--faa-db", action="store_true")
+    sp.add_argument("--out", type=str, default="-", help="JSON-lines output file ('-' for stdout)")
+    add_logging_args(sp)
+    sp.set_defaults(func=cmd_stream)
+
+    sp = sub.add_parser("stream-publish", help="Publish synthetic float32 EEG frames to stdout or one local TCP client.")
+    sp.add_argument("--port", type=int, default=None, help="Serve on 127.0.0.1:PORT instead of writing to stdout")
+    sp.add_argument("--sfreq", type=float, default=1000.0)
+    sp.add_argument("--n-channels", type=int, default=64)
+    sp.add_argument("--seconds", type=float, default=10.0)
+    sp.add_argument("--chunk-samples", type=int, default=32)
+    sp.add_argument("--no-realtime", action="store_true", help="Send as fast as possible instead of pacing at --sfreq")
+    sp.set_defaults(func=cmd_stream_publish)
+
+    sp = sub.add_parser("aggregate", help="Cohort arrays, group statistics and TRP from an analyze output folder.")
+    sp.add_argument("--out-dir", required=True, help="Output folder of a previous analyze run")
+    sp.add_argument("--baseline", type=str, default=None, help="Baseline task for TRP")
+    sp.add_argument("--trp-mode", choices=["ratio", "db"], default="ratio")
+    sp.add_argument("--percentiles", type=str, default="5,25,50,75,95")
+    sp.add_argument("--max-processors", type=int, default=4)
+    add_logging_args(sp)
+    sp.set_defaults(func=cmd_aggregate)
+
+    sp = sub.add_parser("merge", help="Combine the summary_<tag>.json files of sharded analyze runs into summary.json.")
+    sp.add_argument("--out-dir", required=True, help="Output folder shared by the shards")
+    sp.add_argument("--work-queue", type=str, default=None, help="Report how many subjects of this work queue are done / still leased")
+    sp.add_argument("--aggregate", action="store_true", help="Also write aggregate.npz for the merged cohort")
+    sp.add_argument("--baseline", type=str, default=None, help="Baseline task for TRP (with --aggregate)")
+    sp.add_argument("--trp-mode", choices=["ratio", "db"], default="ratio")
+    sp.add_argument("--max-processors", type=int, default=4)
+    add_logging_args(sp)
+    sp.set_defaults(func=cmd_merge)
+
+    sp = sub.add_parser("report", help="Render one PSD figure per subject x task of an analyze output folder, plus an index.html.")
+    sp.add_argument("--out-dir", required=True, help="Output folder of a previous analyze run")
+    sp.add_argument("--report-dir", type=str, default=None, help="Where to write the figures (default: <out-dir>/report)")
+    sp.add_argument("--format", choices=["png", "svg", "pdf"], default="png")
+    sp.add_argument("--dpi", type=int, default=100)
+    sp.add_argument("--fmax", type=float, default=None, help="Highest frequency drawn (default: all stored bins)")
+    sp.add_argument("--points", type=int, default=256, help="Log-frequency points per channel line")
+    sp.add_argument("--max-processors", type=int, default=4)
+    add_logging_args(sp)
+    sp.set_defaults(func=cmd_report)
+
     args = p.parse_args(argv)
     return args.func(args)
 
 def cmd_analyze(args):
+    from .analyze import analyze_entry
+    from .connectivity import parse_methods
     app = BaseApp(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage)
+    from .shard import parse_shard
     app.logger.info("Analyze entry")
     try:
-        analyze_entry(
+        summary = analyze_entry(
             input_path=args.input,
             sfreq=args.sfreq,
             out_dir=args.out_dir,
@@ -55,9 +175,119 @@ def cmd_analyze(args):
             faa_db=args.faa_db,
             max_processors=args.max_processors,
             log_kwargs=dict(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage),
+            output_format=args.output_format,
+            lookahead_tasks=args.lookahead_tasks,
+            lookahead_bytes=None if args.lookahead_mb is None else int(args.lookahead_mb * 2**20),
+            cache_dir=None if args.no_cache else args.cache_dir,
+            cache_max_bytes=int(args.cache_max_mb * 2**20),
+            window_sec=args.window_sec,
+            step_sec=args.step_sec,
+            connectivity=parse_methods(args.connectivity) if args.connectivity else None,
+            conn_epoch_sec=args.conn_epoch_sec,
+            aggregate=args.aggregate or args.baseline is not None,
+            baseline=args.baseline,
+            trp_mode=args.trp_mode,
+            individualize=args.individual_bands,
+            profile=args.profile,
+            log_mode=args.log_mode,
+            task_logs=args.task_logs,
+            psd_method=args.psd_method,
+            mt_bandwidth=args.mt_bandwidth,
+            mt_adaptive=args.mt_adaptive,
+            shard=parse_shard(args.shard) if args.shard else None,
+            work_queue=args.work_queue,
+            lease_timeout=args.lease_timeout,
+            target_sfreq=args.target_sfreq,
+            prefetch=args.prefetch,
+            write_queue=args.write_queue,
+            epoch_sec=args.epoch_sec,
+            epoch_step_sec=args.epoch_step_sec,
+            events=args.events,
+            epoch_tmin=args.epoch_tmin,
+            reject_ptp=args.reject_ptp,
+            reject_var=args.reject_var,
         )
-        app.logger.info(f"Wrote summary to {os.path.join(args.out_dir, 'summary.json')}")
+        app.logger.info(f"Wrote summary to {summary.get('shard', {}).get('summary') or os.path.join(args.out_dir, 'summary.json')}")
     except Exception as e:
         app.logger.error(f"Analyze failed: {e}")
         app.logger.debug(traceback.format_exc())
         raise
+    write_errors = max(summary["run"]["writes_failed"], (summary["io"]["writer"] or {}).get("errors", 0))
+    if write_errors:
+        raise RuntimeError(f"{write_errors} output write(s) failed")
+
+def cmd_convert(args):
+    from .formats import convert_subject
+    app = BaseApp(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage)
+    if os.path.isdir(args.input):
+        srcs = sorted(os.path.join(args.input, x) for x in os.listdir(args.input) if x.lower().endswith(".json"))
+    else:
+        srcs = [args.input]
+    app.logger.info(f"Converting {len(srcs)} subject file(s) to {args.format} ({args.dtype})")
+    failed = 0
+    for src in srcs:
+        try:
+            dst = convert_subject(src, args.out_dir, fmt=args.format, dtype=args.dtype)
+            app.logger.info(f"Converted {src} -> {dst}")
+        except Exception as e:
+            failed += 1
+            app.logger.error(f"Convert failed for {src}: {e}")
+            app.logger.debug(traceback.format_exc())
+    if failed:
+        raise RuntimeError(f"{failed} subject file(s) failed to convert")
+
+def cmd_stream(args):
+    from .stream import run_stream
+    from .utils import resolve_channels
+    app = BaseApp(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage)
+    ch_names = resolve_channels(args.channels_file, n_channels=args.n_channels)
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        stats = run_stream(args.source, ch_names, args.sfreq, out=out, chunk_samples=args.chunk_samples, nperseg=args.nperseg,
+                           noverlap=args.noverlap, window=args.window, avg_segments=args.avg_segments,
+                           alpha_band=tuple(map(float, args.alpha.split(","))), use_db_faa=args.faa_db)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    app.logger.info(f"Stream ended: {stats}")
+
+def cmd_stream_publish(args):
+    from .stream import publish_synthetic, serve_synthetic
+    kw = dict(chunk_samples=args.chunk_samples, realtime=not args.no_realtime)
+    if args.port is None:
+        publish_synthetic(sys.stdout.buffer, args.n_channels, args.sfreq, args.seconds, **kw)
+    else:
+        serve_synthetic(args.port, args.n_channels, args.sfreq, args.seconds, **kw)
+
+def cmd_aggregate(args):
+    from .aggregate import aggregate_outputs, AGGREGATE_FILE
+    app = BaseApp(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage)
+    agg = aggregate_outputs(args.out_dir, baseline=args.baseline, trp_mode=args.trp_mode,
+                            percentiles=[float(q) for q in args.percentiles.split(",")], max_workers=args.max_processors)
+    if agg["skipped"]:
+        app.logger.warning(f"Skipped subject(s) with a different montage/feature set: {agg['skipped']}")
+    app.logger.info(f"Aggregated {len(agg['subjects'])} subject(s) x {len(agg['tasks'])} task(s) -> {os.path.join(args.out_dir, AGGREGATE_FILE)}")
+
+def cmd_merge(args):
+    from .shard import merge_summaries, WorkQueue
+    app = BaseApp(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage)
+    merged = merge_summaries(args.out_dir)
+    run = merged["run"]
+    app.logger.info(f"Merged {len(merged['shards'])} shard summary(ies): {len(merged['subjects'])} subject(s), "
+                    f"tasks ok={run.get('tasks_ok', 0)} failed={run.get('tasks_failed', 0)}")
+    if merged["duplicates"]:
+        app.logger.warning(f"Subject(s) analyzed by more than one shard: {sorted(set(merged['duplicates']))}")
+    if args.work_queue:
+        st = WorkQueue(args.work_queue).status()
+        app.logger.info(f"Work queue {args.work_queue}: {st['done']} done, {st['leased']} still leased")
+    if args.aggregate or args.baseline is not None:
+        from .aggregate import aggregate_outputs, AGGREGATE_FILE
+        agg = aggregate_outputs(args.out_dir, baseline=args.baseline, trp_mode=args.trp_mode, max_workers=args.max_processors)
+        app.logger.info(f"Aggregated {len(agg['subjects'])} subject(s) -> {os.path.join(args.out_dir, AGGREGATE_FILE)}")
+
+def cmd_report(args):
+    from .report import render_report
+    app = BaseApp(log_level=args.log_level, log_dir=args.log_dir, log_prefix=args.log_prefix, log_suffix=args.log_suffix, log_percentage=args.log_percentage)
+    rep = render_report(args.out_dir, report_dir=args.report_dir, max_workers=args.max_processors, image_format=args.format,
+                        dpi=args.dpi, fmax=args.fmax, n_points=args.points)
+    app.logger.info(f"Rendered {rep['figures']} figure(s) for {rep['subjects']} subject(s) in {rep['wall_s']:.1f}s -> {rep['index']}")
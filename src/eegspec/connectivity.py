@@ -1,6 +1,128 @@
+"""Multitaper spectral connectivity (coh, imcoh, PLV, PLI, wPLI), computed natively.
+
+Epochs are strided views over the recording; each epoch is tapered and transformed once. Per frequency the
+cross-spectral density of a block of channel rows against all earlier channels is one batched matmul over
+(epoch, frequency), so every method and every band comes out of the same pass. Temporaries are bounded by
+``max_block_bytes``; the accumulators hold one (n_freqs, n_ch, n_ch) array per method for the frequencies
+inside the requested bands. Matches mne_connectivity.spectral_connectivity_epochs(mode="multitaper",
+mt_adaptive=False, faverage=True).
+"""
 import numpy as np
-from typing import List, Dict
-import mne
+from typing import List, Dict, Optional, Tuple
+from .psd import DEFAULT_BLOCK_BYTES
+from .tapers import dpss_tapers, half_bandwidth
+
+CON_METHODS = ("coh", "imcoh", "plv", "pli", "wpli")
+_DIAG = {"coh": 1.0, "imcoh": 0.0, "plv": 1.0, "pli": 0.0, "wpli": 0.0}
+
+def parse_methods(spec) -> List[str]:
+    """'all', 'coh,wpli' or a list -> validated method list."""
+    if isinstance(spec, str):
+        spec = list(CON_METHODS) if spec == "all" else [m.strip() for m in spec.split(",") if m.strip()]
+    bad = [m for m in spec if m not in CON_METHODS]
+    if bad:
+        raise ValueError(f"Unknown connectivity method(s) {bad}; choose from {CON_METHODS}")
+    return list(spec)
+
+def epoch_view(data: np.ndarray, sfreq: float, epoch_sec: float = 2.0, overlap: float = 0.5) -> np.ndarray:
+    """(n_epochs, n_channels, n_times) strided view over (n_times, n_channels) data; no copy."""
+    n_times = data.shape[0]
+    win = int(round(epoch_sec * sfreq))
+    hop = max(1, int(round(win * (1.0 - overlap))))
+    if win < 1 or n_times < win:
+        raise ValueError("Not enough data for one epoch")
+    return np.lib.stride_tricks.sliding_window_view(data.T, win, axis=-1)[:, ::hop].transpose(1, 0, 2)
+
+def _band_index(freqs: np.ndarray, bands: Dict[str, Tuple[float, float]]):
+    """Frequency bins to keep (union of bands) and each band's positions within them."""
+    masks = [(freqs >= lo) & (freqs <= hi) for lo, hi in bands.values()]
+    for name, m in zip(bands, masks):
+        if not m.any():
+            raise ValueError(f"No frequency bins in band '{name}' {bands[name]} at this epoch length")
+    keep = np.flatnonzero(np.any(masks, axis=0))
+    return keep, [np.flatnonzero(m[keep]) for m in masks]
+
+def connectivity_bands(data: np.ndarray, sfreq: float, bands: Dict[str, Tuple[float, float]], methods=CON_METHODS,
+                       epoch_sec: float = 2.0, overlap: float = 0.5, bandwidth: Optional[float] = None,
+                       max_block_bytes: int = DEFAULT_BLOCK_BYTES) -> Dict[str, np.ndarray]:
+    """Band-averaged connectivity matrices. data: (n_times, n_channels) or epochs (n_epochs, n_channels, n_times).
+    Returns {method: (n_bands, n_ch, n_ch)} in ``bands`` order; matrices are symmetric (imcoh antisymmetric),
+    with coh/PLV = 1 and the other methods 0 on the diagonal."""
+    from scipy import fft as sp_fft
+    methods = parse_methods(methods)
+    if data.ndim == 2:
+        X = epoch_view(data, sfreq, epoch_sec, overlap)
+    elif data.ndim == 3:
+        X = data
+    else:
+        raise ValueError("data must be (n_times, n_channels) or (n_epochs, n_channels, n_times)")
+    n_ep, n_ch, n_t = X.shape
+    tapers, eigvals = dpss_tapers(n_t, half_bandwidth(n_t, sfreq, bandwidth))
+    wtap = tapers * np.sqrt(eigvals)[:, None]
+    scale = 2.0 / float(np.sum(eigvals))
+    keep, band_pos = _band_index(np.fft.rfftfreq(n_t, 1.0 / sfreq), bands)
+    n_f, n_tap = keep.size, wtap.shape[0]
+
+    need_csd = "coh" in methods or "imcoh" in methods
+    acc = {}
+    if need_csd:
+        acc["csd"] = np.zeros((n_f, n_ch, n_ch), dtype=np.complex128)
+        psd = np.zeros((n_f, n_ch))
+    if "plv" in methods:
+        acc["plv"] = np.zeros((n_f, n_ch, n_ch), dtype=np.complex128)
+    if "pli" in methods:
+        acc["pli"] = np.zeros((n_f, n_ch, n_ch))
+    if "wpli" in methods:
+        acc["wpli_num"] = np.zeros((n_f, n_ch, n_ch))
+        acc["wpli_den"] = np.zeros((n_f, n_ch, n_ch))
+
+    # epochs per spectra chunk: tapered copy + full complex spectrum
+    ep_chunk = max(1, int(max_block_bytes) // max(1, n_ch * n_tap * n_t * 8 * 3))
+    for e0 in range(0, n_ep, ep_chunk):
+        blk = np.asarray(X[e0:e0 + ep_chunk], dtype=np.float64)
+        blk = blk - blk.mean(axis=-1, keepdims=True)
+        spec = sp_fft.rfft(blk[:, :, None, :] * wtap, axis=-1)[..., keep]   # (e, ch, taper, f)
+        S = np.ascontiguousarray(spec.transpose(0, 3, 1, 2))                 # (e, f, ch, taper)
+        del spec
+        ne = S.shape[0]
+        if need_csd:
+            psd += (S.real ** 2 + S.imag ** 2).sum(axis=(0, 3)) * scale
+        # rows per CSD block: ~4 live (e, f, rows, n_ch) complex temporaries
+        rows = max(1, int(max_block_bytes) // max(1, ne * n_f * n_ch * 16 * 4))
+        for r0 in range(0, n_ch, rows):
+            r1 = min(n_ch, r0 + rows)
+            csd = S[:, :, r0:r1] @ S[:, :, :r1].conj().swapaxes(-1, -2)       # (e, f, rows, r1)
+            csd *= scale
+            blk_sl = (slice(None), slice(r0, r1), slice(0, r1))
+            if need_csd:
+                acc["csd"][blk_sl] += csd.sum(axis=0)
+            if "plv" in acc:
+                acc["plv"][blk_sl] += (csd / np.abs(csd)).sum(axis=0)
+            if "pli" in acc or "wpli_num" in acc:
+                im = csd.imag
+                if "pli" in acc:
+                    acc["pli"][blk_sl] += np.sign(im).sum(axis=0)
+                if "wpli_num" in acc:
+                    acc["wpli_num"][blk_sl] += im.sum(axis=0)
+                    acc["wpli_den"][blk_sl] += np.abs(im).sum(axis=0)
+
+    out = {}
+    for m in methods:
+        if m in ("coh", "imcoh"):
+            norm = np.sqrt(psd[:, :, None] * psd[:, None, :])  # both sums over epochs, so n_ep cancels
+            con = (np.abs(acc["csd"]) if m == "coh" else acc["csd"].imag) / norm
+        elif m == "plv":
+            con = np.abs(acc["plv"]) / n_ep
+        elif m == "pli":
+            con = np.abs(acc["pli"]) / n_ep
+        else:
+            den = acc["wpli_den"]
+            con = np.divide(np.abs(acc["wpli_num"]), den, out=np.zeros_like(den), where=den != 0)
+        low = np.tril(np.stack([con[pos].mean(axis=0) for pos in band_pos]), k=-1)
+        full = low - low.swapaxes(-1, -2) if m == "imcoh" else low + low.swapaxes(-1, -2)
+        full[:, np.arange(n_ch), np.arange(n_ch)] = _DIAG[m]
+        out[m] = full
+    return out
 
 def spectral_connectivity_matrix(
     data: np.ndarray,
@@ -11,29 +133,6 @@ def spectral_connectivity_matrix(
     epoch_sec: float = 2.0,
     overlap: float = 0.5,
 ) -> Dict[str, np.ndarray]:
-    if data.ndim == 2:
-        n_times, n_ch = data.shape
-        win = int(round(epoch_sec * sfreq))
-        hop = max(1, int(round(win * (1.0 - overlap))))
-        epochs = []
-        for start in range(0, max(0, n_times - win + 1), hop):
-            sl = slice(start, start + win)
-            epochs.append(data[sl, :].T)
-        if not epochs:
-            raise ValueError("Not enough data for one epoch")
-        X = np.stack(epochs, axis=0)
-    elif data.ndim == 3:
-        X = data
-    else:
-        raise ValueError("data must be (n_times, n_channels) or (n_epochs, n_channels, n_times)")
-
-    con, freqs, times, n_epochs, n_tapers = mne.connectivity.spectral_connectivity(
-        X, method=method, mode="multitaper", sfreq=sfreq, fmin=fmin, fmax=fmax, faverage=True, verbose=False
-    )
-    out = {}
-    for i, m in enumerate(method):
-        M = con[i, :, :, 0]
-        if m in ("coh", "plv"):
-            np.fill_diagonal(M, 1.0)
-        out[m] = M
-    return out
+    """Connectivity averaged over one fmin..fmax band: {method: (n_ch, n_ch)}."""
+    con = connectivity_bands(data, sfreq, {"band": (fmin, fmax)}, method, epoch_sec=epoch_sec, overlap=overlap)
+    return {m: M[0] for m, M in con.items()}
@@ -23,7 +23,7 @@ class DualHandler(logging.Handler):
 
         # Console handler
         self.console_handler = logging.StreamHandler()
-        self.console_handler.stream = open(self.console_handler.stream.fileno(), mode='w', encoding='utf-8', buffering=1)
+        self.console_handler.stream = open(self.console_handler.stream.fileno(), mode='w', encoding='utf-8', buffering=1, closefd=False)
 
         # Set logging level and format
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -0,0 +1,107 @@
+"""Epoched analysis: fixed-length or event-locked epochs per task.
+
+An ``EpochSpec`` cuts a task into fixed-length epochs (``epoch_sec``, hop ``step_sec``) or, for tasks with an
+onset list, into epochs starting ``tmin`` seconds from each onset; epochs that do not fit in the recording
+are dropped. Rejection is vectorized over all epochs and channels: an epoch is rejected when any channel's
+peak-to-peak amplitude exceeds ``reject_ptp`` (data units) or its variance exceeds ``reject_var`` times that
+channel's median epoch variance. All epoch PSDs come from one psd.compute_psd_welch_epochs batch; the task PSD
+is the mean over the kept epochs.
+
+Events files are JSON, either ``{task: [onset_s, ...]}`` for every subject or ``{subject: {task: [...]}}``.
+"""
+import json
+import numpy as np
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+from .psd import EPOCH_BLOCK_BYTES, compute_psd_welch_epochs
+
+@dataclass(frozen=True)
+class EpochSpec:
+    epoch_sec: float
+    step_sec: Optional[float] = None                     # fixed-length hop (default: epoch_sec)
+    tmin: float = 0.0                                    # event-locked: epoch start relative to the onset
+    events: Optional[Dict[str, Tuple[float, ...]]] = None  # task -> onsets (s); other tasks get fixed-length epochs
+    reject_ptp: Optional[float] = None
+    reject_var: Optional[float] = None
+
+    def for_subject(self, events_by_subject: Optional[Dict[str, Dict[str, Sequence[float]]]], subject_id: str) -> "EpochSpec":
+        """Copy with the onset lists of ``subject_id`` (``"*"`` entries apply to every subject)."""
+        if not events_by_subject:
+            return self
+        ev = events_by_subject.get(subject_id, events_by_subject.get("*"))
+        return EpochSpec(self.epoch_sec, self.step_sec, self.tmin,
+                         {t: tuple(map(float, v)) for t, v in ev.items()} if ev else None, self.reject_ptp, self.reject_var)
+
+    def windows(self, task: str, n_times: int, sfreq: float) -> Tuple[np.ndarray, np.ndarray, int]:
+        """(starts in samples, index of each epoch in its onset list or fixed grid, epoch length in samples)."""
+        length = int(round(self.epoch_sec * sfreq))
+        if length < 1:
+            raise ValueError(f"epoch_sec={self.epoch_sec} is shorter than one sample")
+        onsets = self.events.get(task) if self.events else None
+        if onsets is None:
+            step = max(1, int(round((self.step_sec or self.epoch_sec) * sfreq)))
+            starts = np.arange(0, max(0, n_times - length + 1), step, dtype=np.int64)
+            return starts, np.arange(starts.size, dtype=np.int32), length
+        starts = np.round((np.asarray(onsets, dtype=np.float64) + self.tmin) * sfreq).astype(np.int64)
+        index = np.flatnonzero((starts >= 0) & (starts + length <= n_times)).astype(np.int32)
+        return starts[index], index, length
+
+    def as_dict(self, task: str = None) -> Dict[str, Any]:
+        d = {"epoch_sec": self.epoch_sec, "step_sec": self.step_sec, "tmin": self.tmin,
+             "reject_ptp": self.reject_ptp, "reject_var": self.reject_var}
+        if task is not None and self.events and task in self.events:
+            d["onsets"] = list(self.events[task])
+        return d
+
+def load_events(events: Union[str, Dict[str, Any]]) -> Dict[str, Dict[str, list]]:
+    """{subject or "*": {task: onsets}} from an events JSON file or an already loaded mapping (see module docstring)."""
+    ev = events
+    if isinstance(events, str):
+        with open(events, "r", encoding="utf-8") as f:
+            ev = json.load(f)
+    if not isinstance(ev, dict) or not ev:
+        raise ValueError(f"{events if isinstance(events, str) else 'events'}: expected a JSON object of task -> onsets "
+                         "or subject -> {task: onsets}")
+    if all(isinstance(v, dict) for v in ev.values()):
+        return ev
+    return {"*": ev}
+
+def amplitude_stats(data: np.ndarray, starts: np.ndarray, epoch_samples: int, ptp: bool = True, var: bool = True,
+                    max_block_bytes: int = EPOCH_BLOCK_BYTES) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """Peak-to-peak amplitude and variance per epoch and channel, each (n_epochs, n_channels) or None if not
+    requested. Epochs are gathered in cache-sized blocks of whole sample rows and reduced along the time axis."""
+    n_ch = data.shape[1]
+    out_ptp = np.empty((starts.size, n_ch)) if ptp else None
+    out_var = np.empty((starts.size, n_ch)) if var else None
+    k = max(1, int(max_block_bytes) // max(1, n_ch * epoch_samples * 8))
+    offs = np.arange(epoch_samples)
+    for e0 in range(0, starts.size, k):
+        blk = data[starts[e0:e0 + k, None] + offs]  # (k, epoch_samples, n_ch)
+        if ptp:
+            out_ptp[e0:e0 + k] = blk.max(axis=1) - blk.min(axis=1)
+        if var:
+            out_var[e0:e0 + k] = blk.var(axis=1, dtype=np.float64)
+    return out_ptp, out_var
+
+def reject_mask(ptp: np.ndarray, var: np.ndarray, reject_ptp: float = None, reject_var: float = None) -> np.ndarray:
+    """(n_epochs,) bool, True for kept epochs."""
+    keep = np.ones((ptp if ptp is not None else var).shape[0], dtype=bool)
+    if reject_ptp is not None:
+        keep &= ~np.any(ptp > reject_ptp, axis=1)
+    if reject_var is not None and var.shape[0]:
+        keep &= ~np.any(var > reject_var * np.median(var, axis=0), axis=1)
+    return keep
+
+def compute_epoch_psd(data: np.ndarray, sfreq: float, spec: EpochSpec, task: str, nperseg: int, noverlap: Optional[int],
+                      window: str = "hann") -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """Epoch one (n_times, n_channels) task. Returns (freqs, psd (n_epochs, n_ch, n_freqs), info) with info
+    ``onsets`` (epoch starts in s), ``index`` and ``keep``; the amplitude pass only runs with a rejection threshold."""
+    starts, index, length = spec.windows(task, data.shape[0], sfreq)
+    if starts.size == 0:
+        raise ValueError(f"no complete {spec.epoch_sec:g} s epoch in {data.shape[0] / sfreq:g} s of data")
+    keep = np.ones(starts.size, dtype=bool)
+    if spec.reject_ptp is not None or spec.reject_var is not None:
+        ptp, var = amplitude_stats(data, starts, length, ptp=spec.reject_ptp is not None, var=spec.reject_var is not None)
+        keep = reject_mask(ptp, var, spec.reject_ptp, spec.reject_var)
+    freqs, psd = compute_psd_welch_epochs(data, sfreq, starts, length, nperseg=nperseg, noverlap=noverlap, window=window)
+    return freqs, psd, {"onsets": starts / float(sfreq), "index": index, "keep": keep}
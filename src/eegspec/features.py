@@ -2,6 +2,13 @@ import numpy as np
 from typing import Dict, Tuple
 from .utils import EPS
 
+_STD_BANDS = {"delta":(1.0,4.0), "theta":(4.0,7.0), "beta":(13.0,30.0), "gamma":(30.0,45.0)}
+TOTAL_RANGE = (1.0, 45.0)
+
+def std_bands(alpha_band: Tuple[float,float]) -> Dict[str, Tuple[float,float]]:
+    """The standard bands with the given alpha band, in feature order."""
+    return {"delta":_STD_BANDS["delta"], "theta":_STD_BANDS["theta"], "alpha":tuple(alpha_band), "beta":_STD_BANDS["beta"], "gamma":_STD_BANDS["gamma"]}
+
 def band_mask(freqs: np.ndarray, fmin: float, fmax: float) -> np.ndarray:
     return (freqs >= float(fmin)) & (freqs <= float(fmax))
 
@@ -51,3 +58,121 @@ def spectral_edge(psd: np.ndarray, freqs: np.ndarray, percent=0.95, fmin=1.0, fm
 
 def median_frequency(psd: np.ndarray, freqs: np.ndarray, fmin=1.0, fmax=45.0):
     return spectral_edge(psd, freqs, percent=0.5, fmin=fmin, fmax=fmax)
+
+def _trapz_weights(freqs: np.ndarray, i0: int, i1: int) -> np.ndarray:
+    """Weights w such that psd[..., i0:i1] @ w == np.trapz(psd[..., i0:i1], freqs[i0:i1], axis=-1)."""
+    w = np.zeros(max(0, i1 - i0))
+    if i1 - i0 >= 2:
+        dx = np.diff(freqs[i0:i1]) / 2.0
+        w[:-1] += dx
+        w[1:] += dx
+    return w
+
+class FeatureEngine:
+    """Fused spectral features for one frequency grid and band set.
+
+    Band slice bounds (``band_mask`` on a sorted grid is a contiguous slice) and trapezoid weights are
+    precomputed once, so one ``compute`` call yields absolute/relative band powers, entropy, moments,
+    SEF95 and F50 from a single pass over the shared ``total_range`` slice: band powers are one matmul,
+    SEF/F50 share one cumulative sum. ``psd`` may have any leading axes, e.g. (n_tasks, n_channels, n_freqs).
+    Results equal ``bandpower``/``spectral_entropy``/``spectral_moments``/``spectral_edge``/``median_frequency``.
+    """
+    _cache = {}
+
+    def __init__(self, freqs: np.ndarray, bands: Dict[str, Tuple[float,float]], total_range=(1.0,45.0),
+                 log_base=np.e, edges=(("SEF95", 0.95), ("F50", 0.5))):
+        self.freqs = np.asarray(freqs, dtype=float)
+        if np.any(np.diff(self.freqs) < 0):
+            raise ValueError("freqs must be sorted ascending")
+        self.bands = {k: (float(a), float(b)) for k, (a, b) in bands.items()}
+        self.band_names = list(self.bands)
+        self.total_range = (float(total_range[0]), float(total_range[1]))
+        self.log_base = log_base
+        self.edges = tuple(edges)
+        self.band_slices = {k: self._slice(a, b) for k, (a, b) in self.bands.items()}
+        self.total_slice = self._slice(*self.total_range)
+        # one contiguous window covering every band and the total range
+        bounds = list(self.band_slices.values()) + [self.total_slice]
+        lo = min(s.start for s in bounds if s.stop > s.start) if any(s.stop > s.start for s in bounds) else 0
+        hi = max(s.stop for s in bounds)
+        self.window = slice(lo, max(lo, hi))
+        n = self.window.stop - self.window.start
+        W = np.zeros((n, len(self.band_names) + 1))
+        for j, s in enumerate(list(self.band_slices.values()) + [self.total_slice]):
+            if s.stop > s.start:
+                W[s.start - lo:s.stop - lo, j] = _trapz_weights(self.freqs, s.start, s.stop)
+        self.weights = W  # (n_window_freqs, n_bands + 1); last column integrates total_range
+        ts = self.total_slice
+        self._tot = slice(ts.start - lo, ts.stop - lo) if ts.stop > ts.start else slice(0, 0)
+        self.f_total = self.freqs[ts]
+
+    def _slice(self, fmin: float, fmax: float) -> slice:
+        i0 = int(np.searchsorted(self.freqs, float(fmin), side="left"))
+        i1 = int(np.searchsorted(self.freqs, float(fmax), side="right"))
+        return slice(i0, max(i0, i1))
+
+    @classmethod
+    def for_grid(cls, freqs: np.ndarray, bands: Dict[str, Tuple[float,float]], total_range=(1.0,45.0), **kw) -> "FeatureEngine":
+        """Engine cached per (grid, bands, total_range); reused across tasks in the same process."""
+        freqs = np.asarray(freqs, dtype=float)
+        key = (freqs.tobytes(), tuple((k, float(a), float(b)) for k, (a, b) in bands.items()),
+               tuple(map(float, total_range)), tuple(sorted(kw.items())))
+        eng = cls._cache.get(key)
+        if eng is None:
+            if len(cls._cache) >= 32:
+                cls._cache.clear()
+            eng = cls._cache[key] = cls(freqs, bands, total_range, **kw)
+        return eng
+
+    def band_powers(self, psd: np.ndarray) -> np.ndarray:
+        """(..., n_bands + 1) absolute band powers; the last column is the total_range power."""
+        return psd[..., self.window] @ self.weights
+
+    def compute(self, psd: np.ndarray) -> Dict[str, object]:
+        psd = np.asarray(psd)
+        bp = self.band_powers(psd)
+        denom = bp[..., -1] + EPS
+        out = {
+            "bands_abs": {k: bp[..., j] for j, k in enumerate(self.band_names)},
+            "bands_rel": {k: bp[..., j] / denom for j, k in enumerate(self.band_names)},
+        }
+        P = psd[..., self.window][..., self._tot]
+        f = self.f_total
+        cum = np.cumsum(P, axis=-1)
+        Psum = cum[..., -1:] if P.shape[-1] else np.zeros(P.shape[:-1] + (1,))
+        # entropy
+        p = P / (Psum + EPS)
+        ent = -np.sum(p * np.log(p + EPS), axis=-1)
+        if self.log_base != np.e:
+            ent = ent / np.log(self.log_base)
+        out["entropy"] = ent
+        # moments
+        S = Psum[..., 0]
+        Pw = S + EPS
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mu = (P @ f) / S
+        d = f - mu[..., None]
+        d2 = d * d
+        var = np.sum(P * d2, axis=-1) / Pw
+        skew = np.sum(P * d2 * d, axis=-1) / (Pw * (np.sqrt(var) + EPS) ** 3)
+        kurt = np.sum(P * d2 * d2, axis=-1) / (Pw * (var + EPS) ** 2)
+        out["moments"] = {"centroid": mu, "variance": var, "skewness": skew, "kurtosis": kurt}
+        # spectral edges from the shared cumulative sum
+        total = Psum + EPS
+        for name, pct in self.edges:
+            idx = np.argmax(cum >= pct * total, axis=-1)
+            out[name] = f[idx]
+        return out
+
+    def faa(self, band_abs: Dict[str, np.ndarray], ch_names, left="F3", right="F4", band="alpha", use_db=False):
+        """FAA from already computed absolute band powers; vectorized over leading axes (nan if F3/F4 missing)."""
+        idx = {c: i for i, c in enumerate(ch_names)}
+        P = np.asarray(band_abs[band])
+        if left not in idx or right not in idx:
+            return np.full(P.shape[:-1], np.nan) if P.ndim > 1 else float("nan")
+        P_L, P_R = P[..., idx[left]], P[..., idx[right]]
+        if use_db:
+            v = 10*np.log10(P_R + EPS) - 10*np.log10(P_L + EPS)
+        else:
+            v = np.log(P_R + EPS) - np.log(P_L + EPS)
+        return float(v) if np.ndim(v) == 0 else v
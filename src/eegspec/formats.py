@@ -0,0 +1,294 @@
+"""Subject input formats besides task-centric JSON.
+
+All formats store each task as ``n_channels x n_times`` (like the JSON lists) and the loaders
+return transposed ``(n_times, n_channels)`` views, so nothing is copied until a task is touched.
+
+- ``.npz``: one member per task (``np.savez``). Uncompressed members are memory-mapped.
+- ``.npy``: a single task named ``data``. Memory-mapped.
+- ``.hdr`` + ``.bin``: raw little-endian samples plus a JSON sidecar listing ``offset``/``shape``
+  per task. Memory-mapped. Written by ``eegspec convert``.
+"""
+import os, json, re, zipfile
+import numpy as np
+from typing import Dict, Iterator, Tuple, Optional
+
+# Discovery order also sets precedence when several files share a subject id.
+SUBJECT_EXTS = (".hdr", ".npz", ".npy", ".json")
+RAW_FORMAT = "eegspec-raw"
+NPY_TASK_NAME = "data"
+
+def select_subject_files(names) -> list:
+    """Pick subject files from a folder listing: one file per subject id, binary formats first, sorted."""
+    best = {}
+    for x in names:
+        stem, ext = os.path.splitext(x)
+        ext = ext.lower()
+        if ext not in SUBJECT_EXTS:
+            continue
+        if stem not in best or SUBJECT_EXTS.index(ext) < SUBJECT_EXTS.index(os.path.splitext(best[stem])[1].lower()):
+            best[stem] = x
+    return sorted(best.values())
+
+_WS = re.compile(r"[ \t\n\r]*")
+JSON_CHUNK_CHARS = 1 << 20
+
+class _JsonStream:
+    """raw_decode over a text file read in chunks. The buffer holds only the not yet parsed text of the current
+    chunk (grown to a few times the longest value seen)."""
+    def __init__(self, f, chunk_chars: int = JSON_CHUNK_CHARS):
+        self.f = f
+        self.chunk = int(chunk_chars)
+        self.buf, self.pos, self.eof = "", 0, False
+        self.offset = 0  # characters dropped in front of buf
+        self.dec = json.JSONDecoder()
+
+    def _more(self, n: int = 0) -> bool:
+        data = "" if self.eof else self.f.read(max(self.chunk, n))
+        if not data:
+            self.eof = True
+            return False
+        self.offset += self.pos
+        self.buf, self.pos = self.buf[self.pos:] + data, 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end of the file), not consumed."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self._more():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"Malformed JSON at char {self.offset + self.pos}: expected '{ch}'")
+        self.pos += 1
+
+    def unread(self, text: str):
+        self.offset += self.pos - len(text)
+        self.buf, self.pos = text + self.buf[self.pos:], 0
+
+    def decode(self):
+        """The next JSON value. A value cut off by the end of the buffer is retried with twice the text, and later
+        chunks hold a few values that long, so a partial parse is the exception even for long channel rows."""
+        self.peek()
+        while True:
+            try:
+                v, end = self.dec.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                if end < len(self.buf) or self.eof:  # a number ending the buffer may continue in the next chunk
+                    self.pos = end
+                    return v
+            self.chunk = max(self.chunk, 4 * (len(self.buf) - self.pos))
+            self._more(len(self.buf) - self.pos)
+
+def iter_subject_tasks_json(path: str, chunk_chars: int = JSON_CHUNK_CHARS) -> Iterator[Tuple[str, np.ndarray]]:
+    """Stream a task-centric subject JSON, yielding (task_name, data (n_channels, n_times)) one task at a time.
+    The file is parsed incrementally in ``chunk_chars`` pieces and only one channel row exists as Python floats
+    at any moment, so peak memory is about one task (plus a chunk of text), whatever the file size."""
+    with open(path, "r", encoding="utf-8") as f:
+        js = _JsonStream(f, chunk_chars)
+        if js.peek() != "{":
+            raise ValueError("Top-level JSON must be an object mapping task_name -> channel_lists")
+        js.expect("{")
+        if js.peek() == "}":
+            return
+        while True:
+            task = js.decode()
+            js.expect(":")
+            if js.peek() != "[":
+                raise ValueError(f"Task '{task}' is not a 2D matrix (n_channels x n_times)")
+            js.expect("[")
+            if js.peek() == "[":
+                rows = []
+                while True:
+                    rows.append(np.asarray(js.decode(), dtype=float))
+                    if js.peek() == ",":
+                        js.expect(",")
+                        continue
+                    js.expect("]")
+                    break
+                if any(r.ndim != 1 for r in rows):
+                    raise ValueError(f"Task '{task}' is not a 2D matrix (n_channels x n_times)")
+                arr = np.stack(rows, axis=0)
+            else:
+                js.unread("[")
+                arr = np.asarray(js.decode(), dtype=float)
+                if arr.ndim == 1:
+                    arr = arr[None, :]
+            if arr.ndim != 2:
+                raise ValueError(f"Task '{task}' is not a 2D matrix (n_channels x n_times)")
+            yield str(task), arr
+            if js.peek() == ",":
+                js.expect(",")
+                continue
+            js.expect("}")
+            return
+
+def _check_2d(task: str, arr: np.ndarray) -> np.ndarray:
+    if arr.ndim == 1:
+        arr = arr[None, :]
+    if arr.ndim != 2:
+        raise ValueError(f"Task '{task}' is not a 2D matrix (n_channels x n_times)")
+    return arr
+
+def load_subject_tasks_npy(path: str) -> Dict[str, np.ndarray]:
+    arr = _check_2d(NPY_TASK_NAME, np.load(path, mmap_mode="r"))
+    return {NPY_TASK_NAME: arr.T}
+
+def _read_npy_header(fh):
+    version = np.lib.format.read_magic(fh)
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(fh)
+    if version == (2, 0):
+        return np.lib.format.read_array_header_2_0(fh)
+    return None
+
+def _npz_member_header(path: str, info: zipfile.ZipInfo):
+    """(shape, fortran, dtype, data_offset) of an uncompressed .npy member, or None."""
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as fh:
+        fh.seek(info.header_offset)
+        local = fh.read(30)
+        if local[:4] != b"PK\x03\x04":
+            return None
+        name_len = int.from_bytes(local[26:28], "little")
+        extra_len = int.from_bytes(local[28:30], "little")
+        fh.seek(info.header_offset + 30 + name_len + extra_len)
+        hdr = _read_npy_header(fh)
+        if hdr is None:
+            return None
+        return hdr + (fh.tell(),)
+
+def npz_member_memmap(path: str, info: zipfile.ZipInfo):
+    """Memory-map an uncompressed .npy member in place; return None if it cannot be mapped."""
+    hdr = _npz_member_header(path, info)
+    if hdr is None or hdr[2].hasobject:
+        return None
+    shape, fortran, dtype, offset = hdr
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran else "C")
+
+def load_subject_tasks_npz(path: str, tasks=None) -> Dict[str, np.ndarray]:
+    out = {}
+    with zipfile.ZipFile(path) as zf:
+        for info in zf.infolist():
+            if not info.filename.endswith(".npy"):
+                continue
+            task = info.filename[:-4]
+            if tasks is not None and task not in tasks:
+                continue
+            arr = npz_member_memmap(path, info)
+            if arr is None:  # compressed member: decode eagerly
+                with zf.open(info) as fh:
+                    arr = np.lib.format.read_array(fh)
+            out[task] = _check_2d(task, arr).T
+    return out
+
+def read_raw_header(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        hdr = json.load(f)
+    if hdr.get("format") != RAW_FORMAT:
+        raise ValueError(f"{path} is not an {RAW_FORMAT} sidecar")
+    return hdr
+
+def load_subject_tasks_raw(path: str, tasks=None) -> Dict[str, np.ndarray]:
+    hdr = read_raw_header(path)
+    data_path = os.path.join(os.path.dirname(path), hdr["data"])
+    dtype = np.dtype(hdr["dtype"])
+    out = {}
+    for task, meta in hdr["tasks"].items():
+        if tasks is not None and task not in tasks:
+            continue
+        shape = tuple(meta["shape"])
+        arr = np.memmap(data_path, dtype=dtype, mode="r", offset=int(meta["offset"]), shape=shape)
+        out[task] = _check_2d(task, arr).T
+    return out
+
+def _shape_2d(shape) -> Tuple[int, int]:
+    shape = tuple(int(x) for x in shape)
+    return (1,) + shape if len(shape) == 1 else shape
+
+def subject_task_layout(path: str) -> Optional[Dict[str, Tuple[Tuple[int, int], str]]]:
+    """task -> ((n_channels, n_times), dtype) from file headers only, or None when the format must be parsed (JSON)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".hdr":
+        hdr = read_raw_header(path)
+        return {t: (_shape_2d(m["shape"]), np.dtype(hdr["dtype"]).str) for t, m in hdr["tasks"].items()}
+    if ext == ".npy":
+        with open(path, "rb") as fh:
+            shape, _, dtype = _read_npy_header(fh)
+        return {NPY_TASK_NAME: (_shape_2d(shape), dtype.str)}
+    if ext == ".npz":
+        out = {}
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.filename.endswith(".npy"):
+                    continue
+                hdr = _npz_member_header(path, info)
+                if hdr is None:
+                    with zf.open(info) as fh:
+                        hdr = _read_npy_header(fh)
+                out[info.filename[:-4]] = (_shape_2d(hdr[0]), hdr[2].str)
+        return out
+    return None
+
+class RawSubjectWriter:
+    """Append tasks to a ``.bin`` file and write the ``.hdr`` sidecar on close."""
+    def __init__(self, hdr_path: str, dtype="float64"):
+        self.hdr_path = hdr_path
+        self.data_name = os.path.splitext(os.path.basename(hdr_path))[0] + ".bin"
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.tasks = {}
+        self._offset = 0
+        os.makedirs(os.path.dirname(os.path.abspath(hdr_path)), exist_ok=True)
+        self._fh = open(os.path.join(os.path.dirname(os.path.abspath(hdr_path)), self.data_name), "wb")
+
+    def add_task(self, name: str, data_cxt: np.ndarray):
+        arr = np.ascontiguousarray(_check_2d(name, np.asarray(data_cxt)), dtype=self.dtype)
+        self._fh.write(arr.tobytes())
+        self.tasks[name] = {"offset": self._offset, "shape": list(arr.shape)}
+        self._offset += arr.nbytes
+
+    def close(self):
+        if self._fh is None:
+            return
+        self._fh.close()
+        self._fh = None
+        hdr = {"format": RAW_FORMAT, "version": 1, "data": self.data_name, "dtype": self.dtype.str, "tasks": self.tasks}
+        tmp = self.hdr_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(hdr, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.hdr_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_subject_npz(path: str, tasks: Iterator[Tuple[str, np.ndarray]], dtype="float64"):
+    """Write (task, data (n_channels, n_times)) pairs as uncompressed .npz members, one at a time."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for name, arr in tasks:
+            arr = np.ascontiguousarray(_check_2d(name, np.asarray(arr)), dtype=dtype)
+            with zf.open(name + ".npy", "w", force_zip64=True) as fh:
+                np.lib.format.write_array(fh, arr, allow_pickle=False)
+
+def convert_subject(src_path: str, out_dir: str, fmt: str = "raw", dtype="float64") -> str:
+    """Convert a subject JSON to ``raw`` (.hdr/.bin) or ``npz``, streaming task by task. Returns the new path."""
+    sid = os.path.splitext(os.path.basename(src_path))[0]
+    if fmt == "raw":
+        dst = os.path.join(out_dir, sid + ".hdr")
+        with RawSubjectWriter(dst, dtype=dtype) as w:
+            for task, arr in iter_subject_tasks_json(src_path):
+                w.add_task(task, arr)
+    elif fmt == "npz":
+        dst = os.path.join(out_dir, sid + ".npz")
+        write_subject_npz(dst, iter_subject_tasks_json(src_path), dtype=dtype)
+    else:
+        raise ValueError("fmt must be 'raw' or 'npz'")
+    return dst
@@ -1,15 +1,74 @@
 import numpy as np
-from scipy.signal import savgol_filter
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 from .features import band_mask
 
+IAF_RANGE = (7.0, 14.0)
+# Klimesch-style individualized bands, offsets in Hz relative to the IAF
+INDIVIDUAL_OFFSETS = {"theta": (-6.0, -4.0), "alpha": (-4.0, 2.0)}
+
+@lru_cache(maxsize=32)
+def _savgol_matrix(n: int, window: int, poly: int) -> np.ndarray:
+    """(n, n) matrix M with ``x @ M.T == savgol_filter(x, window, poly, axis=-1)`` (mode='interp'):
+    interior rows hold the convolution coefficients, the first/last ``window // 2`` rows the polynomial
+    fit over the edge window. Read-only; cached per (grid size, window, poly)."""
+    half = window // 2
+    M = np.zeros((n, n))
+    A = np.arange(-half, window - half, dtype=float) ** np.arange(poly + 1)[:, None]
+    c = np.linalg.lstsq(A, np.eye(poly + 1)[0], rcond=None)[0]  # scipy.signal.savgol_coeffs(window, poly, use="dot")
+    for i in range(half, n - half):
+        M[i, i - half:i + half + 1] = c
+    V = np.vander(np.arange(window, dtype=float), poly + 1)
+    H = V @ np.linalg.pinv(V)  # projection onto polynomials of degree <= poly over one window
+    M[:half, :window] = H[:half]
+    M[n - half:, n - window:] = H[window - half:]
+    M.setflags(write=False)
+    return M
+
+class IAFEstimator:
+    """Vectorized individual alpha frequency for a fixed frequency grid.
+    ``compute`` takes a PSD with any leading axes (..., n_freqs) - e.g. all tasks x channels of a subject -
+    and returns the (optionally Savitzky-Golay smoothed) peak and the centre of gravity within [fmin, fmax]."""
+    _cache = {}
+
+    def __init__(self, freqs: np.ndarray, fmin: float = IAF_RANGE[0], fmax: float = IAF_RANGE[1],
+                 smooth: bool = True, window: int = 11, poly: int = 3):
+        self.freqs = np.asarray(freqs, dtype=float)
+        m = band_mask(self.freqs, fmin, fmax)
+        idx = np.flatnonzero(m)
+        if idx.size == 0:
+            raise ValueError(f"No frequency bins in IAF range {fmin}-{fmax} Hz")
+        self.sl = slice(int(idx[0]), int(idx[-1]) + 1)
+        self.f = self.freqs[self.sl]
+        self.smoother = _savgol_matrix(self.f.size, window, poly) if smooth and self.f.size >= window else None
+
+    @classmethod
+    def for_grid(cls, freqs: np.ndarray, **kw) -> "IAFEstimator":
+        """Estimator cached per (grid, parameters); reused across tasks in the same process."""
+        freqs = np.asarray(freqs, dtype=float)
+        key = (freqs.tobytes(), tuple(sorted(kw.items())))
+        est = cls._cache.get(key)
+        if est is None:
+            if len(cls._cache) >= 32:
+                cls._cache.clear()
+            est = cls._cache[key] = cls(freqs, **kw)
+        return est
+
+    def compute(self, psd: np.ndarray) -> Dict[str, np.ndarray]:
+        P = np.asarray(psd)[..., self.sl]
+        cog = (P @ self.f) / np.sum(P, axis=-1)
+        if self.smoother is not None:
+            P = P @ self.smoother.T
+        peak = self.f[np.argmax(P, axis=-1)]
+        ok = np.max(P, axis=-1) > (np.median(P, axis=-1) + 1e-12)
+        return {"peak": np.where(ok, peak, np.nan), "cog": cog}
+
+def individual_bands(iaf: float, offsets: Dict[str, Tuple[float, float]] = None) -> Optional[Dict[str, Tuple[float, float]]]:
+    """{band: (iaf + lo, iaf + hi)} for a single IAF; None if the IAF is undefined."""
+    if iaf is None or not np.isfinite(iaf):
+        return None
+    offsets = INDIVIDUAL_OFFSETS if offsets is None else offsets
+    return {k: (float(iaf) + lo, float(iaf) + hi) for k, (lo, hi) in offsets.items()}
+
 def estimate_iaf(psd: np.ndarray, freqs: np.ndarray, fmin=7.0, fmax=14.0, smooth=True, window=11, poly=3):
-    m = band_mask(freqs, fmin, fmax)
-    f = freqs[m]
-    P = psd[:, m]
-    if smooth and P.shape[1] >= window:
-        P = savgol_filter(P, window_length=window, polyorder=poly, axis=1)
-    peaks = np.argmax(P, axis=1)
-    iaf = f[peaks]
-    ok = np.max(P, axis=1) > (np.median(P, axis=1) + 1e-12)
-    iaf[~ok] = np.nan
-    return iaf
+    return IAFEstimator.for_grid(freqs, fmin=fmin, fmax=fmax, smooth=smooth, window=window, poly=poly).compute(psd)["peak"]
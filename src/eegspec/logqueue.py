@@ -0,0 +1,128 @@
+"""Worker logging through one multiprocessing queue and a listener thread in the parent.
+
+Workers install a ``QueueHandler`` once per process (``ProcessPoolExecutor(initializer=init_worker_logging,
+initargs=listener.worker_args())``) instead of building a ``BaseApp``/``DualHandler`` per task, so no file or
+stream is opened in the worker at all. The parent's ``LogListener`` drains the queue in batches and writes each
+batch with one buffered write per sink: console, the run's log file and, with ``per_task=True``, a per-task
+file (``<prefix>_<subject>_<task>.log``, the old per-task naming) that is opened only while a batch for that task
+is written.
+"""
+import os, sys, logging, logging.handlers, threading, queue as _queue
+from typing import Any, Dict, List, Optional
+
+FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+LOGGER_NAME = "eegspec.vendor.dualhandler"  # the logger BaseApp/DualHandler configure
+_worker_logger: Optional[logging.Logger] = None
+
+def log_file_name(log_dir: str, prefix: str = "", suffix: str = "", percentage: float = None) -> str:
+    """Same naming as DualHandler."""
+    if prefix == suffix == "":
+        prefix = "log"
+    if percentage:
+        suffix += f"{percentage * 100:.0f}"
+    return os.path.join(log_dir, f"{prefix}{suffix}.log")
+
+class LogListener:
+    """Parent-side consumer of worker log records. Use as a context manager around the process pool."""
+    def __init__(self, log_kwargs: Dict[str, Any], per_task: bool = False, batch_size: int = 256,
+                 flush_interval: float = 0.2, ctx=None, stream=None):
+        import multiprocessing
+        self.log_kwargs = dict(log_kwargs)
+        self.level = getattr(logging, str(self.log_kwargs.get("log_level") or "INFO").upper(), logging.INFO)
+        self.per_task = per_task and bool(self.log_kwargs.get("log_dir"))
+        self.batch_size, self.flush_interval = batch_size, flush_interval
+        self.queue = (ctx or multiprocessing).Queue()
+        self.stream = stream
+        self.formatter = logging.Formatter(FORMAT)
+        self.records = 0
+        self.batches = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def worker_args(self) -> tuple:
+        return (self.queue, self.level)
+
+    def start(self) -> "LogListener":
+        log_dir = self.log_kwargs.get("log_dir")
+        self._file = None
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            self._file = open(log_file_name(log_dir, self.log_kwargs.get("log_prefix") or "", self.log_kwargs.get("log_suffix") or "",
+                                            self.log_kwargs.get("log_percentage")), "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="eegspec-log-listener", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+        if self._file is not None:
+            self._file.close()
+        self.queue.close()
+        self.queue.join_thread()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        done = False
+        while not done:
+            try:
+                rec = self.queue.get(timeout=self.flush_interval)
+            except _queue.Empty:
+                continue
+            batch: List[logging.LogRecord] = []
+            while rec is not None:
+                batch.append(rec)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    rec = self.queue.get_nowait()
+                except _queue.Empty:
+                    break
+            done = rec is None
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[logging.LogRecord]):
+        lines = [self.formatter.format(r) + "\n" for r in batch]
+        text = "".join(lines)
+        stream = self.stream or sys.stderr
+        stream.write(text)
+        stream.flush()
+        if self._file is not None:
+            self._file.write(text)
+            self._file.flush()
+        if self.per_task:
+            by_task: Dict[str, List[str]] = {}
+            for r, line in zip(batch, lines):
+                suffix = getattr(r, "task_log", None)
+                if suffix:
+                    by_task.setdefault(suffix, []).append(line)
+            kw = self.log_kwargs
+            for suffix, task_lines in by_task.items():
+                path = log_file_name(kw["log_dir"], kw.get("log_prefix") or "", (kw.get("log_suffix") or "") + suffix, kw.get("log_percentage"))
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(task_lines))
+        self.records += len(batch)
+        self.batches += 1
+
+def init_worker_logging(q, level: int = logging.INFO):
+    """Process-pool initializer: route this process's eegspec logger into ``q``."""
+    global _worker_logger
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers = [logging.handlers.QueueHandler(q)]
+    logger.setLevel(level)
+    logger.propagate = False
+    _worker_logger = logger
+
+def worker_logger(subject_id: str, task_name: str) -> Optional[logging.LoggerAdapter]:
+    """Logger tagging records with their task (for per-task files), or None outside a queue-logging worker."""
+    if _worker_logger is None:
+        return None
+    return logging.LoggerAdapter(_worker_logger, {"task_log": f"_{subject_id}_{task_name}"})
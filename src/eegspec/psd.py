@@ -1,18 +1,300 @@
 import numpy as np
-from scipy.signal import welch, get_window
+from functools import lru_cache
 from typing import Tuple, Optional
+# scipy is imported where it is used: ``scipy.signal`` alone costs over a second per (spawned) process.
 
-def compute_psd_welch(data: np.ndarray, sfreq: float, nperseg: int = 1024, noverlap: Optional[int] = None, window: str = "hann") -> Tuple[np.ndarray, np.ndarray]:
-    """Compute per-channel PSD via Welch. data: (n_times, n_channels)."""
+
+# Upper bound on the working set of one FFT block (segment copy + spectrum).
+DEFAULT_BLOCK_BYTES = 64 * 2**20
+# Gathered epoch blocks are kept cache-sized: small blocks beat large ones by ~1.5x at 64 channels.
+EPOCH_BLOCK_BYTES = 2**20
+
+_COSINE_WINDOWS = {"hann": (0.5, 0.5), "hanning": (0.5, 0.5), "hamming": (0.54, 1 - 0.54),
+                   "blackman": (0.42, 0.50, 0.08), "boxcar": (), "rectangular": (), "rect": ()}
+
+@lru_cache(maxsize=32)
+def welch_window(window, nperseg: int, dtype: str) -> Tuple[np.ndarray, float]:
+    """Window and its power sum, cached per (window, nperseg, dtype). The array is read-only.
+    Cosine-sum windows are built in NumPy (same formula as scipy's periodic windows); others via scipy.signal."""
+    coefs = _COSINE_WINDOWS.get(window) if isinstance(window, str) else None
+    if coefs is not None:
+        fac = np.linspace(-np.pi, np.pi, nperseg + 1)[:-1]
+        win = sum(a * np.cos(k * fac) for k, a in enumerate(coefs)) if coefs else np.ones(nperseg)
+        win = win.astype(dtype)
+    else:
+        from scipy.signal import get_window
+        win = get_window(window, nperseg, fftbins=True).astype(dtype)
+    win.setflags(write=False)
+    return win, float(np.sum(win.astype(np.float64) ** 2))
+
+def segment_view(x_cxt: np.ndarray, nperseg: int, step: int) -> np.ndarray:
+    """Strided (n_channels, n_segments, nperseg) view over (n_channels, n_times); no copy."""
+    return np.lib.stride_tricks.sliding_window_view(x_cxt, nperseg, axis=-1)[:, ::step]
+
+def _segments_per_block(n_channels: int, nperseg: int, itemsize: int, max_block_bytes: int) -> int:
+    # real segment copy + complex half spectrum ~ 2x the segment block
+    per_seg = max(1, 2 * n_channels * nperseg * itemsize)
+    return max(1, int(max_block_bytes) // per_seg)
+
+def periodogram_blocks(segs: np.ndarray, win: np.ndarray, max_block_bytes: int = DEFAULT_BLOCK_BYTES):
+    """Yield (start, |rFFT|^2) for consecutive blocks of a (n_channels, n_segments, nperseg) view.
+    Each segment is mean-detrended and windowed; the result is unscaled, shape (n_channels, k, n_freqs)."""
+    from scipy import fft as sp_fft
+    n_ch, n_seg, nperseg = segs.shape
+    k = _segments_per_block(n_ch, nperseg, win.itemsize, max_block_bytes)
+    for s0 in range(0, n_seg, k):
+        blk = segs[:, s0:s0 + k].astype(win.dtype, copy=True)
+        blk -= blk.mean(axis=-1, keepdims=True)
+        blk *= win
+        spec = sp_fft.rfft(blk, axis=-1)
+        yield s0, spec.real ** 2 + spec.imag ** 2
+
+def density_scale(n_freqs: int, nperseg: int, sfreq: float, win_pow: float, dtype) -> np.ndarray:
+    """One-sided PSD density scaling vector, matching scipy.signal.welch(scaling='density')."""
+    scale = np.full(n_freqs, 1.0 / (sfreq * win_pow), dtype=np.float64)
+    if nperseg % 2:
+        scale[1:] *= 2
+    else:
+        scale[1:-1] *= 2
+    return scale.astype(dtype)
+
+def compute_psd_welch(data: np.ndarray, sfreq: float, nperseg: int = 1024, noverlap: Optional[int] = None, window: str = "hann",
+                      dtype=np.float64, max_block_bytes: int = DEFAULT_BLOCK_BYTES) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute per-channel PSD via Welch. data: (n_times, n_channels).
+    All channels are segmented at once through a strided view and transformed with one batched rFFT per
+    block of segments (at most ``max_block_bytes`` of working memory). Numerically equivalent to calling
+    scipy.signal.welch per channel (detrend='constant', scaling='density', average='mean').
+    Pass ``dtype=np.float32`` for the single-precision path."""
+    if data.ndim != 2:
+        raise ValueError("data must be (n_times, n_channels)")
+    n_times, n_channels = data.shape
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if noverlap >= nperseg:
+        raise ValueError("noverlap must be less than nperseg")
+    if n_times < nperseg:
+        raise ValueError(f"data length {n_times} is shorter than nperseg={nperseg}")
+    dt = np.dtype(dtype)
+    win, win_pow = welch_window(window, nperseg, dt.str)
+    segs = segment_view(data.T, nperseg, nperseg - noverlap)
+    n_seg = segs.shape[1]
+    f = np.fft.rfftfreq(nperseg, 1.0 / sfreq)
+    acc = np.zeros((n_channels, f.size), dtype=dt)
+    for _, pxx in periodogram_blocks(segs, win, max_block_bytes):
+        acc += pxx.sum(axis=1)
+    acc *= density_scale(f.size, nperseg, sfreq, win_pow, dt) / n_seg
+    return f, acc  # (n_channels, n_freqs)
+
+def window_segment_plan(n_times: int, sfreq: float, nperseg: int, noverlap: int, window_sec: float, step_sec: float = None):
+    """Map (window_sec, step_sec) onto whole Welch segments.
+    Returns (seg_starts (n_windows,), segs_per_window, step_samples, win_samples). The step is rounded to
+    a multiple of the segment hop so that every window uses exactly the segments Welch would use on it."""
+    hop = nperseg - noverlap
+    win_samples = int(round(window_sec * sfreq))
+    if win_samples < nperseg:
+        raise ValueError(f"window_sec={window_sec} is shorter than one segment (nperseg={nperseg})")
+    step_sec = window_sec if step_sec is None else step_sec
+    step_segs = max(1, int(round(step_sec * sfreq / hop)))
+    per_win = (win_samples - nperseg) // hop + 1
+    n_seg = (n_times - nperseg) // hop + 1 if n_times >= nperseg else 0
+    n_win = (n_seg - per_win) // step_segs + 1 if n_seg >= per_win else 0
+    return np.arange(n_win) * step_segs, per_win, step_segs * hop, (per_win - 1) * hop + nperseg
+
+def compute_psd_welch_windows(data: np.ndarray, sfreq: float, nperseg: int = 1024, noverlap: Optional[int] = None, window: str = "hann",
+                              window_sec: float = 10.0, step_sec: float = None,
+                              dtype=np.float64, max_block_bytes: int = DEFAULT_BLOCK_BYTES):
+    """Time-resolved Welch PSD. Every FFT segment is computed once; each window's PSD is the difference of
+    two running sums over segment periodograms, so overlapping windows share their segments. The running sums are
+    float64 whatever ``dtype``, so late windows of long float32 recordings keep their precision.
+    Returns (times (n_windows,) window centres in s, freqs, psd_t (n_windows, n_channels, n_freqs),
+    psd (n_channels, n_freqs) over the whole recording, identical to compute_psd_welch)."""
+    if data.ndim != 2:
+        raise ValueError("data must be (n_times, n_channels)")
+    n_times, n_channels = data.shape
+    if noverlap is None:
+        noverlap = nperseg // 2
+    if noverlap >= nperseg:
+        raise ValueError("noverlap must be less than nperseg")
+    if n_times < nperseg:
+        raise ValueError(f"data length {n_times} is shorter than nperseg={nperseg}")
+    dt = np.dtype(dtype)
+    win, win_pow = welch_window(window, nperseg, dt.str)
+    hop = nperseg - noverlap
+    starts, per_win, step_samples, win_samples = window_segment_plan(n_times, sfreq, nperseg, noverlap, window_sec, step_sec)
+    segs = segment_view(data.T, nperseg, hop)
+    n_seg = segs.shape[1]
+    f = np.fft.rfftfreq(nperseg, 1.0 / sfreq)
+    # prefix-sum snapshots are needed at every window boundary
+    bounds = np.unique(np.concatenate([starts, starts + per_win]))
+    snap = np.zeros((bounds.size, n_channels, f.size))
+    running = np.zeros((n_channels, f.size))
+    bi = 0
+    while bi < bounds.size and bounds[bi] == 0:
+        bi += 1
+    for s0, pxx in periodogram_blocks(segs, win, max_block_bytes):
+        k = pxx.shape[1]
+        csum = np.cumsum(pxx, axis=1, dtype=np.float64)
+        csum += running[:, None, :]
+        while bi < bounds.size and bounds[bi] <= s0 + k:
+            snap[bi] = csum[:, bounds[bi] - s0 - 1]
+            bi += 1
+        running = csum[:, -1].copy()
+    scale = density_scale(f.size, nperseg, sfreq, win_pow, np.float64)
+    pos = np.searchsorted(bounds, starts)
+    end = np.searchsorted(bounds, starts + per_win)
+    psd_t = ((snap[end] - snap[pos]) * (scale / per_win)).astype(dt, copy=False)
+    psd = (running * (scale / n_seg)).astype(dt, copy=False)
+    times = (starts * hop + win_samples / 2.0) / sfreq
+    return times, f, psd_t, psd
+
+def compute_psd_welch_epochs(data: np.ndarray, sfreq: float, starts: np.ndarray, epoch_samples: int, nperseg: int = 1024,
+                             noverlap: Optional[int] = None, window: str = "hann",
+                             dtype=np.float64, max_block_bytes: int = DEFAULT_BLOCK_BYTES) -> Tuple[np.ndarray, np.ndarray]:
+    """Welch PSD of every epoch ``data[s:s + epoch_samples]`` (``s`` in ``starts``, in samples) as one batch.
+    The segments of a block of epochs are gathered as whole sample rows (contiguous in the (n_times, n_channels)
+    layout, unlike the strided per-channel view) and transformed with one rFFT, so epochs may overlap or be
+    irregularly spaced (event-locked). Each epoch equals compute_psd_welch on its samples.
+    Returns (freqs, psd (n_epochs, n_channels, n_freqs))."""
     if data.ndim != 2:
         raise ValueError("data must be (n_times, n_channels)")
     n_times, n_channels = data.shape
     if noverlap is None:
         noverlap = nperseg // 2
-    win = get_window(window, nperseg, fftbins=True)
-    psds = []
-    for ch in range(n_channels):
-        f, Pxx = welch(data[:, ch], fs=sfreq, nperseg=nperseg, noverlap=noverlap, window=win)
-        psds.append(Pxx)
-    psd = np.stack(psds, axis=0)  # (n_channels, n_freqs)
+    if noverlap >= nperseg:
+        raise ValueError("noverlap must be less than nperseg")
+    if epoch_samples < nperseg:
+        raise ValueError(f"epoch length {epoch_samples} is shorter than nperseg={nperseg}")
+    starts = np.asarray(starts, dtype=np.int64)
+    if starts.size and (starts.min() < 0 or starts.max() + epoch_samples > n_times):
+        raise ValueError("epochs must lie within the data")
+    from scipy import fft as sp_fft
+    dt = np.dtype(dtype)
+    win, win_pow = welch_window(window, nperseg, dt.str)
+    hop = nperseg - noverlap
+    n_seg = (epoch_samples - nperseg) // hop + 1
+    f = np.fft.rfftfreq(nperseg, 1.0 / sfreq)
+    seg_starts = (starts[:, None] + np.arange(n_seg) * hop).ravel()
+    k = max(1, min(max_block_bytes, EPOCH_BLOCK_BYTES) // (n_seg * n_channels * nperseg * dt.itemsize))
+    out = np.empty((starts.size, n_channels, f.size), dtype=dt)
+    for e0 in range(0, starts.size, k):
+        e1 = min(starts.size, e0 + k)
+        rows = seg_starts[e0 * n_seg:e1 * n_seg, None] + np.arange(nperseg)
+        blk = np.asarray(data[rows], dtype=dt).transpose(0, 2, 1).copy()  # (segments, n_channels, nperseg)
+        blk -= blk.mean(axis=-1, keepdims=True)
+        blk *= win
+        spec = sp_fft.rfft(blk, axis=-1)
+        out[e0:e1] = (spec.real ** 2 + spec.imag ** 2).reshape(e1 - e0, n_seg, n_channels, f.size).sum(axis=1)
+    out *= density_scale(f.size, nperseg, sfreq, win_pow, dt) / n_seg
+    return f, out
+
+PSD_METHODS = ("welch", "multitaper")
+
+def _mt_adaptive(S: np.ndarray, eigvals: np.ndarray, max_iter: int = 150) -> Tuple[np.ndarray, int]:
+    """Thomson's adaptive weighting for a block of signals at once. S: taper power spectra (n_sig, n_tapers, n_freqs),
+    DC/Nyquist already halved. Same iteration and per-signal stopping rule as mne's _psd_from_mt_adaptive.
+    Returns (one-sided psd before division by sfreq, number of signals that did not converge)."""
+    n_sig, n_tap, n_f = S.shape
+    lam = eigvals.astype(S.dtype)[None, :, None]
+    fixed = np.einsum("k,skf->sf", lam[0, :, 0], S) * (2.0 / lam.sum())
+    var = (np.sum(fixed, axis=-1) - 0.5 * (fixed[:, 0] + fixed[:, -1])) * (np.pi / n_f) / (2 * np.pi)  # trapezoid / 2 pi
+    var = var[:, None, None]
+    psd = np.einsum("k,skf->sf", lam[0, :2, 0], S[:, :2]) * (2.0 / lam[0, :2, 0].sum())
+    out = np.empty_like(psd)
+    err = np.zeros_like(S)
+    active = np.arange(n_sig)
+    for _ in range(max_iter):
+        p = psd[:, None, :]
+        d = p / (lam * p + (1.0 - lam) * var[active]) * np.sqrt(lam)
+        err -= d
+        conv = np.max(np.mean(err ** 2, axis=1), axis=-1) < 1e-10
+        if conv.any():
+            out[active[conv]] = psd[conv]
+            keep = ~conv
+            active, psd, d, S = active[keep], psd[keep], d[keep], S[keep]
+            if not active.size:
+                return out, 0
+        d2 = d * d
+        psd = 2.0 * np.einsum("skf,skf->sf", d2, S) / d2.sum(axis=1)
+        err = d
+    out[active] = psd
+    return out, int(active.size)
+
+def rebin_psd(freqs: np.ndarray, psd: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """Average a fine spectrum onto a coarser uniform grid: each output bin is the mean over the input bins whose
+    frequency rounds to it (band power is preserved). Raises ValueError if a target bin gets no input bin."""
+    df = target[1] - target[0]
+    idx = np.clip(np.rint(freqs / df).astype(np.intp), 0, target.size - 1)
+    starts = np.flatnonzero(np.r_[True, idx[1:] != idx[:-1]])
+    if starts.size != target.size:
+        raise ValueError(f"spectrum with {freqs.size} bins is too coarse for a {target.size}-bin grid")
+    counts = np.diff(np.r_[starts, idx.size])
+    out = np.zeros(psd.shape[:-1] + (target.size,), dtype=psd.dtype)
+    out[..., idx[starts]] = np.add.reduceat(psd, starts, axis=-1) / counts
+    return out
+
+def compute_psd_multitaper(data: np.ndarray, sfreq: float, bandwidth: Optional[float] = None, adaptive: bool = False,
+                           low_bias: bool = True, max_iter: int = 150, nperseg: Optional[int] = None,
+                           dtype=np.float64, max_block_bytes: int = DEFAULT_BLOCK_BYTES) -> Tuple[np.ndarray, np.ndarray]:
+    """Multitaper PSD density of each channel over the whole recording. data: (n_times, n_channels).
+    DPSS tapers come from tapers.dpss_tapers (cached per length and bandwidth). Channels and tapers are processed
+    in blocks whose tapered copies and spectra take at most ``max_block_bytes`` (down to one channel and taper for
+    long recordings); each block is transformed with one rFFT over (channels, tapers) and its weighted power summed
+    into the channel's accumulator. The adaptive weights need every taper's power spectrum of a channel at once.
+    Matches mne.time_frequency.psd_array_multitaper(x.T, sfreq, bandwidth=bandwidth,
+    adaptive=adaptive, normalization="full"). ``bandwidth`` is the full bandwidth in Hz (default 8 * sfreq / n_times).
+    With ``nperseg`` the spectrum is averaged onto the Welch grid rfftfreq(nperseg), so recordings of any
+    length (at least ``nperseg`` samples, as for Welch) share one frequency axis."""
+    from scipy import fft as sp_fft
+    from .tapers import dpss_tapers, half_bandwidth
+    if data.ndim != 2:
+        raise ValueError("data must be (n_times, n_channels)")
+    n_times, n_channels = data.shape
+    if nperseg is not None and n_times < nperseg:
+        raise ValueError(f"data length {n_times} is shorter than nperseg={nperseg}")
+    tapers, eigvals = dpss_tapers(n_times, half_bandwidth(n_times, sfreq, bandwidth), low_bias)
+    if adaptive and eigvals.size < 3:
+        adaptive = False  # as mne: too few tapers to weight adaptively
+    dt = np.dtype(dtype)
+    tap = tapers.astype(dt)
+    f = np.fft.rfftfreq(n_times, 1.0 / sfreq)
+    psd = np.empty((n_channels, f.size), dtype=dt)
+    edge = [0, -1] if n_times % 2 == 0 else [0]
+    n_tap = tap.shape[0]
+    per_taper = n_times * dt.itemsize + f.size * 2 * dt.itemsize  # one tapered copy and its spectrum
+    k_step = int(min(n_tap, max(1, int(max_block_bytes) // per_taper)))
+    per_ch = k_step * per_taper + (3 * n_tap if adaptive else 1) * f.size * dt.itemsize
+    step = max(1, int(max_block_bytes) // per_ch) if k_step == n_tap else 1
+    lam = eigvals.astype(dt)
+    n_bad = 0
+    for c0 in range(0, n_channels, step):
+        blk = data[:, c0:c0 + step].T.astype(dt, copy=True)
+        blk -= blk.mean(axis=-1, keepdims=True)
+        if adaptive and k_step < n_tap:
+            S = np.empty((blk.shape[0], n_tap, f.size), dtype=dt)
+        elif not adaptive:
+            acc = np.zeros((blk.shape[0], f.size), dtype=dt)
+        for k0 in range(0, n_tap, k_step):
+            spec = sp_fft.rfft(blk[:, None, :] * tap[k0:k0 + k_step], axis=-1)  # (ch, taper, f)
+            Sk = spec.real ** 2 + spec.imag ** 2
+            del spec
+            if adaptive and k_step == n_tap:
+                S = Sk
+            elif adaptive:
+                S[:, k0:k0 + k_step] = Sk
+            else:
+                acc += np.einsum("k,ckf->cf", lam[k0:k0 + k_step], Sk)
+        if adaptive:
+            S[..., edge] *= 0.5
+            p, bad = _mt_adaptive(S, eigvals, max_iter)
+            n_bad += bad
+        else:
+            acc[:, edge] *= 0.5
+            p = acc * (2.0 / eigvals.sum())
+        psd[c0:c0 + step] = p / sfreq
+    if n_bad:
+        import warnings
+        warnings.warn(f"Adaptive multitaper weights did not converge for {n_bad} channel(s)")
+    if nperseg is not None:
+        target = np.fft.rfftfreq(nperseg, 1.0 / sfreq)
+        return target, rebin_psd(f, psd, target)
     return f, psd
@@ -0,0 +1,94 @@
+"""PSD quality-control report for an analyze output folder (npz store or JSON files).
+
+One figure per subject x task, rendered by a process pool. Every worker builds one viz.PSDFigure when it starts
+and re-renders it for each figure, so figure creation and axis setup are paid once per process; the spectra are
+log-binned and drawn as one LineCollection. ``index.html`` lays the images out as a subject x task table.
+"""
+import os, html, json, time
+import numpy as np
+from typing import Any, Dict, Iterator, List, Tuple
+from .aggregate import list_outputs
+from .store import ResultStore
+
+REPORT_DIR = "report"
+INDEX_FILE = "index.html"
+_FIG = None  # per-process PSDFigure
+
+def _init_worker(fig_kw: Dict[str, Any]):
+    global _FIG
+    from .viz import PSDFigure
+    _FIG = PSDFigure(**fig_kw)
+
+def _iter_psds(out_dir: str, fmt: str, sid: str) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+    if fmt == "npz":
+        store = ResultStore(out_dir)
+        freqs, psd = store.load_psd(sid)
+        for i, task in enumerate(store.load_subject(sid, ["tasks"])["tasks"]):
+            yield str(task), freqs, np.asarray(psd[i], dtype=np.float64)
+        return
+    sdir = os.path.join(out_dir, "subjects", sid)
+    for fn in sorted(os.listdir(sdir)):
+        if fn.startswith("psd_") and fn.endswith(".json"):
+            with open(os.path.join(sdir, fn), "r", encoding="utf-8") as f:
+                d = json.load(f)
+            yield fn[len("psd_"):-5], np.asarray(d["freqs"]), np.asarray(d["psd"], dtype=np.float64)
+
+def _render_subjects(out_dir: str, fmt: str, subject_ids: List[str], report_dir: str, image_format: str) -> List[Tuple]:
+    """(sid, task, image file, n_channels, render seconds) for every task of ``subject_ids``."""
+    rows = []
+    for sid in subject_ids:
+        for task, freqs, psd in _iter_psds(out_dir, fmt, sid):
+            name = f"psd_{sid}_{task}.{image_format}"
+            t0 = time.perf_counter()
+            _FIG.render(freqs, psd, title=f"{sid} - {task}", out_path=os.path.join(report_dir, name))
+            rows.append((sid, task, name, int(psd.shape[0]), time.perf_counter() - t0))
+    return rows
+
+def write_index(path: str, rows: List[Tuple], title: str = "PSD report"):
+    """Subject x task table of the rendered images (each linked to the full-size file)."""
+    tasks = sorted({r[1] for r in rows})
+    cells: Dict[str, Dict[str, str]] = {}
+    for sid, task, name, *_ in rows:
+        cells.setdefault(sid, {})[task] = name
+    e = html.escape
+    out = [f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>{e(title)}</title>",
+           "<style>body{font-family:sans-serif}td,th{padding:4px;text-align:center}img{width:320px}</style></head><body>",
+           f"<h1>{e(title)}</h1><p>{len(cells)} subject(s), {len(rows)} figure(s)</p>",
+           "<table><tr><th>subject</th>" + "".join(f"<th>{e(t)}</th>" for t in tasks) + "</tr>"]
+    for sid in sorted(cells):
+        tds = "".join(f"<td><a href=\"{e(cells[sid][t])}\"><img src=\"{e(cells[sid][t])}\" loading=\"lazy\"></a></td>"
+                      if t in cells[sid] else "<td></td>" for t in tasks)
+        out.append(f"<tr><th>{e(sid)}</th>{tds}</tr>")
+    out.append("</table></body></html>\n")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+def render_report(out_dir: str, report_dir: str = None, max_workers: int = 4, image_format: str = "png",
+                  shard_size: int = None, **fig_kw) -> Dict[str, Any]:
+    """Render every stored PSD of ``out_dir`` to ``report_dir`` (default ``<out_dir>/report``) and write
+    ``index.html``. ``fig_kw`` go to viz.PSDFigure (figsize, dpi, n_points, fmax, cmap). Subjects are rendered
+    in shards by up to ``max_workers`` processes."""
+    fmt, sids = list_outputs(out_dir)
+    if not sids:
+        raise FileNotFoundError(f"No subject outputs under {out_dir}")
+    report_dir = report_dir or os.path.join(out_dir, REPORT_DIR)
+    os.makedirs(report_dir, exist_ok=True)
+    if shard_size is None:
+        shard_size = max(1, -(-len(sids) // (4 * max(1, max_workers))))
+    shards = [sids[i:i + shard_size] for i in range(0, len(sids), shard_size)]
+    t0 = time.perf_counter()
+    if max_workers > 1 and len(shards) > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(max_workers, len(shards)), initializer=_init_worker,
+                                                    initargs=(fig_kw,)) as ex:
+            parts = list(ex.map(_render_subjects, *zip(*[(out_dir, fmt, s, report_dir, image_format) for s in shards])))
+    else:
+        _init_worker(fig_kw)
+        parts = [_render_subjects(out_dir, fmt, s, report_dir, image_format) for s in shards]
+    rows = [r for part in parts for r in part]
+    index = os.path.join(report_dir, INDEX_FILE)
+    write_index(index, rows, title=f"PSD report - {os.path.basename(os.path.abspath(out_dir))}")
+    wall = time.perf_counter() - t0
+    return {"index": index, "figures": len(rows), "subjects": len(sids), "wall_s": wall,
+            "wall_per_figure_s": wall / max(1, len(rows)),
+            "render_per_figure_s": float(np.mean([r[4] for r in rows])) if rows else None}
@@ -0,0 +1,93 @@
+"""Anti-aliased downsampling before spectral estimation.
+
+All features stop at ``fmax`` (45 Hz), so recordings sampled at kHz rates are first brought down with a
+polyphase FIR (scipy.signal.resample_poly). The Kaiser low-pass only has to keep 0..fmax free of aliases:
+its stopband starts at ``sfreq_out - fmax`` (the lowest frequency that folds back below fmax), which gives a
+much shorter filter than a cut-off at the new Nyquist. PSD bins above fmax may therefore hold aliased power.
+Channels are filtered together, one cache-sized time chunk at a time.
+
+``nperseg`` and ``noverlap`` are rescaled with the rate, so the segment duration and the frequency resolution
+stay the same; the automatic target keeps the decimation factor a divisor of both so they stay exact.
+"""
+import numpy as np
+from dataclasses import dataclass, asdict
+from fractions import Fraction
+from typing import Dict, Optional, Union
+
+# New Nyquist must exceed the highest band edge by this factor in the automatic plan
+NYQUIST_MARGIN = 2.0
+STOPBAND_DB = 80.0
+CHUNK_SAMPLES = 8192  # input samples per chunk; (chunk, n_ch) blocks are transposed while they are in cache
+
+@dataclass(frozen=True)
+class ResamplePlan:
+    up: int
+    down: int
+    sfreq_in: float
+    sfreq: float
+    nperseg: int
+    noverlap: int
+    fmax: float
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+def plan_resample(sfreq: float, nperseg: int, noverlap: Optional[int], target: Union[float, str, None],
+                  fmax: float = 45.0) -> Optional[ResamplePlan]:
+    """Resampling for ``target`` ("auto", a rate in Hz or None). None if the data should stay as is.
+    "auto" picks the largest integer factor q dividing ``nperseg`` (and ``noverlap``) with
+    sfreq / q >= 2 * NYQUIST_MARGIN * fmax."""
+    if target is None:
+        return None
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    if isinstance(target, str) and target == "auto":
+        q_max = int(sfreq // (2 * NYQUIST_MARGIN * fmax))
+        q = next((q for q in range(q_max, 1, -1) if nperseg % q == 0 and noverlap % q == 0), 1)
+        if q < 2:
+            return None
+        return ResamplePlan(1, q, float(sfreq), sfreq / q, nperseg // q, noverlap // q, float(fmax))
+    target = float(target)
+    if target >= sfreq:
+        return None
+    if target <= 2 * fmax:
+        raise ValueError(f"target sfreq {target} Hz must exceed twice the highest band edge ({fmax} Hz)")
+    ratio = Fraction(target / sfreq).limit_denominator(1000)
+    up, down = ratio.numerator, ratio.denominator
+    new_nperseg = max(8, int(round(nperseg * up / down)))
+    new_noverlap = min(new_nperseg - 1, int(round(noverlap * up / down)))
+    return ResamplePlan(up, down, float(sfreq), sfreq * up / down, new_nperseg, new_noverlap, float(fmax))
+
+def antialias_fir(plan: ResamplePlan, atten_db: float = STOPBAND_DB) -> np.ndarray:
+    """Kaiser low-pass at the upsampled rate: passband to ``fmax``, ``atten_db`` down from ``sfreq - fmax``
+    (also rejects the images of an up > 1 plan)."""
+    from scipy.signal import firwin, kaiserord
+    fs = plan.sfreq_in * plan.up
+    f_pass, f_stop = plan.fmax, plan.sfreq - plan.fmax
+    n, beta = kaiserord(atten_db, (f_stop - f_pass) / (fs / 2))
+    return firwin(n | 1, (f_pass + f_stop) / 2, window=("kaiser", beta), fs=fs)
+
+def resample_chunked(data: np.ndarray, up: int, down: int, fir: Optional[np.ndarray] = None,
+                     chunk_samples: int = CHUNK_SAMPLES, dtype=np.float64) -> np.ndarray:
+    """resample_poly(data, up, down, axis=0, window=fir) for (n_times, n_channels); scipy's default filter if
+    ``fir`` is None. Works through time chunks that start on multiples of ``down`` and overlap by more than the
+    filter half length, so the result equals the single-call output."""
+    from scipy.signal import resample_poly
+    window = ("kaiser", 5.0) if fir is None else fir
+    n_times, n_ch = data.shape
+    n_out = -(-n_times * up // down)
+    half = (len(fir) // 2 if fir is not None else 10 * max(up, down)) // up + 1  # in input samples
+    pad = -(-half // down) * down
+    chunk = max(down, (int(chunk_samples) // down) * down)
+    out = np.empty((n_out, n_ch), dtype=dtype)
+    for a in range(0, n_times, chunk):
+        b = min(n_times, a + chunk)
+        lo, hi = max(0, a - pad), min(n_times, b + pad)
+        y = resample_poly(np.ascontiguousarray(data[lo:hi].T, dtype=dtype), up, down, axis=1, window=window)
+        o0, o1 = a * up // down, min(n_out, -(-b * up // down))
+        skip = (a - lo) * up // down
+        out[o0:o1] = y[:, skip:skip + o1 - o0].T
+    return out
+
+def apply_plan(data: np.ndarray, plan: ResamplePlan, dtype=np.float64) -> np.ndarray:
+    """Resample (n_times, n_channels) ``data`` according to ``plan``."""
+    return resample_chunked(data, plan.up, plan.down, antialias_fir(plan), dtype=dtype)
@@ -0,0 +1,175 @@
+"""Bounded-memory pipelined scheduler.
+
+Subjects are opened lazily, one at a time, only while the look-ahead window (queued + running tasks)
+has room, so the parent never holds more than ``lookahead_tasks`` tasks / ``lookahead_bytes`` of
+samples regardless of cohort size, and the first task starts as soon as the first subject is ready. With
+``prefetch`` the reading and decoding of the next subjects runs on threads while the pool computes; each read
+reserves its estimated bytes in the window until its tasks are admitted.
+"""
+import os
+import concurrent.futures
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from .formats import select_subject_files
+from .sources import TaskSource
+
+@dataclass
+class ScheduledTask:
+    subject: str
+    task: str
+    source: Any                      # TaskSource (or an in-memory array)
+    ch_names: List[str]
+    release: Optional[Callable[[], None]] = field(default=None, repr=False)  # frees parent-side memory
+
+    @property
+    def nbytes(self) -> int:
+        src = self.source
+        return src.nbytes if isinstance(src, TaskSource) else int(getattr(src, "nbytes", 0))
+
+def iter_subject_files(input_path: str) -> Iterator[str]:
+    """Yield subject files lazily. A folder is listed by name only (no stat, no parsing), in sorted
+    order with the same format precedence as utils.list_subject_jsons."""
+    if not os.path.isdir(input_path):
+        yield input_path
+        return
+    with os.scandir(input_path) as it:
+        names = [entry.name for entry in it]
+    for name in select_subject_files(names):
+        yield os.path.join(input_path, name)
+
+class LookaheadWindow:
+    """Admission control over queued + running tasks (plus reads in flight), by count and/or bytes."""
+    def __init__(self, max_tasks: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_tasks = max_tasks
+        self.max_bytes = max_bytes
+        self.tasks = 0
+        self.reads = 0
+        self.bytes = 0
+        self.peak_tasks = 0
+        self.peak_bytes = 0
+
+    def has_room(self) -> bool:
+        if self.tasks == 0 and self.reads == 0:
+            return True  # always admit something, even if one subject exceeds the budget
+        if self.max_tasks is not None and self.tasks >= self.max_tasks:
+            return False
+        if self.max_bytes is not None and self.bytes >= self.max_bytes:
+            return False
+        return True
+
+    def add(self, t: ScheduledTask):
+        self.tasks += 1
+        self.bytes += t.nbytes
+        self.peak_tasks = max(self.peak_tasks, self.tasks)
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def remove(self, t: ScheduledTask):
+        self.tasks -= 1
+        self.bytes -= t.nbytes
+
+    def reserve(self, nbytes: int):
+        """Count a subject read in flight (its estimated bytes) until ``unreserve``."""
+        self.reads += 1
+        self.bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.bytes)
+
+    def unreserve(self, nbytes: int):
+        self.reads -= 1
+        self.bytes -= nbytes
+
+def run_pipeline(executor, subjects: Iterator[str],
+                 load_subject: Callable[[str], List[ScheduledTask]],
+                 submit: Callable[[Any, ScheduledTask], concurrent.futures.Future],
+                 on_done: Callable[[ScheduledTask, Dict[str, Any]], None],
+                 max_running: int, window: LookaheadWindow,
+                 on_progress: Optional[Callable[[int, int, bool], None]] = None,
+                 read_subject: Optional[Callable[[str], Any]] = None, prefetch: int = 0,
+                 read_bytes: Optional[Callable[[str], int]] = None,
+                 discard_read: Optional[Callable[[Any], None]] = None) -> int:
+    """Drive the pipeline until all subjects are enumerated and all tasks have finished.
+    ``load_subject`` returns the tasks of one subject file (raise to skip it), ``submit`` starts one task,
+    ``on_done`` receives each task with its result dict (a synthetic failure dict if the worker crashed),
+    ``on_progress(done, discovered, exhausted)`` is called after every completion. Returns tasks completed.
+    With ``read_subject``, ``load_subject(path, read)`` is called instead, where ``read()`` returns
+    ``read_subject(path)`` (file I/O and decoding) or raises its error. With ``prefetch`` > 0 those reads run
+    on ``prefetch`` threads for up to ``prefetch`` upcoming subjects, started while the window has room, and
+    are handed to ``load_subject`` in subject order; finished tasks keep being collected meanwhile. Each
+    prefetch reserves ``read_bytes(path)`` (default 0) in ``window`` until its tasks are admitted. If the run
+    aborts, reads that already finished are passed to ``discard_read`` instead of ``load_subject``."""
+    pending = deque()
+    running = {}
+    reads = deque()  # (path, future, reserved bytes) in subject order
+    pool = (concurrent.futures.ThreadPoolExecutor(prefetch, thread_name_prefix="eegspec-prefetch")
+            if read_subject is not None and prefetch > 0 else None)
+    subjects = iter(subjects)
+    exhausted = False
+    done = discovered = 0
+
+    def admit(tasks):
+        nonlocal discovered
+        for t in tasks:
+            window.add(t)
+            pending.append(t)
+            discovered += 1
+
+    try:
+        while True:
+            while not exhausted and window.has_room() and (pool is None or len(reads) < prefetch):
+                try:
+                    spath = next(subjects)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if pool is not None:
+                    est = read_bytes(spath) if read_bytes is not None else 0
+                    window.reserve(est)
+                    reads.append((spath, pool.submit(read_subject, spath), est))
+                elif read_subject is not None:
+                    admit(load_subject(spath, lambda spath=spath: read_subject(spath)))
+                else:
+                    admit(load_subject(spath))
+            while reads and reads[0][1].done():
+                spath, fut, est = reads.popleft()
+                window.unreserve(est)
+                admit(load_subject(spath, fut.result))
+            while pending and len(running) < max_running:
+                t = pending.popleft()
+                running[submit(executor, t)] = t
+            if not running and not reads:
+                if exhausted and not pending:
+                    return done
+                continue
+            waiting = list(running) + ([reads[0][1]] if reads else [])
+            finished, _ = concurrent.futures.wait(waiting, return_when=concurrent.futures.FIRST_COMPLETED)
+            for fut in finished:
+                if fut not in running:
+                    continue  # a prefetched subject is ready; admitted at the top of the loop
+                t = running.pop(fut)
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    res = {"ok": False, "subject": t.subject, "task": t.task, "error": f"Worker crashed: {e}"}
+                if t.release is not None:
+                    t.release()
+                window.remove(t)
+                done += 1
+                on_done(t, res)
+                if on_progress is not None:
+                    on_progress(done, discovered, exhausted)
+    finally:
+        if pool is not None:
+            for spath, fut, est in reads:  # aborted run: free what the finished reads hold, without loading them
+                window.unreserve(est)
+                if fut.cancel():
+                    continue
+                try:
+                    data = fut.result()
+                except Exception:
+                    continue
+                if discard_read is not None:
+                    discard_read(data)
+            pool.shutdown(wait=True)
+        for t in list(pending) + list(running.values()):
+            if t.release is not None:
+                t.release()
@@ -0,0 +1,231 @@
+"""Running one cohort on several hosts that share a filesystem.
+
+Static partitioning: ``--shard i/N`` keeps every N-th subject file of the sorted listing, starting at ``i``
+(0-based), so N independent processes cover the folder exactly once.
+
+Dynamic partitioning: ``--work-queue DIR`` makes each process claim a subject just before loading it by
+creating ``DIR/leases/<sid>.lease`` with O_CREAT|O_EXCL (atomic on local filesystems and NFSv3+). A heartbeat
+thread refreshes the mtime of every lease the process holds; a lease whose mtime is older than
+``lease_timeout`` (compared with the filesystem's own clock, not the host's) belongs to a dead process and is
+taken over by renaming it away first - only one process wins the rename. A subject whose tasks all succeeded
+and were written gets ``DIR/done/<sid>.json`` and is never claimed again; a failed one only has its lease
+released, so re-running the same command resumes an interrupted run and retries the failures. In the rare
+race where two processes analyze the same subject, the duplicate outputs are identical and written atomically.
+
+Each process writes ``summary_<tag>.json``; ``merge_summaries`` (``eegspec merge``) combines them.
+"""
+import os, json, glob, socket, threading, time, uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .utils import subject_id_from_path, save_json
+
+DEFAULT_LEASE_TIMEOUT = 600.0
+SUMMARY_FILE = "summary.json"
+# Run settings that must agree between shards being merged
+_SETTINGS = ("alpha", "sfreq", "nperseg", "window", "output_format", "window_sec", "step_sec",
+             "connectivity", "conn_epoch_sec", "individual_bands", "psd_method", "mt_bandwidth", "mt_adaptive", "resample",
+             "epochs")
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N) with 0 <= i < N."""
+    try:
+        i, n = (int(x) for x in str(spec).split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like 'i/N' (e.g. 0/4), got {spec!r}") from None
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"Shard index must satisfy 0 <= i < N, got {spec!r}")
+    return i, n
+
+def shard_filter(paths: Iterable[str], index: int, count: int) -> Iterator[str]:
+    for k, p in enumerate(paths):
+        if k % count == index:
+            yield p
+
+def shard_tag(shard: Optional[Tuple[int, int]] = None, queue: Optional["WorkQueue"] = None) -> Optional[str]:
+    parts = []
+    if shard is not None:
+        parts.append(f"shard{shard[0]}of{shard[1]}")
+    if queue is not None:
+        parts.append(queue.owner_tag)
+    return "_".join(parts) or None
+
+def _write_json_atomic(path: str, obj: Any):
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+class WorkQueue:
+    """Lease-based subject queue in a shared directory. Use as a context manager (runs the heartbeat)."""
+    def __init__(self, directory: str, lease_timeout: float = DEFAULT_LEASE_TIMEOUT, owner: Optional[str] = None):
+        self.dir = directory
+        self.lease_timeout = float(lease_timeout)
+        host = socket.gethostname().split(".")[0] or "host"
+        self.owner = owner or f"{host}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.owner_tag = self.owner.replace(":", "-")
+        self.leases_dir = os.path.join(directory, "leases")
+        self.done_dir = os.path.join(directory, "done")
+        os.makedirs(self.leases_dir, exist_ok=True)
+        os.makedirs(self.done_dir, exist_ok=True)
+        self.held: Dict[str, str] = {}        # sid -> lease path
+        self.reclaimed: List[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _lease(self, sid: str) -> str:
+        return os.path.join(self.leases_dir, sid + ".lease")
+
+    def _done(self, sid: str) -> str:
+        return os.path.join(self.done_dir, sid + ".json")
+
+    def fs_now(self) -> float:
+        """Current time on the shared filesystem (mtime of a file we just touched)."""
+        p = os.path.join(self.dir, f".clock-{self.owner_tag}")
+        with open(p, "a"):
+            pass
+        os.utime(p, None)
+        return os.stat(p).st_mtime
+
+    def _create(self, sid: str) -> bool:
+        try:
+            fd = os.open(self._lease(sid), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"owner": self.owner, "claimed_at": time.time()}))
+        with self._lock:
+            self.held[sid] = self._lease(sid)
+        return True
+
+    def _owner_of(self, path: str) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.loads(f.read() or "{}").get("owner")
+        except (OSError, ValueError):
+            return None
+
+    def claim(self, sid: str) -> bool:
+        """Take the lease of ``sid``; False if it is done or leased by a live process."""
+        if os.path.exists(self._done(sid)):
+            return False
+        if self._create(sid):
+            return True
+        lease = self._lease(sid)
+        try:
+            st = os.stat(lease)
+        except FileNotFoundError:
+            return self._create(sid)
+        if self.fs_now() - st.st_mtime <= self.lease_timeout:
+            return False
+        stale_owner = self._owner_of(lease)
+        grave = f"{lease}.stale-{self.owner_tag}"
+        try:
+            os.rename(lease, grave)
+        except FileNotFoundError:
+            return False  # another process took it over first
+        if self._owner_of(grave) != stale_owner:
+            # Lost a race: we moved a lease that was re-created in between. Put it back unless replaced again.
+            try:
+                os.link(grave, lease)
+            except OSError:
+                pass
+            os.unlink(grave)
+            return False
+        os.unlink(grave)
+        if os.path.exists(self._done(sid)) or not self._create(sid):
+            return False
+        self.reclaimed.append(sid)
+        return True
+
+    def claim_iter(self, paths: Iterable[str]) -> Iterator[str]:
+        """Yield the subject files this process claimed, claiming each one only when it is requested."""
+        for p in paths:
+            if self.claim(subject_id_from_path(p)):
+                yield p
+
+    def complete(self, sid: str, **info):
+        """Mark ``sid`` done and drop its lease."""
+        _write_json_atomic(self._done(sid), dict(info, owner=self.owner, finished_at=time.time()))
+        self.release(sid)
+
+    def release(self, sid: str):
+        with self._lock:
+            path = self.held.pop(sid, None)
+        if path is not None and self._owner_of(path) == self.owner:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def heartbeat(self):
+        with self._lock:
+            paths = list(self.held.values())
+        for p in paths:
+            try:
+                os.utime(p, None)
+            except FileNotFoundError:
+                pass
+
+    def _beat(self):
+        while not self._stop.wait(max(0.05, self.lease_timeout / 4)):
+            self.heartbeat()
+
+    def status(self) -> Dict[str, int]:
+        done = sum(1 for n in os.listdir(self.done_dir) if n.endswith(".json"))
+        leased = sum(1 for n in os.listdir(self.leases_dir) if n.endswith(".lease"))
+        return {"done": done, "leased": leased}
+
+    def __enter__(self) -> "WorkQueue":
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._beat, name="eegspec-lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for sid in list(self.held):  # unfinished subjects (errors, interrupt) become claimable at once
+            self.release(sid)
+        try:
+            os.unlink(os.path.join(self.dir, f".clock-{self.owner_tag}"))
+        except FileNotFoundError:
+            pass
+
+def merge_summaries(out_dir: str, path: Optional[str] = None) -> Dict[str, Any]:
+    """Combine every ``summary_<tag>.json`` under ``out_dir`` into one summary (written to ``summary.json``).
+    Settings must agree; run counters are summed, subjects united (``duplicates`` lists subjects that more
+    than one shard reported)."""
+    files = sorted(f for f in glob.glob(os.path.join(out_dir, "summary_*.json")))
+    if not files:
+        raise FileNotFoundError(f"No shard summaries (summary_*.json) under {out_dir}")
+    merged: Dict[str, Any] = {"subjects": {}, "shards": [], "duplicates": []}
+    run: Dict[str, int] = {}
+    cache: Dict[str, Any] = {}
+    for fn in files:
+        with open(fn, "r", encoding="utf-8") as f:
+            s = json.load(f)
+        for k in _SETTINGS:
+            if k in merged and merged[k] != s.get(k):
+                raise ValueError(f"Shard {os.path.basename(fn)} was run with {k}={s.get(k)!r}, others with {merged[k]!r}")
+            merged[k] = s.get(k)
+        for sid, tasks in s.get("subjects", {}).items():
+            if sid in merged["subjects"]:
+                merged["duplicates"].append(sid)
+            merged["subjects"].setdefault(sid, {}).update(tasks)
+        for k, v in s.get("run", {}).items():
+            run[k] = max(run.get(k, 0), v) if k.startswith("peak_") else run.get(k, 0) + v
+        for k, v in s.get("cache", {}).items():
+            if isinstance(v, bool):
+                cache[k] = cache.get(k, False) or v
+            elif isinstance(v, (int, float)):
+                cache[k] = cache.get(k, 0) + v
+            else:
+                cache.setdefault(k, v)
+        merged["shards"].append({"summary": os.path.basename(fn), "shard": s.get("shard"), "run": s.get("run", {})})
+    merged["run"] = run
+    if cache:
+        merged["cache"] = cache
+    save_json(merged, path or os.path.join(out_dir, SUMMARY_FILE))
+    return merged
@@ -0,0 +1,109 @@
+"""Picklable task descriptors handed to worker processes instead of the recordings themselves.
+
+Binary subjects are described by (path, task) and memory-mapped by the worker. JSON subjects must be
+parsed by the parent, so their samples are placed in ``multiprocessing.shared_memory`` and the
+descriptor carries only the segment name, shape and dtype.
+"""
+import os, sys, threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+import numpy as np
+from .formats import subject_task_layout, iter_subject_tasks_json
+from .utils import load_subject_tasks
+
+@dataclass(frozen=True)
+class TaskSource:
+    path: str
+    task: str
+    shape: Tuple[int, int]            # (n_channels, n_times)
+    dtype: str = "float64"
+    shm_name: Optional[str] = None    # set when the parent holds the data in shared memory
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape)) * np.dtype(self.dtype).itemsize
+
+@contextmanager
+def open_task(src) -> np.ndarray:
+    """Yield the task data as (n_times, n_channels). Accepts a TaskSource or a plain array."""
+    if not isinstance(src, TaskSource):
+        yield src
+        return
+    if src.shm_name is None:
+        yield load_subject_tasks(src.path, tasks=[src.task])[src.task]
+        return
+    shm = attach_shared(src.shm_name)
+    try:
+        arr = np.ndarray(src.shape, dtype=src.dtype, buffer=shm.buf)
+        yield arr.T
+        del arr
+    finally:
+        shm.close()
+
+def share_task(path: str, task: str, data_txc: np.ndarray) -> Tuple[TaskSource, shared_memory.SharedMemory]:
+    """Copy (n_times, n_channels) data into a new shared-memory segment (stored channel-major).
+    The caller owns the returned segment and must close() and unlink() it once the task is done."""
+    data_cxt = data_txc.T
+    shm = shared_memory.SharedMemory(create=True, size=max(1, data_cxt.nbytes))
+    dst = np.ndarray(data_cxt.shape, dtype=data_cxt.dtype, buffer=shm.buf)
+    dst[...] = data_cxt
+    del dst
+    return TaskSource(path, task, tuple(data_cxt.shape), data_cxt.dtype.str, shm.name), shm
+
+_ATTACH_LOCK = threading.Lock()
+
+def attach_shared(name: str) -> shared_memory.SharedMemory:
+    """Attach to a segment another process owns without registering it with a resource tracker. The owner
+    unlinks it; a worker that started its own tracker (fork before the parent's existed) would otherwise get
+    "leaked shared_memory" warnings and the segment unlinked at exit. Before Python 3.13 (no ``track=False``)
+    registration is skipped rather than undone afterwards: a spawned worker shares the parent's tracker, and
+    unregistering there would drop the owner's own entry."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    with _ATTACH_LOCK:
+        register, resource_tracker.register = resource_tracker.register, lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+def release_shared(shm: shared_memory.SharedMemory):
+    try:
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+def shared_bytes_estimate(path: str) -> int:
+    """Shared memory ``describe_subject(path)`` will hold, known before reading: 0 for binary formats (workers
+    memory-map them), the file size for JSON. Full-precision sample text takes about 20 characters per 8-byte
+    value, so the estimate errs on the high side."""
+    if os.path.splitext(path)[1].lower() != ".json":
+        return 0
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def release_subject(described: Tuple[Dict[str, TaskSource], Dict[str, shared_memory.SharedMemory]]):
+    """Free the segments of a ``describe_subject`` result that will not be scheduled."""
+    for shm in described[1].values():
+        release_shared(shm)
+
+def describe_subject(path: str) -> Tuple[Dict[str, TaskSource], Dict[str, shared_memory.SharedMemory]]:
+    """Build descriptors for every task of a subject file.
+    Returns (task -> TaskSource, task -> SharedMemory segments the caller must release)."""
+    layout = subject_task_layout(path)
+    if layout is not None:
+        return {t: TaskSource(os.path.abspath(path), t, shp, dt) for t, (shp, dt) in layout.items()}, {}
+    sources, segments = {}, {}
+    try:
+        for t, data_cxt in iter_subject_tasks_json(path):  # one parsed task alive at a time
+            sources[t], segments[t] = share_task(path, t, data_cxt.T)
+    except Exception:
+        for shm in segments.values():
+            release_shared(shm)
+        raise
+    return sources, segments
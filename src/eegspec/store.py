@@ -0,0 +1,242 @@
+"""Compact binary result store.
+
+One uncompressed ``subjects/<sid>.npz`` per subject holds
+- ``tasks`` (n_tasks,), ``channels`` (n_ch,), ``freqs`` (n_freqs,)
+- ``psd``: float32 (n_tasks, n_ch, n_freqs)
+- ``feature_names`` (n_feat,) and ``features``: float32 (n_tasks, n_ch, n_feat)
+- ``faa``: (n_tasks,) and ``alpha_band`` (2,)
+- time-resolved mode only, per task: ``tfr/<task>/times`` (n_windows,),
+  ``tfr/<task>/features`` float32 (n_windows, n_ch, n_feat) and ``tfr/<task>/faa`` (n_windows,)
+- epoched mode only, per task: ``epochs/<task>/onsets`` (n_epochs,) epoch starts in s, ``epochs/<task>/index``
+  (position in the onset list / fixed grid), ``epochs/<task>/keep`` bool, ``epochs/<task>/features`` float32
+  (n_epochs, n_ch, n_feat) and ``epochs/<task>/faa`` (n_epochs,)
+- connectivity stage only: ``conn_bands`` (n_bands,) and per task and method
+  ``conn/<task>/<method>`` float32 (n_bands, n_ch, n_ch)
+
+Stacked over subjects the ``features`` cubes form the subject x task x channel x feature table.
+Members are stored uncompressed so ``ResultStore`` can memory-map single members.
+"""
+import os, uuid, zipfile, collections
+import numpy as np
+from typing import Dict, Any, List, Tuple, Optional
+from .formats import npz_member_memmap
+
+OUTPUT_FORMATS = ("npz", "json")
+MOMENT_NAMES = ("centroid", "variance", "skewness", "kurtosis")
+EPOCH_MEMBERS = ("onsets", "index", "keep", "features", "faa")
+
+def metrics_feature_table(metrics: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+    """Flatten a per-channel metrics dict into (feature_names, (..., n_ch, n_feat) float32).
+    Values may be lists or arrays with leading axes (e.g. (n_windows, n_ch) from FeatureEngine)."""
+    names, cols = [], []
+    for kind, key in (("abs", "bands_abs"), ("rel", "bands_rel")):
+        for band, v in metrics[key].items():
+            names.append(f"{kind}_{band}")
+            cols.append(v)
+    names.append("entropy"); cols.append(metrics["entropy"])
+    for k in MOMENT_NAMES:
+        names.append(k); cols.append(metrics["moments"][k])
+    for k in ("SEF95", "F50"):
+        names.append(k); cols.append(metrics[k])
+    if "IAF" in metrics:
+        for k in ("peak", "cog"):
+            names.append(f"iaf_{k}"); cols.append(metrics["IAF"][k])
+    return names, np.stack([np.asarray(c, dtype=np.float32) for c in cols], axis=-1)
+
+def subject_store_path(out_dir: str, subject_id: str) -> str:
+    return os.path.join(out_dir, "subjects", f"{subject_id}.npz")
+
+def write_subject_npz(path: str, task_results: List[Dict[str, Any]], ch_names: List[str]):
+    """Write the collected per-task payloads of one subject (in task order) to a single .npz."""
+    tasks = [r["task"] for r in task_results]
+    feature_names = task_results[0]["feature_names"]
+    arrays = {
+        "tasks": np.array(tasks),
+        "channels": np.array(list(ch_names)),
+        "freqs": np.asarray(task_results[0]["freqs"], dtype=np.float64),
+        "psd": np.stack([np.asarray(r["psd"], dtype=np.float32) for r in task_results], axis=0),
+        "feature_names": np.array(feature_names),
+        "features": np.stack([np.asarray(r["features"], dtype=np.float32) for r in task_results], axis=0),
+        "faa": np.array([r["faa"] for r in task_results], dtype=np.float64),
+        "alpha_band": np.asarray(task_results[0]["alpha_band"], dtype=np.float64),
+    }
+    for r in task_results:
+        if r.get("tfr") is not None:
+            for k in ("times", "features", "faa"):
+                arrays[f"tfr/{r['task']}/{k}"] = r["tfr"][k]
+        if r.get("epochs") is not None:
+            for k in EPOCH_MEMBERS:
+                arrays[f"epochs/{r['task']}/{k}"] = r["epochs"][k]
+        if r.get("conn") is not None:
+            arrays["conn_bands"] = r["conn"]["bands"]
+            for m, v in r["conn"].items():
+                if m != "bands":
+                    arrays[f"conn/{r['task']}/{m}"] = v
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"  # unique: several processes may write the same subject
+    try:
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+class NpzResultWriter:
+    """Parent-side writer: buffers task payloads per subject and writes the subject's .npz once all
+    of its scheduled tasks have reported (failed tasks count as reported). With ``background`` (a
+    writeback.BackgroundWriter) the file is written on its thread and the path is returned at once.
+    Every flushed subject ends up in ``pop_finished`` as (subject, path, error): path None if no task
+    succeeded, error None once the file exists."""
+    def __init__(self, out_dir: str, background=None):
+        self.out_dir = out_dir
+        self.background = background
+        self._finished: "collections.deque" = collections.deque()  # appended by the writer thread
+        self._expected: Dict[str, int] = {}
+        self._seen: Dict[str, int] = {}
+        self._results: Dict[str, List[Dict[str, Any]]] = {}
+        self._order: Dict[str, List[str]] = {}
+        self._channels: Dict[str, List[str]] = {}
+
+    def expect(self, subject_id: str, task_names: List[str], ch_names: List[str]):
+        self._expected[subject_id] = self._expected.get(subject_id, 0) + len(task_names)
+        self._order.setdefault(subject_id, []).extend(task_names)
+        self._channels[subject_id] = list(ch_names)
+
+    def add(self, subject_id: str, payload: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Record one finished task (``None`` for a failure). Returns the .npz path once the subject is flushed."""
+        if payload is not None:
+            self._results.setdefault(subject_id, []).append(payload)
+        self._seen[subject_id] = self._seen.get(subject_id, 0) + 1
+        if self._seen[subject_id] >= self._expected.get(subject_id, 0):
+            return self.flush(subject_id)
+        return None
+
+    def flush(self, subject_id: str) -> Optional[str]:
+        results = self._results.pop(subject_id, [])
+        order = self._order.pop(subject_id, [])
+        ch_names = self._channels.pop(subject_id, [])
+        self._expected.pop(subject_id, None); self._seen.pop(subject_id, None)
+        if not results:
+            self._finished.append((subject_id, None, None))
+            return None
+        rank = {t: i for i, t in enumerate(order)}
+        results.sort(key=lambda r: rank.get(r["task"], len(rank)))
+        path = subject_store_path(self.out_dir, subject_id)
+        done = lambda err: self._finished.append((subject_id, path, err))
+        if self.background is not None:
+            self.background.submit(write_subject_npz, path, results, ch_names, label=os.path.basename(path), callback=done)
+        else:
+            try:
+                write_subject_npz(path, results, ch_names)
+            except Exception as e:
+                done(e)
+            else:
+                done(None)
+        return path
+
+    def pop_finished(self) -> List[Tuple[str, Optional[str], Optional[BaseException]]]:
+        """(subject, path, error) of every subject whose write has finished since the last call."""
+        out = []
+        while self._finished:
+            out.append(self._finished.popleft())
+        return out
+
+    def close(self) -> List[str]:
+        """Write any subjects still pending (e.g. a run aborted mid-subject)."""
+        return [p for p in (self.flush(sid) for sid in list(self._expected)) if p]
+
+class ResultStore:
+    """Lazy reader over an output folder written with the npz backend.
+    Members are memory-mapped, so reading one feature touches only that slice of each file."""
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.subjects_dir = os.path.join(out_dir, "subjects")
+
+    def subjects(self) -> List[str]:
+        if not os.path.isdir(self.subjects_dir):
+            return []
+        return sorted(x[:-4] for x in os.listdir(self.subjects_dir) if x.endswith(".npz"))
+
+    def _member(self, subject_id: str, name: str) -> np.ndarray:
+        path = subject_store_path(self.out_dir, subject_id)
+        with zipfile.ZipFile(path) as zf:
+            info = zf.getinfo(name + ".npy")
+            arr = npz_member_memmap(path, info)
+            if arr is None:
+                with zf.open(info) as fh:
+                    arr = np.lib.format.read_array(fh)
+        return arr
+
+    def load_subject(self, subject_id: str, members=None) -> Dict[str, np.ndarray]:
+        """Return the subject's arrays (all members, or only ``members``)."""
+        if members is None:
+            with zipfile.ZipFile(subject_store_path(self.out_dir, subject_id)) as zf:
+                members = [n[:-4] for n in zf.namelist() if n.endswith(".npy")]
+        return {m: self._member(subject_id, m) for m in members}
+
+    def load_psd(self, subject_id: str, task: Optional[str] = None):
+        """(freqs, psd) for all tasks (n_tasks, n_ch, n_freqs) or one task (n_ch, n_freqs)."""
+        psd = self._member(subject_id, "psd")
+        freqs = np.asarray(self._member(subject_id, "freqs"))
+        if task is None:
+            return freqs, psd
+        tasks = list(self._member(subject_id, "tasks"))
+        return freqs, psd[tasks.index(task)]
+
+    def load_tfr(self, subject_id: str, task: str) -> Dict[str, np.ndarray]:
+        """Time-resolved features of one task: times (n_windows,), features (n_windows, n_ch, n_feat), faa, feature_names."""
+        out = {k: self._member(subject_id, f"tfr/{task}/{k}") for k in ("times", "features", "faa")}
+        out["feature_names"] = self._member(subject_id, "feature_names")
+        return out
+
+    def load_epochs(self, subject_id: str, task: str, kept_only: bool = False) -> Dict[str, np.ndarray]:
+        """Per-epoch features of one task: onsets, index, keep, features (n_epochs, n_ch, n_feat), faa, feature_names.
+        ``kept_only`` drops the rejected epochs."""
+        out = {k: self._member(subject_id, f"epochs/{task}/{k}") for k in EPOCH_MEMBERS}
+        if kept_only:
+            keep = np.asarray(out["keep"])
+            out = {k: np.asarray(v)[keep] for k, v in out.items()}
+        out["feature_names"] = self._member(subject_id, "feature_names")
+        return out
+
+    def load_connectivity(self, subject_id: str, task: str, methods=None) -> Dict[str, np.ndarray]:
+        """method -> (n_bands, n_ch, n_ch) connectivity of one task, plus ``bands`` and ``channels``."""
+        if methods is None:
+            prefix = f"conn/{task}/"
+            with zipfile.ZipFile(subject_store_path(self.out_dir, subject_id)) as zf:
+                methods = [n[len(prefix):-4] for n in zf.namelist() if n.startswith(prefix)]
+        out = {m: self._member(subject_id, f"conn/{task}/{m}") for m in methods}
+        out["bands"] = self._member(subject_id, "conn_bands")
+        out["channels"] = self._member(subject_id, "channels")
+        return out
+
+    def load_feature(self, feature: str, subjects=None) -> Dict[str, np.ndarray]:
+        """subject -> (n_tasks, n_ch) array of one feature; only that column is read from each file."""
+        out = {}
+        for sid in (self.subjects() if subjects is None else subjects):
+            names = list(self._member(sid, "feature_names"))
+            if feature not in names:
+                raise KeyError(f"Unknown feature '{feature}' for subject {sid}")
+            out[sid] = np.array(self._member(sid, "features")[:, :, names.index(feature)])
+        return out
+
+    def to_columns(self, features=None, subjects=None) -> Dict[str, np.ndarray]:
+        """Long-format columns (subject, task, channel, feature, value) for the selected features."""
+        cols = {k: [] for k in ("subject", "task", "channel", "feature", "value")}
+        for sid in (self.subjects() if subjects is None else subjects):
+            d = self.load_subject(sid, ["tasks", "channels", "feature_names", "features"])
+            names = list(d["feature_names"])
+            sel = names if features is None else [f for f in features if f in names]
+            idx = [names.index(f) for f in sel]
+            cube = np.asarray(d["features"][:, :, idx])  # (task, ch, feat)
+            nt, nc, nf = cube.shape
+            cols["subject"].append(np.full(nt * nc * nf, sid))
+            cols["task"].append(np.repeat(d["tasks"], nc * nf))
+            cols["channel"].append(np.tile(np.repeat(d["channels"], nf), nt))
+            cols["feature"].append(np.tile(np.array(sel), nt * nc))
+            cols["value"].append(cube.reshape(-1))
+        return {k: (np.concatenate(v) if v else np.array([])) for k, v in cols.items()}
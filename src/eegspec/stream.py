@@ -0,0 +1,229 @@
+"""Online streaming analyzer for live EEG feeds.
+
+Samples arrive as little-endian float32 frames, sample-major (``n_channels`` values per sample), on stdin
+or a local TCP socket. They are written into a preallocated ring buffer; each time a Welch segment
+completes it is transformed once and added to a sliding average of the last ``avg_segments`` periodograms
+(a preallocated ring of spectra with a running sum). Features come from the same FeatureEngine / FAA
+definitions as the offline pipeline.
+"""
+import json, socket, sys, time
+from collections import deque
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+from .features import FeatureEngine, TOTAL_RANGE, std_bands
+from .psd import welch_window, density_scale
+
+FRAME_DTYPE = np.dtype("<f4")
+# NumPy >= 2.0 can write the rFFT into a preallocated array; older versions fall back to scipy.fft.rfft.
+_RFFT_OUT = np.lib.NumpyVersion(np.__version__) >= "2.0.0"
+
+class OnlineWelch:
+    """Incremental Welch PSD over a ring buffer. Buffers (including the rFFT output) are allocated once in __init__."""
+    def __init__(self, n_channels: int, sfreq: float, nperseg: int = 512, noverlap: Optional[int] = None,
+                 window="hann", avg_segments: int = 8, dtype=np.float64):
+        if noverlap is None:
+            noverlap = nperseg // 2
+        if noverlap >= nperseg:
+            raise ValueError("noverlap must be less than nperseg")
+        self.n_channels, self.sfreq, self.nperseg = n_channels, float(sfreq), nperseg
+        self.hop = nperseg - noverlap
+        self.avg_segments = int(avg_segments)
+        dt = np.dtype(dtype)
+        self._win, win_pow = welch_window(window, nperseg, dt.str)
+        if not _RFFT_OUT:
+            from scipy import fft as sp_fft
+            self._rfft = sp_fft.rfft
+        self.freqs = np.fft.rfftfreq(nperseg, 1.0 / sfreq)
+        self._scale = density_scale(self.freqs.size, nperseg, sfreq, win_pow, dt)
+        self._ring = np.zeros((n_channels, nperseg), dtype=dt)     # last nperseg samples
+        self._seg = np.zeros((n_channels, nperseg), dtype=dt)      # unrolled segment
+        self._spec = np.zeros((n_channels, self.freqs.size), dtype=np.result_type(dt, np.complex64))
+        self._sq = np.zeros((n_channels, self.freqs.size), dtype=dt)  # squared imaginary part
+        self._spectra = np.zeros((self.avg_segments, n_channels, self.freqs.size), dtype=dt)
+        self._sum = np.zeros((n_channels, self.freqs.size), dtype=dt)
+        self._psd = np.zeros((n_channels, self.freqs.size), dtype=dt)
+        self.n_samples = 0          # samples ingested so far
+        self.n_segments = 0         # segments completed so far
+        self._next_end = nperseg    # absolute sample index at which the next segment completes
+
+    def _complete_segment(self):
+        pos = self.n_samples % self.nperseg  # ring index of the oldest sample of the segment
+        seg = self._seg
+        seg[:, :self.nperseg - pos] = self._ring[:, pos:]
+        seg[:, self.nperseg - pos:] = self._ring[:, :pos]
+        seg -= seg.mean(axis=1, keepdims=True)
+        seg *= self._win
+        spec = np.fft.rfft(seg, axis=-1, out=self._spec) if _RFFT_OUT else self._rfft(seg, axis=-1)
+        slot = self.n_segments % self.avg_segments
+        pxx = self._spectra[slot]
+        self._sum -= pxx
+        np.multiply(spec.real, spec.real, out=pxx)
+        np.multiply(spec.imag, spec.imag, out=self._sq)
+        np.add(pxx, self._sq, out=pxx)
+        self._sum += pxx
+        self.n_segments += 1
+        if self.n_segments % (64 * self.avg_segments) == 0:  # bound float drift of the running sum
+            np.sum(self._spectra, axis=0, out=self._sum)
+        self._next_end += self.hop
+
+    def push(self, chunk: np.ndarray) -> int:
+        """Ingest (n_samples, n_channels) samples; returns the number of segments completed."""
+        n = chunk.shape[0]
+        done = 0
+        i = 0
+        while i < n:
+            take = min(n - i, self._next_end - self.n_samples)
+            pos = self.n_samples % self.nperseg
+            first = min(take, self.nperseg - pos)
+            self._ring[:, pos:pos + first] = chunk[i:i + first].T
+            if take > first:
+                self._ring[:, :take - first] = chunk[i + first:i + take].T
+            self.n_samples += take
+            i += take
+            if self.n_samples == self._next_end:
+                self._complete_segment()
+                done += 1
+        return done
+
+    def psd(self) -> np.ndarray:
+        """Current PSD (n_channels, n_freqs): Welch average over the last ``avg_segments`` segments."""
+        k = min(self.n_segments, self.avg_segments)
+        if k == 0:
+            raise ValueError("no complete segment yet")
+        np.multiply(self._sum, self._scale / k, out=self._psd)
+        return self._psd
+
+LATENCY_WINDOW = 10000
+
+class StreamAnalyzer:
+    """OnlineWelch + FeatureEngine. ``push`` returns an update dict whenever new segments completed.
+    Update latencies are kept for the last ``latency_window`` updates (percentiles) plus running count, sum and
+    max over the whole stream, so a feed of any length holds a fixed amount of state."""
+    def __init__(self, ch_names: List[str], sfreq: float, nperseg: int = 512, noverlap: Optional[int] = None,
+                 window="hann", avg_segments: int = 8, alpha_band=(8.0, 13.0), use_db_faa: bool = False,
+                 bands: Dict[str, Tuple[float, float]] = None, total_range=TOTAL_RANGE, latency_window: int = LATENCY_WINDOW):
+        self.ch_names = list(ch_names)
+        self.welch = OnlineWelch(len(self.ch_names), sfreq, nperseg, noverlap, window, avg_segments)
+        self.engine = FeatureEngine(self.welch.freqs, bands or std_bands(alpha_band), total_range=total_range)
+        self.use_db_faa = use_db_faa
+        self.latencies: "deque[float]" = deque(maxlen=latency_window)
+        self.n_updates = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def push(self, chunk: np.ndarray) -> Optional[Dict[str, object]]:
+        t0 = time.perf_counter()
+        if self.welch.push(chunk) == 0:
+            return None
+        feats = self.engine.compute(self.welch.psd())
+        faa = self.engine.faa(feats["bands_abs"], self.ch_names, left="F3", right="F4", band="alpha", use_db=self.use_db_faa)
+        latency = time.perf_counter() - t0
+        self.latencies.append(latency)
+        self.n_updates += 1
+        self.latency_sum += latency
+        self.latency_max = max(self.latency_max, latency)
+        return {"t": self.welch.n_samples / self.welch.sfreq, "segments": self.welch.n_segments,
+                "latency_ms": latency * 1e3, "FAA": faa, **feats}
+
+def update_to_json(update: Dict[str, object]) -> str:
+    def conv(v):
+        if isinstance(v, dict):
+            return {k: conv(x) for k, x in v.items()}
+        if isinstance(v, np.ndarray):
+            return v.tolist()
+        return v
+    return json.dumps(conv(update))
+
+def _open_source(source: str):
+    """File-like binary reader for 'stdin', 'tcp://host:port' (we connect) or a file path."""
+    if source in ("-", "stdin"):
+        return sys.stdin.buffer, None
+    if source.startswith("tcp://"):
+        host, port = source[len("tcp://"):].rsplit(":", 1)
+        sock = socket.create_connection((host, int(port)))
+        return sock.makefile("rb", buffering=0), sock
+    return open(source, "rb", buffering=0), None
+
+def iter_frames(reader, n_channels: int, chunk_samples: int = 32) -> Iterator[np.ndarray]:
+    """Yield (n, n_channels) float32 views over one preallocated buffer; partial samples carry over.
+    Each yielded view is only valid until the next iteration."""
+    frame = n_channels * FRAME_DTYPE.itemsize
+    buf = bytearray(chunk_samples * frame)
+    mv = memoryview(buf)
+    arr = np.frombuffer(buf, dtype=FRAME_DTYPE).reshape(chunk_samples, n_channels)
+    fill = 0
+    while True:
+        n = reader.readinto(mv[fill:])
+        if not n:
+            return
+        fill += n
+        whole = fill // frame
+        if whole:
+            yield arr[:whole]
+            rest = fill - whole * frame
+            if rest:
+                mv[:rest] = mv[whole * frame:fill]
+            fill = rest
+
+def run_stream(source: str, ch_names: List[str], sfreq: float, out=None, chunk_samples: int = 32, **kw) -> Dict[str, float]:
+    """Analyze a live feed until EOF, writing one JSON line per update to ``out``. Returns latency stats."""
+    reader, sock = _open_source(source)
+    an = StreamAnalyzer(ch_names, sfreq, **kw)
+    t_start = time.perf_counter()
+    try:
+        for chunk in iter_frames(reader, len(ch_names), chunk_samples):
+            upd = an.push(chunk)
+            if upd is not None and out is not None:
+                out.write(update_to_json(upd) + "\n")
+    finally:
+        if sock is not None:
+            sock.close()
+    return latency_stats(an, time.perf_counter() - t_start)
+
+def latency_stats(an: StreamAnalyzer, wall: float) -> Dict[str, float]:
+    """Throughput and update latency; p50/p99 cover the analyzer's last ``latency_window`` updates."""
+    lat = np.asarray(an.latencies) * 1e3
+    n = an.n_updates
+    return {"samples": an.welch.n_samples, "updates": n, "wall_s": wall,
+            "samples_per_s": an.welch.n_samples / wall if wall > 0 else float("nan"),
+            "latency_ms_mean": an.latency_sum / n * 1e3 if n else float("nan"),
+            "latency_ms_p50": float(np.percentile(lat, 50)) if lat.size else float("nan"),
+            "latency_ms_p99": float(np.percentile(lat, 99)) if lat.size else float("nan"),
+            "latency_ms_max": an.latency_max * 1e3 if n else float("nan")}
+
+def synthetic_chunks(n_channels: int, sfreq: float, chunk_samples: int = 32, seed: int = 0, alpha_hz: float = 10.0) -> Iterator[np.ndarray]:
+    """Endless (chunk_samples, n_channels) float32 chunks: white noise plus a 10 Hz rhythm of increasing amplitude per channel."""
+    rng = np.random.default_rng(seed)
+    amp = np.linspace(0.5, 2.0, n_channels, dtype=np.float32)
+    n = 0
+    while True:
+        t = (n + np.arange(chunk_samples)) / sfreq
+        x = rng.standard_normal((chunk_samples, n_channels)).astype(np.float32)
+        x += np.sin(2 * np.pi * alpha_hz * t).astype(np.float32)[:, None] * amp
+        n += chunk_samples
+        yield x
+
+def publish_synthetic(target, n_channels: int, sfreq: float, seconds: float, chunk_samples: int = 32, realtime: bool = True, seed: int = 0):
+    """Write synthetic frames to a binary file-like ``target`` (stdout, socket file), paced at ``sfreq`` if ``realtime``."""
+    total = int(seconds * sfreq)
+    sent = 0
+    t0 = time.perf_counter()
+    for chunk in synthetic_chunks(n_channels, sfreq, chunk_samples, seed):
+        if sent >= total:
+            break
+        chunk = chunk[:total - sent]
+        target.write(np.ascontiguousarray(chunk, dtype=FRAME_DTYPE).tobytes())
+        sent += chunk.shape[0]
+        if realtime:
+            ahead = sent / sfreq - (time.perf_counter() - t0)
+            if ahead > 0:
+                time.sleep(ahead)
+    target.flush()
+    return sent
+
+def serve_synthetic(port: int, n_channels: int, sfreq: float, seconds: float, host: str = "127.0.0.1", **kw) -> int:
+    """Accept one local TCP client and stream synthetic frames to it."""
+    with socket.create_server((host, port)) as srv:
+        conn, _ = srv.accept()
+        with conn, conn.makefile("wb") as f:
+            return publish_synthetic(f, n_channels, sfreq, seconds, **kw)
@@ -0,0 +1,34 @@
+"""DPSS (Slepian) tapers shared by the multitaper estimators."""
+import numpy as np
+from functools import lru_cache
+from typing import Optional, Tuple
+
+DEFAULT_HALF_NBW = 4.0
+
+def half_bandwidth(n_times: int, sfreq: float, bandwidth: Optional[float] = None) -> float:
+    """Normalized half-bandwidth (time-half-bandwidth product) for a full ``bandwidth`` in Hz, as in MNE."""
+    if bandwidth is None:
+        return DEFAULT_HALF_NBW
+    half_nbw = float(bandwidth) * n_times / (2.0 * sfreq)
+    if half_nbw < 0.5:
+        raise ValueError(f"bandwidth {bandwidth} Hz is too narrow for {n_times} samples; use at least {sfreq / n_times:.3f} Hz")
+    return half_nbw
+
+@lru_cache(maxsize=16)
+def dpss_tapers(n_times: int, half_nbw: float = DEFAULT_HALF_NBW, low_bias: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """(tapers (n_tapers, n_times), eigenvalues (n_tapers,)), cached per length/bandwidth; arrays are read-only.
+    Same tapers as mne.time_frequency.dpss_windows(..., sym=False): at most int(2 * half_nbw) tapers,
+    L2-normalized, and with ``low_bias`` only those with eigenvalue > 0.9."""
+    from scipy.signal.windows import dpss
+    if n_times <= 1:
+        tapers, eigvals = np.ones((1, max(1, n_times))), np.ones(1)
+    else:
+        tapers, eigvals = dpss(n_times, half_nbw, int(2 * half_nbw), sym=False, norm=2, return_ratios=True)
+    if low_bias:
+        keep = eigvals > 0.9
+        if not keep.any():
+            keep = [int(np.argmax(eigvals))]
+        tapers, eigvals = tapers[keep], eigvals[keep]
+    tapers, eigvals = np.ascontiguousarray(tapers), np.ascontiguousarray(eigvals)
+    tapers.setflags(write=False); eigvals.setflags(write=False)
+    return tapers, eigvals
@@ -3,6 +3,7 @@ import warnings
 
 import numpy as np
 from typing import List, Tuple, Dict, Any
+from .formats import select_subject_files, iter_subject_tasks_json, load_subject_tasks_npy, load_subject_tasks_npz, load_subject_tasks_raw
 
 EPS = 1e-20
 
@@ -66,8 +67,10 @@ def resolve_channels(channels_file: str = None,  n_channels: int = None) -> List
     return ch
 
 def list_subject_jsons(input_path: str) -> List[str]:
+    """List subject files in a folder (non-recursive): JSON, .npz, .npy and raw .hdr sidecars.
+    When one subject id exists in several formats, the binary one wins (see formats.SUBJECT_EXTS)."""
     if os.path.isdir(input_path):
-        return sorted([os.path.join(input_path, x) for x in os.listdir(input_path) if x.lower().endswith(".json")])
+        return [os.path.join(input_path, x) for x in select_subject_files(os.listdir(input_path))]
     else:
         return [input_path]
 
@@ -79,19 +82,21 @@ def load_subject_tasks_json(path: str) -> Dict[str, np.ndarray]:
     { "task_A": [[ch1_series ...], [ch2_series ...], ...], ... }
     Returns dict: task_name -> data (n_times, n_channels)
     """
-    with open(path, "r", encoding="utf-8") as f:
-        obj = json.load(f)
-    if not isinstance(obj, dict):
-        raise ValueError("Top-level JSON must be an object mapping task_name -> channel_lists")
-    out = {}
-    for task, v in obj.items():
-        arr = np.array(v, dtype=float)
-        if arr.ndim == 1:
-            arr = arr[None, :]
-        if arr.ndim != 2:
-            raise ValueError(f"Task '{task}' is not a 2D matrix (n_channels x n_times)")
-        out[str(task)] = arr.T  # to (n_times, n_channels)
-    return out
+    return {task: arr.T for task, arr in iter_subject_tasks_json(path)}  # to (n_times, n_channels)
+
+def load_subject_tasks(path: str, tasks=None) -> Dict[str, np.ndarray]:
+    """Load any supported subject file; binary formats come back memory-mapped.
+    ``tasks`` optionally restricts which tasks are opened (JSON is always parsed in full).
+    Returns dict: task_name -> data (n_times, n_channels)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".npz":
+        return load_subject_tasks_npz(path, tasks=tasks)
+    if ext == ".npy":
+        return load_subject_tasks_npy(path)
+    if ext == ".hdr":
+        return load_subject_tasks_raw(path, tasks=tasks)
+    out = load_subject_tasks_json(path)
+    return out if tasks is None else {k: v for k, v in out.items() if k in tasks}
 
 if __name__ == "__main__":
     print(parse_locs_file("./data/montages/caps63.locs"))
@@ -1,8 +1,8 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from .utils import resolve_channels, builtin_montage_path
 
 def plot_psd(freqs, psd, title="PSD", out_png=None):
+    import matplotlib.pyplot as plt
     plt.figure()
     plt.plot(freqs, psd.T, alpha=0.3)
     plt.xlabel("Hz"); plt.ylabel("PSD")
@@ -12,3 +12,53 @@ def plot_psd(freqs, psd, title="PSD", out_png=None):
         plt.close()
     else:
         plt.show()
+
+def log_bins(freqs: np.ndarray, psd: np.ndarray, n_points: int = 256, fmin: float = None, fmax: float = None):
+    """Average ``psd`` (..., n_freqs) into ``n_points`` log-spaced bins between ``fmin`` (default: the first
+    non-zero frequency) and ``fmax``. Low-frequency bins narrower than the grid keep the original points.
+    Returns (bin mean frequencies, binned psd)."""
+    freqs = np.asarray(freqs, dtype=np.float64)
+    lo = freqs[freqs > 0][0] if fmin is None else fmin
+    sel = np.flatnonzero((freqs >= lo) & (freqs <= (freqs[-1] if fmax is None else fmax)))
+    f, p = freqs[sel], np.asarray(psd)[..., sel]
+    if f.size <= n_points:
+        return f, p
+    starts = np.unique(np.searchsorted(f, np.geomspace(f[0], f[-1], n_points + 1)[:-1]))
+    counts = np.diff(np.append(starts, f.size))
+    return np.add.reduceat(f, starts) / counts, np.add.reduceat(p, starts, axis=-1) / counts
+
+class PSDFigure:
+    """One Agg figure (object-oriented API, no pyplot state) re-rendered for many PSDs. All channels are a
+    single LineCollection on log-log axes, coloured by channel index, with the channel median on top."""
+    def __init__(self, figsize=(6.4, 4.0), dpi: int = 100, n_points: int = 256, fmax: float = None, cmap: str = "viridis"):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        self.n_points, self.fmax = n_points, fmax
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.fig.subplots_adjust(left=0.12, right=0.97, bottom=0.13, top=0.9)
+        self.ax = ax = self.fig.add_subplot()
+        self.lines = LineCollection([], linewidths=0.6, alpha=0.45, cmap=cmap)
+        ax.add_collection(self.lines)
+        (self.median,) = ax.plot([], [], color="k", lw=1.2)
+        ax.set_xscale("log"); ax.set_yscale("log")
+        ax.set_xlabel("Hz"); ax.set_ylabel("PSD")
+        ax.grid(True, which="major", alpha=0.3)
+
+    def render(self, freqs: np.ndarray, psd: np.ndarray, title: str = "", out_path: str = None):
+        """Draw (n_channels, n_freqs) ``psd`` and save it to ``out_path`` (format from the extension)."""
+        f, p = log_bins(freqs, np.atleast_2d(psd), self.n_points, fmax=self.fmax)
+        p = np.maximum(p, np.finfo(np.float32).tiny)
+        n_ch = p.shape[0]
+        self.lines.set_segments(np.stack([np.broadcast_to(f, p.shape), p], axis=-1))
+        self.lines.set_array(np.arange(n_ch, dtype=np.float64))
+        self.lines.set_clim(0, max(1, n_ch - 1))
+        self.median.set_data(f, np.median(p, axis=0))
+        lo, hi = float(p.min()), float(p.max())
+        self.ax.set_xlim(f[0], f[-1])
+        self.ax.set_ylim(lo / 1.5, hi * 1.5)
+        self.ax.set_title(title, fontsize=10)
+        if out_path:
+            self.fig.savefig(out_path)
+        return self.fig
@@ -0,0 +1,141 @@
+"""Background output writes behind a bounded queue.
+
+``BackgroundWriter`` runs write jobs (plain callables) on one thread so the caller can go back to computing
+or scheduling. ``submit`` blocks while ``max_pending`` jobs are waiting, which bounds the memory held by
+unwritten results and turns a slow disk into back-pressure instead of an ever-growing queue. The thread
+drains up to ``batch_size`` jobs per wake-up and exits after ``idle_timeout`` seconds without work; the next
+``submit`` starts it again. It is not a daemon, so an exiting interpreter (or pool worker, whose
+multiprocessing bootstrap joins non-daemon threads) finishes the queued writes first.
+
+Workers use one writer per process (``worker_writer``) for their JSON outputs; the parent uses another for
+the npz store (store.NpzResultWriter).
+"""
+import os, queue, threading, time
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_WRITE_QUEUE = 8
+_STOP = object()
+
+class BackgroundWriter:
+    def __init__(self, max_pending: int = DEFAULT_WRITE_QUEUE, batch_size: int = 16, idle_timeout: float = 0.2,
+                 on_error: Optional[Callable[[str, BaseException], None]] = None, name: str = "eegspec-writer"):
+        self.max_pending = max(1, int(max_pending))
+        self.batch_size = max(1, int(batch_size))
+        self.idle_timeout = float(idle_timeout)
+        self.on_error = on_error
+        self.name = name
+        self._q: "queue.Queue" = queue.Queue(maxsize=self.max_pending)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._inflight = 0  # submitted and not finished; the thread only exits at 0
+        self.jobs = 0
+        self.batches = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0  # time submit() waited for a free slot
+        self.peak_pending = 0
+        self.errors: List[str] = []
+
+    def submit(self, fn: Callable[..., Any], *args, label: str = "",
+               callback: Optional[Callable[[Optional[BaseException]], None]] = None, **kwargs):
+        """Queue ``fn(*args, **kwargs)``; blocks while the queue is full. ``callback`` runs on the writer thread
+        right after the job with its outcome: None on success, else the exception it raised."""
+        with self._lock:
+            self._inflight += 1
+            self.peak_pending = max(self.peak_pending, self._inflight)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name)
+                self._thread.start()
+        t0 = time.perf_counter()
+        self._q.put((label or getattr(fn, "__name__", "write"), fn, args, kwargs, callback))
+        self.blocked_s += time.perf_counter() - t0
+
+    def _run(self):
+        while True:
+            try:
+                job = self._q.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                job = None
+            if job is None or job is _STOP:  # idle, or close() asking not to wait for the idle timeout
+                with self._lock:
+                    if job is _STOP:
+                        self._stopped()
+                    if self._inflight == 0:
+                        self._thread = None
+                        return
+                continue
+            batch = [job]
+            while len(batch) < self.batch_size:
+                try:
+                    job = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    with self._lock:
+                        self._stopped()
+                    continue
+                batch.append(job)
+            t0 = time.perf_counter()
+            for label, fn, args, kwargs, callback in batch:
+                try:
+                    err = self._call(label, fn, args, kwargs)
+                    if callback is not None:
+                        self._call(f"{label} (callback)", callback, (err,), {})
+                finally:
+                    self._q.task_done()
+            self.busy_s += time.perf_counter() - t0
+            self.batches += 1
+            self.jobs += len(batch)
+            with self._lock:
+                self._inflight -= len(batch)
+
+    def _call(self, label: str, fn, args, kwargs) -> Optional[BaseException]:
+        try:
+            fn(*args, **kwargs)
+        except BaseException as e:  # keep draining; the error is reported
+            self.errors.append(f"{label}: {e}")
+            if self.on_error is not None:
+                self.on_error(label, e)
+            return e
+        return None
+
+    def _stopped(self):
+        self._inflight -= 1
+        self._q.task_done()
+
+    def flush(self):
+        """Wait until every submitted job has run."""
+        self._q.join()
+
+    def close(self) -> List[str]:
+        """Flush, wait for the thread and return the errors seen so far."""
+        self.flush()
+        with self._lock:
+            t = self._thread
+            if t is not None:
+                self._inflight += 1  # keeps the thread alive until it has taken the stop marker
+        if t is not None:
+            self._q.put(_STOP)
+            t.join()
+        return list(self.errors)
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"jobs": self.jobs, "batches": self.batches, "busy_s": self.busy_s, "blocked_s": self.blocked_s,
+                "peak_pending": self.peak_pending, "errors": len(self.errors)}
+
+_WORKER_WRITER: Optional[BackgroundWriter] = None
+_WORKER_PID: Optional[int] = None
+
+def worker_writer(max_pending: int = DEFAULT_WRITE_QUEUE) -> BackgroundWriter:
+    """The calling process's shared writer (created on first use, and again in a forked child)."""
+    global _WORKER_WRITER, _WORKER_PID
+    if _WORKER_WRITER is None or _WORKER_PID != os.getpid() or _WORKER_WRITER.max_pending != max(1, int(max_pending)):
+        if _WORKER_WRITER is not None and _WORKER_PID == os.getpid():
+            _WORKER_WRITER.close()
+        _WORKER_WRITER, _WORKER_PID = BackgroundWriter(max_pending, name="eegspec-task-writer"), os.getpid()
+    return _WORKER_WRITER
@@ -0,0 +1,16 @@
+import json, os
+import numpy as np
+import pytest
+
+def _write_subjects(folder, n_subjects=2):
+    rng = np.random.default_rng(0)
+    os.makedirs(folder, exist_ok=True)
+    for s in range(n_subjects):
+        tasks = {t: rng.standard_normal((4, 2000)).tolist() for t in ("rest", "task")}
+        with open(os.path.join(folder, f"sub{s}.json"), "w") as f:
+            json.dump(tasks, f)
+
+@pytest.fixture
+def make_subjects():
+    """make_subjects(folder, n_subjects=2) writes sub<i>.json, each with tasks rest/task of 4 x 2000 samples."""
+    return _write_subjects
@@ -0,0 +1,44 @@
+import json
+import numpy as np
+from eegspec.analyze import analyze_entry
+from eegspec.aggregate import CohortTable, aggregate_arrays, aggregate_outputs
+from eegspec.trp import trp_from_bandpowers
+
+def test_aggregate_arrays_trp_and_missing_tasks():
+    names = ["abs_alpha", "rel_alpha", "entropy"]
+    tab = CohortTable()
+    rng = np.random.default_rng(0)
+    for s in range(3):
+        for t in ("rest", "task") if s < 2 else ("rest",):
+            tab.add(f"s{s}", t, names, rng.uniform(1, 2, (4, 3)), 0.1 * s)
+    tab.add("bad", "rest", names, np.ones((5, 3)), 0.0)  # different montage
+    agg = aggregate_arrays(tab.dense(), baseline="rest", trp_mode="db", percentiles=(50,))
+    assert tab.skipped == ["bad"] and agg["subjects"] == ["s0", "s1", "s2"]
+    assert agg["abs"].shape == (3, 2, 4, 1) and np.isnan(agg["abs"][2, 1]).all()
+    np.testing.assert_allclose(agg["trp"][:, 0], 0.0, atol=1e-6)
+    ref = trp_from_bandpowers(agg["abs"][0, 0].astype(float), agg["abs"][0, 1].astype(float), mode="db")
+    np.testing.assert_allclose(agg["trp"][0, 1], ref, rtol=1e-5)
+    assert agg["features_n"][1, 0, 0] == 2
+    np.testing.assert_allclose(agg["features_mean"][1], np.nanmean(agg["features"][:, 1], axis=0))
+    np.testing.assert_allclose(agg["features_pct"][0, 0], np.median(agg["features"][:, 0], axis=0))
+
+def test_analyze_aggregate_matches_offline(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=3)
+    (tmp_path / "ch.txt").write_text("F3\nF4\nCz\nOz\n")
+    summary = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=2,
+                            output_format="json", aggregate=True, baseline="rest", channels_file=str(tmp_path / "ch.txt"))
+    assert summary["aggregate"]["baseline"] == "rest"
+    with np.load(tmp_path / "out" / "aggregate.npz") as z:
+        online = {k: z[k] for k in ("subjects", "tasks", "channels", "features", "trp_mean")}
+    offline = aggregate_outputs(str(tmp_path / "out"), baseline="rest", max_workers=2, shard_size=1,
+                                path=str(tmp_path / "offline.npz"))
+    assert list(online["subjects"]) == offline["subjects"] == ["sub0", "sub1", "sub2"]
+    assert list(online["tasks"]) == offline["tasks"] == ["rest", "task"]
+    assert list(online["channels"]) == offline["channels"] == ["F3", "F4", "Cz", "Oz"]  # read from psd_<task>.json
+    assert not list((tmp_path / "out").glob("*.tmp"))
+    np.testing.assert_allclose(online["features"], offline["features"], rtol=1e-6)
+    np.testing.assert_allclose(online["trp_mean"], offline["trp_mean"], rtol=1e-5)
+    with open(tmp_path / "out" / "subjects" / "sub2" / "metrics_task.json") as f:
+        m = json.load(f)
+    np.testing.assert_allclose(offline["abs"][2, offline["tasks"].index("task"), :, offline["bands"].index("alpha")],
+                               m["bands_abs"]["alpha"], rtol=1e-6)
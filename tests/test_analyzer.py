@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from eegspec.analyze import compute_task_metrics
+from eegspec.analyzer import Analyzer
+from eegspec.psd import compute_psd_welch, compute_psd_multitaper
+from eegspec.store import metrics_feature_table
+
+CH = ["Fp1", "F3", "F4", "Cz"]
+
+def _data(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 250.0
+    return rng.standard_normal((n, len(CH))) + np.sin(2 * np.pi * 10.0 * t)[:, None] * [1.0, 0.5, 2.0, 1.0]
+
+@pytest.mark.parametrize("individualize", [False, True])
+def test_analyzer_matches_task_metrics(individualize):
+    an = Analyzer(250.0, CH, nperseg=256, individualize=individualize)
+    arrays = [_data(0), _data(1), _data(2, n=1500)]
+    results = an.analyze_batch(arrays)
+    assert len(results) == 3
+    for x, res in zip(arrays, results):
+        freqs, psd = compute_psd_welch(x, 250.0, nperseg=256)
+        np.testing.assert_array_equal(res.freqs, freqs)
+        np.testing.assert_allclose(res.psd, psd, rtol=1e-10)
+        metrics = compute_task_metrics(psd, freqs, CH, (8.0, 13.0), False, individualize)
+        names, table = metrics_feature_table(metrics)
+        assert res.feature_names == names
+        np.testing.assert_allclose(res.features, table, rtol=1e-5)
+        assert res.faa == pytest.approx(metrics["FAA"], rel=1e-9)
+        assert res.bands == {k: tuple(v) for k, v in metrics["bands"].items()}
+    single = an.analyze(arrays[2])
+    np.testing.assert_array_equal(single.features, results[2].features)
+    assert results[0].feature("iaf_peak").shape == (4,)
+
+def test_analyzer_multitaper_and_checks():
+    an = Analyzer(250.0, nperseg=256, psd_method="multitaper", mt_bandwidth=2.0)
+    res = an.analyze_batch(np.stack([_data(0), _data(1)]))
+    _, psd = compute_psd_multitaper(_data(1), 250.0, bandwidth=2.0, nperseg=256)
+    np.testing.assert_allclose(res[1].psd, psd, rtol=1e-10)
+    assert np.isnan(res[0].faa)  # no channel names, no F3/F4
+    with pytest.raises(ValueError):
+        Analyzer(250.0, CH, nperseg=256).analyze(_data(0)[:, :3])
+    with pytest.raises(ValueError):
+        an.analyze(_data(0, n=100))
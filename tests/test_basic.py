@@ -22,3 +22,10 @@ def test_faa_sign():
     freqs, psd = compute_psd_welch(data, sfreq, nperseg=1024, noverlap=512)
     faa = faa_from_psd(psd, freqs, ["F3","F4"], left="F3", right="F4", alpha=(8,13))
     assert faa > 0  # right alpha > left -> ln(PR)-ln(PL) > 0
+
+def test_cli_version_skips_heavy_imports():
+    import subprocess, sys
+    code = ("import sys\nfrom eegspec.cli import main\ntry: main(['--version'])\nexcept SystemExit: pass\n"
+            "print([m for m in ('numpy', 'scipy', 'matplotlib', 'mne') if m in sys.modules])")
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+    assert out.stdout.startswith("eegspec ") and out.stdout.strip().endswith("[]")
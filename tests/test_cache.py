@@ -0,0 +1,59 @@
+import json, os
+import numpy as np
+from eegspec.analyze import analyze_entry
+from eegspec.cache import ResultCache
+from eegspec.store import ResultStore
+
+def _subject(folder, name, seed):
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, name), "w") as f:
+        json.dump({t: rng.standard_normal((4, 1500)).tolist() for t in ("rest", "task")}, f)
+
+def test_cache_reuses_psd_across_band_changes(tmp_path):
+    _subject(tmp_path / "in", "sub0.json", 0)
+    cache = str(tmp_path / "cache")
+    kw = dict(sfreq=250.0, nperseg=256, max_processors=2, cache_dir=cache)
+    first = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o1"), **kw)
+    assert first["cache"]["psd_misses"] == 2 and first["cache"]["psd_hits"] == 0
+
+    _subject(tmp_path / "in", "sub1.json", 1)  # a new subject joins the cohort
+    second = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o2"), **kw)
+    assert (second["cache"]["psd_hits"], second["cache"]["psd_misses"]) == (2, 2)
+    assert (second["cache"]["features_hits"], second["cache"]["features_misses"]) == (2, 2)
+    np.testing.assert_array_equal(ResultStore(str(tmp_path / "o1")).load_subject("sub0")["features"],
+                                  ResultStore(str(tmp_path / "o2")).load_subject("sub0")["features"])
+
+    third = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o3"), alpha="7,12", **kw)
+    assert third["cache"]["psd_hits"] == 4 and third["cache"]["features_misses"] == 4
+
+def test_cache_eviction_is_lru(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for i, key in enumerate(("aa01", "bb02", "cc03")):
+        cache.put_psd(key, np.arange(10.0), np.ones((4, 10)))
+        path = cache._path("psd", key, ".npz")
+        os.utime(path, (1000 + i, 1000 + i))
+    assert cache.get_psd("aa01") is not None  # refreshes aa01, so bb02 is now the oldest
+    size = cache.size()
+    n, _ = cache.evict(size - 1)
+    assert n == 1 and cache.get_psd("bb02") is None and cache.get_psd("aa01") is not None
+
+def test_shared_cache_is_not_evicted(tmp_path):
+    _subject(tmp_path / "in", "sub0.json", 0)
+    cache = str(tmp_path / "cache")
+    kw = dict(sfreq=250.0, nperseg=256, max_processors=1, cache_dir=cache, cache_max_bytes=0)
+    shared = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o1"), work_queue=str(tmp_path / "wq"), **kw)
+    assert shared["cache"]["evict_skipped"] and ResultCache(cache).size() > 0
+    alone = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o2"), **kw)
+    assert not alone["cache"]["evict_skipped"] and ResultCache(cache).size() == 0
+
+def test_cache_reuses_time_resolved_psd(tmp_path):
+    _subject(tmp_path / "in", "sub0.json", 0)
+    kw = dict(sfreq=250.0, nperseg=128, max_processors=1, cache_dir=str(tmp_path / "cache"), window_sec=2.0, step_sec=1.0, profile=True)
+    first = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o1"), **kw)
+    second = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "o2"), **kw)
+    assert (first["cache"]["tfr_misses"], second["cache"]["tfr_hits"]) == (2, 2)
+    assert "psd_windows" in first["profile"]["stages"] and "psd_windows" not in second["profile"]["stages"]
+    a, b = (ResultStore(str(tmp_path / d)).load_tfr("sub0", "task") for d in ("o1", "o2"))
+    np.testing.assert_array_equal(a["features"], b["features"])
+    np.testing.assert_array_equal(a["times"], b["times"])
@@ -0,0 +1,40 @@
+import warnings
+import numpy as np
+import pytest
+from eegspec.connectivity import connectivity_bands, spectral_connectivity_matrix, epoch_view, CON_METHODS
+
+BANDS = {"theta": (4.0, 7.0), "alpha": (8.0, 13.0), "beta": (13.0, 30.0)}
+
+def _coupled(n_ch=6, sfreq=250.0, sec=30, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sfreq * sec)) / sfreq
+    x = rng.standard_normal((t.size, n_ch))
+    x += np.sin(2 * np.pi * 10 * t)[:, None] * np.linspace(0, 2, n_ch)
+    x[:, 1] += 0.8 * np.roll(x[:, 0], 3)
+    return x
+
+def test_matches_mne_connectivity():
+    mne_con = pytest.importorskip("mne_connectivity")
+    sfreq, x = 250.0, _coupled()
+    ours = connectivity_bands(x, sfreq, BANDS, max_block_bytes=200_000)  # forces several row/epoch blocks
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        ref = mne_con.spectral_connectivity_epochs(
+            np.ascontiguousarray(epoch_view(x, sfreq)), method=list(CON_METHODS), mode="multitaper", sfreq=sfreq,
+            fmin=tuple(b[0] for b in BANDS.values()), fmax=tuple(b[1] for b in BANDS.values()), faverage=True, verbose=False)
+    lo = np.tril_indices(x.shape[1], -1)
+    for m, c in zip(CON_METHODS, ref):
+        np.testing.assert_allclose(ours[m][:, lo[0], lo[1]], c.get_data(output="dense")[lo].T, atol=1e-10)
+
+def test_symmetry_and_single_band_wrapper():
+    sfreq, x = 250.0, _coupled()
+    con = connectivity_bands(x, sfreq, BANDS, ["coh", "imcoh", "wpli"])
+    assert con["coh"].shape == (3, 6, 6)
+    np.testing.assert_allclose(con["coh"], con["coh"].swapaxes(1, 2))
+    np.testing.assert_allclose(con["imcoh"], -con["imcoh"].swapaxes(1, 2))
+    assert np.all(np.diagonal(con["coh"], axis1=1, axis2=2) == 1.0)
+    assert con["coh"][2, 1, 0] > 0.3 > con["coh"][2, 5, 4]  # beta: only ch1 is driven (by ch0)
+    one = spectral_connectivity_matrix(x, sfreq, 8.0, 13.0, ["coh"])
+    np.testing.assert_allclose(one["coh"], con["coh"][1])
+    with pytest.raises(ValueError):
+        connectivity_bands(x, sfreq, BANDS, ["granger"])
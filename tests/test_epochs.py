@@ -0,0 +1,82 @@
+import json, os
+import numpy as np
+from eegspec.analyze import analyze_entry, compute_task_metrics
+from eegspec.epochs import EpochSpec, compute_epoch_psd
+from eegspec.psd import compute_psd_welch
+from eegspec.store import ResultStore, metrics_feature_table
+
+def _keep_by_var(x):
+    return compute_epoch_psd(x, 250.0, EpochSpec(2.0, reject_var=5.0), "rest", 256, None)[2]["keep"]
+
+def test_epoch_psd_batch_and_rejection():
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((5000, 4))
+    x[2100:2200, 1] += 40.0  # artefact inside epoch 4 (2000-2500)
+    spec = EpochSpec(2.0, reject_ptp=20.0)
+    freqs, psd, info = compute_epoch_psd(x, 250.0, spec, "rest", 256, None)
+    assert psd.shape == (10, 4, 129)
+    assert info["keep"].tolist() == [i != 4 for i in range(10)]
+    for e in (0, 7):
+        _, ref = compute_psd_welch(x[e * 500:(e + 1) * 500], 250.0, nperseg=256)
+        np.testing.assert_allclose(psd[e], ref, rtol=1e-12)
+    keep = _keep_by_var(x)
+    assert not keep[4] and keep.sum() == 9
+    ev = EpochSpec(1.0, tmin=-0.5, events={"task": (0.2, 3.0, 19.9)})
+    starts, index, length = ev.windows("task", 5000, 250.0)
+    assert starts.tolist() == [625] and index.tolist() == [1] and length == 250
+    assert ev.windows("rest", 5000, 250.0)[0].size == 20  # no onsets: fixed-length
+
+def test_epoched_analyze_outputs(tmp_path):
+    rng = np.random.default_rng(1)
+    os.makedirs(tmp_path / "in")
+    data = {t: rng.standard_normal((4, 3000)) for t in ("rest", "task")}
+    data["task"][2, 1000:1100] += 50.0
+    with open(tmp_path / "in" / "sub0.json", "w") as f:
+        json.dump({t: v.tolist() for t, v in data.items()}, f)
+    with open(tmp_path / "events.json", "w") as f:
+        json.dump({"task": [0.5, 2.5, 4.5, 6.5, 8.5, 11.5]}, f)
+    kw = dict(sfreq=250.0, nperseg=256, max_processors=1, epoch_sec=2.0, events=str(tmp_path / "events.json"), reject_ptp=30.0)
+    summary = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "npz"), **kw)
+    assert summary["subjects"]["sub0"]["task"]["epochs_kept"] == [4, 5]
+    assert summary["subjects"]["sub0"]["rest"]["epochs_kept"] == [6, 6]
+    store = ResultStore(str(tmp_path / "npz"))
+    ep = store.load_epochs("sub0", "task")
+    assert ep["features"].shape == (5, 4, len(ep["feature_names"])) and ep["features"].dtype == np.float32
+    assert ep["index"].tolist() == [0, 1, 2, 3, 4] and ep["keep"].tolist() == [True, False, True, True, True]
+    np.testing.assert_allclose(ep["onsets"], [0.5, 2.5, 4.5, 6.5, 8.5])
+    # task PSD = mean of the kept epochs; features as for a task with that PSD
+    x = data["task"].T
+    kept = [compute_psd_welch(x[s:s + 500], 250.0, nperseg=256)[1] for s in (125, 1125, 1625, 2125)]
+    freqs, psd = store.load_psd("sub0", "task")
+    np.testing.assert_allclose(psd, np.mean(kept, axis=0), rtol=1e-5)
+    e0 = compute_task_metrics(compute_psd_welch(x[125:625], 250.0, nperseg=256)[1], freqs, [f"Ch{i}" for i in range(4)],
+                              (8.0, 13.0), False)
+    np.testing.assert_allclose(ep["features"][0], metrics_feature_table(e0)[1], rtol=1e-4)
+    assert store.load_epochs("sub0", "task", kept_only=True)["features"].shape[0] == 4
+
+    summary = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "json"), output_format="json", **kw)
+    with np.load(summary["subjects"]["sub0"]["task"]["epochs"]) as z:
+        np.testing.assert_allclose(z["features"], ep["features"], rtol=1e-6)
+        assert z["keep"].tolist() == ep["keep"].tolist()
+
+def test_epoch_and_tfr_features_use_individual_bands(tmp_path):
+    from eegspec.analyze import compute_tfr_features
+    rng = np.random.default_rng(2)
+    t = np.arange(3000) / 250.0
+    x = rng.standard_normal((3000, 4)) + 3.0 * np.sin(2 * np.pi * 10.5 * t)[:, None]
+    os.makedirs(tmp_path / "in")
+    with open(tmp_path / "in" / "sub0.json", "w") as f:
+        json.dump({"rest": x.T.tolist()}, f)
+    out = str(tmp_path / "out")
+    analyze_entry(str(tmp_path / "in"), out_dir=out, sfreq=250.0, nperseg=256, max_processors=1, individualize=True,
+                  epoch_sec=2.0, window_sec=4.0, output_format="json")
+    with open(os.path.join(out, "subjects", "sub0", "metrics_rest.json")) as f:
+        bands = {k: tuple(v) for k, v in json.load(f)["bands"].items()}
+    assert bands["alpha"] != (8.0, 13.0)
+    ch = [f"Ch{i}" for i in range(4)]
+    for kind, n in (("epochs", 500), ("tfr", 896)):  # first epoch / first 4 s window (whole 128-sample hops)
+        freqs, p0 = compute_psd_welch(x[:n], 250.0, nperseg=256)
+        ref, std = (compute_tfr_features(np.zeros(1), freqs, p0[None], ch, (8.0, 13.0), False, b)["features"][0] for b in (bands, None))
+        with np.load(os.path.join(out, "subjects", "sub0", f"{kind}_rest.npz")) as z:
+            np.testing.assert_allclose(z["features"][0], ref, rtol=1e-5)
+            assert not np.allclose(z["features"][0], std, rtol=1e-3)
@@ -0,0 +1,41 @@
+import numpy as np
+from eegspec.features import FeatureEngine, bandpower, spectral_entropy, spectral_moments, spectral_edge, median_frequency
+from eegspec.faa import faa_from_psd
+from eegspec.psd import compute_psd_welch
+
+BANDS = {"delta": (1.0, 4.0), "theta": (4.0, 7.0), "alpha": (8.0, 13.0), "beta": (13.0, 30.0), "gamma": (30.0, 45.0)}
+
+def _psd(seed, n_ch=6):
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, 20, 1 / 250.0)
+    data = rng.standard_normal((t.size, n_ch)) + np.sin(2 * np.pi * 10 * t)[:, None] * np.arange(1, n_ch + 1)
+    return compute_psd_welch(data, 250.0, nperseg=500, noverlap=250)
+
+def test_engine_matches_reference_functions():
+    freqs, psd = _psd(0)
+    out = FeatureEngine(freqs, BANDS).compute(psd)
+    ref_abs = bandpower(psd, freqs, BANDS)
+    ref_rel = bandpower(psd, freqs, BANDS, relative=True, total_range=(1.0, 45.0))
+    for k in BANDS:
+        np.testing.assert_allclose(out["bands_abs"][k], ref_abs[k], rtol=1e-10)
+        np.testing.assert_allclose(out["bands_rel"][k], ref_rel[k], rtol=1e-10)
+    np.testing.assert_allclose(out["entropy"], spectral_entropy(psd, freqs), rtol=1e-10)
+    ref_m = spectral_moments(psd, freqs)
+    for k, v in ref_m.items():
+        np.testing.assert_allclose(out["moments"][k], v, rtol=1e-9)
+    np.testing.assert_array_equal(out["SEF95"], spectral_edge(psd, freqs, percent=0.95))
+    np.testing.assert_array_equal(out["F50"], median_frequency(psd, freqs))
+
+def test_engine_stacked_tasks_and_faa():
+    freqs, p0 = _psd(1)
+    _, p1 = _psd(2)
+    eng = FeatureEngine.for_grid(freqs, BANDS)
+    assert FeatureEngine.for_grid(freqs, BANDS) is eng
+    stacked = eng.compute(np.stack([p0, p1]))
+    single = eng.compute(p1)
+    assert stacked["entropy"].shape == (2, 6)
+    np.testing.assert_allclose(stacked["moments"]["kurtosis"][1], single["moments"]["kurtosis"], rtol=1e-12)
+    ch = ["Fp1", "F3", "F4", "C3", "C4", "Oz"]
+    faa = eng.faa(stacked["bands_abs"], ch)
+    np.testing.assert_allclose(faa, [faa_from_psd(p, freqs, ch) for p in (p0, p1)], rtol=1e-10)
+    assert np.isnan(eng.faa(single["bands_abs"], ["a"] * 6))
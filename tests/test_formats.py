@@ -0,0 +1,80 @@
+import json, os
+import numpy as np
+import pytest
+from eegspec.formats import convert_subject, iter_subject_tasks_json
+from eegspec.utils import list_subject_jsons, load_subject_tasks, load_subject_tasks_json
+
+def _write_subject(path, rng):
+    tasks = {"rest": rng.standard_normal((3, 400)), "task b": rng.standard_normal((3, 250))}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({k: v.tolist() for k, v in tasks.items()}, f, indent=1)
+    return tasks
+
+def test_streaming_json_matches_json_load(tmp_path):
+    tasks = _write_subject(tmp_path / "s1.json", np.random.default_rng(0))
+    loaded = load_subject_tasks_json(str(tmp_path / "s1.json"))
+    assert list(loaded) == list(tasks)
+    for k in tasks:
+        np.testing.assert_array_equal(loaded[k], tasks[k].T)
+    for chunk in (1, 7, 4096):  # values cut at every possible chunk boundary
+        streamed = dict(iter_subject_tasks_json(str(tmp_path / "s1.json"), chunk_chars=chunk))
+        for k in tasks:
+            np.testing.assert_array_equal(streamed[k], tasks[k])
+    (tmp_path / "flat.json").write_text('{"a": [1.5, 2.25e1] , "b":[[3]]}')
+    assert [(k, v.tolist()) for k, v in iter_subject_tasks_json(str(tmp_path / "flat.json"), chunk_chars=3)] == \
+        [("a", [[1.5, 22.5]]), ("b", [[3.0]])]
+    for bad in ("[1, 2]", '{"a": [[1, 2]]', '{"a": [[1, 2], [3, 4]]'):
+        (tmp_path / "bad.json").write_text(bad)
+        with pytest.raises(ValueError):
+            list(iter_subject_tasks_json(str(tmp_path / "bad.json"), chunk_chars=2))
+
+@pytest.mark.parametrize("fmt,ext", [("raw", ".hdr"), ("npz", ".npz")])
+def test_convert_roundtrip_is_memory_mapped(tmp_path, fmt, ext):
+    tasks = _write_subject(tmp_path / "s1.json", np.random.default_rng(1))
+    dst = convert_subject(str(tmp_path / "s1.json"), str(tmp_path / "bin"), fmt=fmt)
+    assert dst.endswith(ext)
+    loaded = load_subject_tasks(dst)
+    for k in tasks:
+        assert isinstance(loaded[k].base, np.memmap) or isinstance(loaded[k], np.memmap)
+        np.testing.assert_array_equal(loaded[k], tasks[k].T)
+
+def test_discovery_prefers_binary(tmp_path):
+    rng = np.random.default_rng(2)
+    _write_subject(tmp_path / "s1.json", rng)
+    _write_subject(tmp_path / "s2.json", rng)
+    convert_subject(str(tmp_path / "s1.json"), str(tmp_path), fmt="raw")
+    np.save(tmp_path / "s3.npy", rng.standard_normal((3, 100)))
+    found = [os.path.basename(p) for p in list_subject_jsons(str(tmp_path))]
+    assert found == ["s1.hdr", "s2.json", "s3.npy"]
+    assert list(load_subject_tasks(str(tmp_path / "s3.npy"))["data"].shape) == [100, 3]
+
+def test_task_sources_file_and_shared_memory(tmp_path):
+    import pickle
+    from eegspec.sources import describe_subject, open_task, release_shared
+    tasks = _write_subject(tmp_path / "s1.json", np.random.default_rng(3))
+    hdr = convert_subject(str(tmp_path / "s1.json"), str(tmp_path / "bin"), fmt="raw")
+    for path in (hdr, str(tmp_path / "s1.json")):
+        sources, shms = describe_subject(path)
+        assert bool(shms) == path.endswith(".json")
+        try:
+            for k, src in sources.items():
+                assert len(pickle.dumps(src)) < 1024
+                with open_task(src) as data:
+                    np.testing.assert_array_equal(data, tasks[k].T)
+        finally:
+            for shm in shms.values():
+                release_shared(shm)
+
+def test_attached_shared_memory_is_not_tracked():
+    import subprocess, sys
+    from eegspec.sources import share_task, open_task, release_shared
+    src, shm = share_task("s1.json", "rest", np.arange(20.0).reshape(10, 2))
+    try:
+        code = (f"from eegspec.sources import TaskSource, open_task\n"
+                f"with open_task(TaskSource('s1.json', 'rest', (2, 10), '<f8', {shm.name!r})) as d: assert d[3, 1] == 7.0")
+        r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=60)
+        assert r.returncode == 0 and "leaked" not in r.stderr, r.stderr
+        with open_task(src) as data:  # the child's resource tracker did not unlink the segment
+            assert data[9, 1] == 19.0
+    finally:
+        release_shared(shm)
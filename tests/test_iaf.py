@@ -0,0 +1,36 @@
+import numpy as np
+from scipy.signal import savgol_filter
+from eegspec.iaf import IAFEstimator, _savgol_matrix, estimate_iaf, individual_bands
+from eegspec.analyze import compute_task_metrics
+from eegspec.psd import compute_psd_welch
+
+def _psd(peak_hz, n_ch=4, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(0, 30, 1 / 250.0)
+    data = rng.standard_normal((t.size, n_ch)) + 3 * np.sin(2 * np.pi * peak_hz * t)[:, None]
+    return compute_psd_welch(data, 250.0, nperseg=1000)
+
+def test_savgol_matrix_matches_scipy():
+    x = np.random.default_rng(1).standard_normal((3, 29))
+    np.testing.assert_allclose(x @ _savgol_matrix(29, 11, 3).T, savgol_filter(x, 11, 3, axis=-1), atol=1e-12)
+
+def test_iaf_vectorized_over_tasks_and_channels():
+    freqs, p9 = _psd(9.0)
+    _, p11 = _psd(11.0, seed=1)
+    out = IAFEstimator.for_grid(freqs).compute(np.stack([p9, p11]))  # (task, ch, f)
+    assert out["peak"].shape == (2, 4)
+    np.testing.assert_allclose(out["peak"][0], 9.0, atol=0.25)
+    np.testing.assert_allclose(out["peak"][1], 11.0, atol=0.25)
+    assert np.all((out["cog"] > 7) & (out["cog"] < 14))
+    np.testing.assert_array_equal(estimate_iaf(p11, freqs), out["peak"][1])
+    assert IAFEstimator.for_grid(freqs) is IAFEstimator.for_grid(freqs)
+
+def test_individual_bands_feed_band_powers():
+    assert individual_bands(float("nan")) is None
+    freqs, psd = _psd(11.0)
+    std = compute_task_metrics(psd, freqs, ["F3", "F4", "C3", "C4"], (8.0, 13.0), False)
+    ind = compute_task_metrics(psd, freqs, ["F3", "F4", "C3", "C4"], (8.0, 13.0), False, individualize=True)
+    assert std["bands"]["alpha"] == [8.0, 13.0]
+    assert ind["bands"]["alpha"] == [7.0, 13.0] and ind["bands"]["theta"] == [5.0, 7.0]
+    assert ind["bands_abs"]["alpha"][0] > std["bands_abs"]["alpha"][0]
+    np.testing.assert_allclose(ind["IAF"]["peak"], 11.0, atol=0.25)
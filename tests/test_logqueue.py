@@ -0,0 +1,47 @@
+import os, io, logging
+import concurrent.futures
+from eegspec.analyze import analyze_entry
+from eegspec.base import BaseApp
+from eegspec.logqueue import LogListener, init_worker_logging, worker_logger
+
+def _log(sid, task):
+    worker_logger(sid, task).info(f"hello {sid} {task}")
+    return os.getpid()
+
+def test_listener_batches_worker_records(tmp_path):
+    buf = io.StringIO()
+    kw = dict(log_level="INFO", log_dir=str(tmp_path), log_prefix="run", log_suffix="", log_percentage=None)
+    with LogListener(kw, per_task=True, stream=buf) as lst:
+        with concurrent.futures.ProcessPoolExecutor(2, initializer=init_worker_logging, initargs=lst.worker_args()) as ex:
+            list(ex.map(_log, ["s0", "s0", "s1"], ["a", "b", "a"]))
+    assert lst.records == 3 and lst.batches <= 3
+    assert buf.getvalue().count("hello") == 3
+    with open(tmp_path / "run.log") as f:
+        assert f.read().count(" - INFO - hello") == 3
+    with open(tmp_path / "run_s0_b.log") as f:
+        assert f.read().strip().endswith("hello s0 b")
+
+def test_analyze_queue_logging(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in")
+    log_dir = tmp_path / "logs"
+    kw = dict(log_level="INFO", log_dir=str(log_dir), log_prefix="", log_suffix="", log_percentage=None)
+    summary = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=2, log_kwargs=kw)
+    assert summary["logging"]["records"] >= 8  # start + done for 4 tasks
+    assert sorted(os.listdir(log_dir)) == ["log.log"]
+    with open(log_dir / "log.log") as f:
+        text = f.read()
+    assert text.count("[Task done]") == 4 and "Summary written" in text
+    analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out2"), nperseg=128, max_processors=2, log_kwargs=kw, task_logs=True)
+    assert "_sub0_rest.log" in os.listdir(log_dir)
+    legacy = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out3"), nperseg=128, max_processors=2, log_mode="task")
+    assert legacy["run"]["tasks_ok"] == 4 and "logging" not in legacy
+
+def test_baseapp_does_not_leak_handlers(tmp_path):
+    def n_fds():
+        return len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else 0
+    BaseApp(log_dir=str(tmp_path), log_suffix="_0")
+    before = n_fds()
+    for i in range(20):
+        BaseApp(log_dir=str(tmp_path), log_suffix=f"_{i}")
+    assert n_fds() <= before
+    assert len(logging.getLogger("eegspec.vendor.dualhandler").handlers) == 1
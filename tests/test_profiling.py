@@ -0,0 +1,30 @@
+import json
+from eegspec.analyze import analyze_entry
+from eegspec.profiling import make_profiler, rollup, NULL_PROFILER
+
+def test_disabled_profiler_is_noop():
+    prof = make_profiler(False)
+    assert prof is NULL_PROFILER and prof.stage("a") is prof.stage("b")
+    with prof.stage("psd"):
+        pass
+    assert prof.records == []
+    on = make_profiler(True, proc="worker")
+    with on.stage("psd"):
+        pass
+    on.add("psd", 0.0, 2.0)
+    r = rollup(on.records)
+    assert r["stages"]["psd"]["count"] == 2 and r["stages"]["psd"]["max_s"] == 2.0
+
+def test_profile_summary_and_trace(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in")
+    summary = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=2, profile=True)
+    stages = summary["profile"]["stages"]
+    for name in ("load_subject", "queue_wait", "open", "psd", "features", "payload", "result_return", "write_subject", "task"):
+        assert name in stages, name
+    assert stages["psd"]["count"] == 4 and stages["load_subject"]["count"] == 2
+    with open(summary["profile"]["trace"]) as f:
+        events = json.load(f)["traceEvents"]
+    assert {e["ph"] for e in events} == {"X"} and {e["cat"] for e in events} == {"parent", "worker"}
+    assert all(e["dur"] >= 0 and e["ts"] >= 0 for e in events)
+    plain = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out2"), nperseg=128, max_processors=2)
+    assert "profile" not in plain
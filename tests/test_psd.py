@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+from scipy.signal import welch, get_window
+from eegspec.psd import compute_psd_welch
+
+def _reference(data, sfreq, nperseg, noverlap, window):
+    win = get_window(window, nperseg, fftbins=True)
+    out = [welch(data[:, ch], fs=sfreq, nperseg=nperseg, noverlap=noverlap, window=win) for ch in range(data.shape[1])]
+    return out[0][0], np.stack([p for _, p in out], axis=0)
+
+@pytest.mark.parametrize("nperseg,noverlap,window", [(256, 128, "hann"), (255, 100, "hamming"), (512, 0, "boxcar")])
+def test_batched_welch_matches_scipy(nperseg, noverlap, window):
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((5000, 7)) + 3.0  # DC offset exercises the detrend
+    f_ref, p_ref = _reference(data, 250.0, nperseg, noverlap, window)
+    f, psd = compute_psd_welch(data, 250.0, nperseg=nperseg, noverlap=noverlap, window=window)
+    np.testing.assert_allclose(f, f_ref, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(psd, p_ref, rtol=1e-10, atol=1e-14)
+
+def test_batched_welch_chunked_and_float32():
+    rng = np.random.default_rng(1)
+    data = rng.standard_normal((20000, 16))
+    f_ref, p_ref = _reference(data, 500.0, 512, 256, "hann")
+    _, psd_small = compute_psd_welch(data, 500.0, nperseg=512, noverlap=256, max_block_bytes=1)  # one segment per block
+    np.testing.assert_allclose(psd_small, p_ref, rtol=1e-10, atol=1e-14)
+    _, psd32 = compute_psd_welch(data.astype(np.float32), 500.0, nperseg=512, noverlap=256, dtype=np.float32)
+    assert psd32.dtype == np.float32
+    np.testing.assert_allclose(psd32, p_ref, rtol=1e-4, atol=1e-8)
+
+def test_batched_welch_short_input():
+    with pytest.raises(ValueError):
+        compute_psd_welch(np.zeros((100, 2)), 100.0, nperseg=256)
+
+def test_windowed_welch_matches_per_window_welch():
+    from eegspec.psd import compute_psd_welch_windows
+    rng = np.random.default_rng(2)
+    data = rng.standard_normal((250 * 60, 5))
+    times, f, psd_t, psd = compute_psd_welch_windows(data, 250.0, nperseg=256, noverlap=128, window_sec=10.0, step_sec=3.0,
+                                                     max_block_bytes=50000)
+    _, full = compute_psd_welch(data, 250.0, nperseg=256, noverlap=128)
+    np.testing.assert_allclose(psd, full, rtol=1e-10)
+    hop, step = 128, 6 * 128  # 3 s rounds to 6 segment hops
+    n_win = (10 * 250 - 256) // hop * hop + 256
+    assert psd_t.shape == (len(times), 5, f.size)
+    for k in (0, 3, len(times) - 1):
+        _, ref = compute_psd_welch(data[k * step:k * step + n_win], 250.0, nperseg=256, noverlap=128)
+        np.testing.assert_allclose(psd_t[k], ref, rtol=1e-9)
+        assert np.isclose(times[k], (k * step + n_win / 2) / 250.0)
+
+def test_windowed_welch_float32_late_windows():
+    from eegspec.psd import compute_psd_welch_windows, window_segment_plan
+    rng = np.random.default_rng(3)
+    x = (rng.standard_normal((250 * 1200, 2)) * 50 + 20).astype(np.float32)
+    times, _, psd_t, _ = compute_psd_welch_windows(x, 250.0, nperseg=256, noverlap=128, window_sec=10.0, dtype=np.float32)
+    assert psd_t.dtype == np.float32
+    _, _, step, n = window_segment_plan(x.shape[0], 250.0, 256, 128, 10.0)
+    k = len(times) - 1
+    _, ref = compute_psd_welch(x[k * step:k * step + n].astype(np.float64), 250.0, nperseg=256, noverlap=128)
+    np.testing.assert_allclose(psd_t[k], ref, rtol=1e-5)  # running sums stay float64
+
+@pytest.mark.parametrize("window", ["hann", "hamming", "blackman", "boxcar", ("tukey", 0.25)])
+def test_welch_window_matches_scipy(window):
+    from eegspec.psd import welch_window
+    for n in (255, 256):
+        np.testing.assert_array_equal(welch_window(window, n, "<f8")[0], get_window(window, n, fftbins=True))
+
+@pytest.mark.parametrize("adaptive,block", [(False, 2**18), (True, 2**18), (False, 2**22)])
+def test_multitaper_matches_mne(adaptive, block):
+    import warnings
+    psd_array_multitaper = pytest.importorskip("mne.time_frequency").psd_array_multitaper
+    from eegspec.psd import compute_psd_multitaper
+    rng = np.random.default_rng(1)
+    data = np.cumsum(rng.standard_normal((2001, 5)), axis=0)
+    f, psd = compute_psd_multitaper(data, 200.0, bandwidth=2.0, adaptive=adaptive, max_block_bytes=block)  # 2**18: 8 of 19 tapers per block
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        ref, f_ref = psd_array_multitaper(data.T, 200.0, bandwidth=2.0, adaptive=adaptive, normalization="full", verbose=False)
+    np.testing.assert_allclose(f, f_ref)
+    np.testing.assert_allclose(psd, ref, rtol=1e-9, atol=1e-12 * ref.max())
+
+def test_multitaper_on_welch_grid():
+    from eegspec.psd import compute_psd_multitaper
+    from eegspec.features import bandpower
+    rng = np.random.default_rng(2)
+    data = rng.standard_normal((6000, 3))
+    f_fine, fine = compute_psd_multitaper(data, 250.0)
+    f, psd = compute_psd_multitaper(data, 250.0, nperseg=256)
+    np.testing.assert_array_equal(f, np.fft.rfftfreq(256, 1 / 250.0))
+    a, b = bandpower(fine, f_fine, {"a": (8.0, 30.0)})["a"], bandpower(psd, f, {"a": (8.0, 30.0)})["a"]
+    np.testing.assert_allclose(a, b, rtol=0.1)  # edge bins of the coarse grid cover +-df/2 beyond the band
+    with pytest.raises(ValueError, match="shorter than nperseg"):
+        compute_psd_multitaper(data[:200], 250.0, nperseg=256)
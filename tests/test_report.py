@@ -0,0 +1,33 @@
+import os
+import numpy as np
+from eegspec.analyze import analyze_entry
+from eegspec.report import render_report
+from eegspec.viz import log_bins
+
+def test_log_bins_average_on_log_grid():
+    freqs = np.arange(0, 1025) * 0.5
+    psd = np.vstack([np.ones_like(freqs), freqs])
+    f, p = log_bins(freqs, psd, n_points=64)
+    assert f[0] == 0.5 and f.size <= 64
+    assert np.all(np.diff(f) > 0)
+    np.testing.assert_allclose(p[0], 1.0)
+    np.testing.assert_allclose(p[1], f)  # mean of a linear spectrum is the mean frequency
+    f2, _ = log_bins(freqs, psd, n_points=64, fmax=40.0)
+    assert f2[-1] <= 40.0
+
+def test_report_renders_npz_and_json_outputs(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=3)
+    kw = dict(sfreq=250.0, nperseg=256, channels_file=None, max_processors=2)
+    for fmt in ("npz", "json"):
+        out = str(tmp_path / f"out_{fmt}")
+        analyze_entry(str(tmp_path / "in"), out_dir=out, output_format=fmt, **kw)
+        rep = render_report(out, max_workers=2 if fmt == "npz" else 1, shard_size=1, dpi=40, fmax=45.0)
+        assert rep["figures"] == 6 and rep["subjects"] == 3
+        for sid in ("sub0", "sub1", "sub2"):
+            for task in ("rest", "task"):
+                png = os.path.join(out, "report", f"psd_{sid}_{task}.png")
+                with open(png, "rb") as f:
+                    assert f.read(8) == b"\x89PNG\r\n\x1a\n"
+        with open(rep["index"]) as f:
+            index = f.read()
+        assert index.count("<img") == 6 and "psd_sub2_task.png" in index
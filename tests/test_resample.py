@@ -0,0 +1,40 @@
+import json, os
+import numpy as np
+import pytest
+from scipy.signal import resample_poly
+from eegspec.analyze import analyze_entry
+from eegspec.resample import antialias_fir, plan_resample, resample_chunked
+from eegspec.store import ResultStore
+from eegspec.synthetic import SyntheticConfig, synth_subject
+
+def test_plan_and_chunked_resample():
+    p = plan_resample(2000.0, 1024, None, "auto")
+    assert (p.up, p.down, p.sfreq, p.nperseg, p.noverlap) == (1, 8, 250.0, 128, 64)
+    assert p.sfreq / p.nperseg == 2000.0 / 1024
+    assert plan_resample(250.0, 256, None, "auto") is None and plan_resample(500.0, 256, None, 1000) is None
+    p = plan_resample(2000.0, 1000, 500, "300")
+    assert (p.up, p.down, p.nperseg, p.noverlap) == (3, 20, 150, 75)
+    with pytest.raises(ValueError):
+        plan_resample(2000.0, 1024, None, 60)
+    x = np.random.default_rng(0).standard_normal((50001, 3))
+    for plan in (plan_resample(2000.0, 1024, None, "auto"), p):
+        fir = antialias_fir(plan)
+        np.testing.assert_allclose(resample_chunked(x, plan.up, plan.down, fir, chunk_samples=4000),
+                                   resample_poly(x, plan.up, plan.down, axis=0, window=fir), atol=1e-12)
+    np.testing.assert_allclose(resample_chunked(x, 1, 8, chunk_samples=4000), resample_poly(x, 1, 8, axis=0), atol=1e-12)
+
+def test_target_sfreq_keeps_features(tmp_path):
+    folder = tmp_path / "in"
+    os.makedirs(folder)
+    tasks = synth_subject(SyntheticConfig(n_channels=4, seconds=30, sfreq=2000.0, tasks=("rest",)))
+    with open(folder / "sub0.json", "w") as f:
+        json.dump({t: x.tolist() for t, x in tasks.items()}, f)
+    kw = dict(sfreq=2000.0, nperseg=2048, max_processors=1)
+    full = analyze_entry(str(folder), out_dir=str(tmp_path / "full"), **kw)
+    dec = analyze_entry(str(folder), out_dir=str(tmp_path / "dec"), target_sfreq="auto", connectivity=["coh"], **kw)
+    assert full["resample"] is None and dec["resample"]["sfreq"] == 250.0 and dec["run"]["tasks_ok"] == 1
+    (f_full, _), (f_dec, _) = (ResultStore(str(tmp_path / d)).load_psd("sub0", "rest") for d in ("full", "dec"))
+    np.testing.assert_allclose(f_dec, f_full[:f_dec.size])
+    for feat in ("rel_alpha", "rel_theta", "rel_beta", "iaf_peak"):
+        a, b = (ResultStore(str(tmp_path / d)).load_feature(feat)["sub0"] for d in ("full", "dec"))
+        np.testing.assert_allclose(b, a, rtol=0.02)
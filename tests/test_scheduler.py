@@ -0,0 +1,101 @@
+import concurrent.futures
+import numpy as np
+from eegspec.scheduler import LookaheadWindow, ScheduledTask, run_pipeline
+
+def test_pipeline_bounds_lookahead_and_loads_lazily():
+    opened = []
+
+    def subjects():
+        for s in range(20):
+            opened.append(s)
+            yield f"sub{s}"
+
+    def load(spath):
+        return [ScheduledTask(spath, t, np.zeros(1000), []) for t in ("a", "b", "c")]
+
+    done = []
+    window = LookaheadWindow(max_tasks=4)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+        def on_done(t, res):
+            done.append((t.subject, t.task))
+            # never more than one subject beyond what the window admits is opened
+            assert len(opened) * 3 - len(done) <= 4 + 3
+        n = run_pipeline(ex, subjects(), load, lambda ex, t: ex.submit(lambda: {"ok": True}), on_done, 2, window)
+    assert n == 60 and len(set(done)) == 60
+    assert window.peak_tasks <= 4 + 2 and window.tasks == 0
+
+def test_pipeline_reports_crashed_tasks_and_releases():
+    released = []
+
+    def load(spath):
+        return [ScheduledTask(spath, "t", None, [], release=lambda: released.append(spath))]
+
+    def boom():
+        raise RuntimeError("boom")
+
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+        run_pipeline(ex, iter(["s1", "s2"]), load, lambda ex, t: ex.submit(boom), lambda t, r: results.append(r), 1,
+                     LookaheadWindow(max_bytes=1))
+    assert [r["ok"] for r in results] == [False, False] and "boom" in results[0]["error"]
+    assert released == ["s1", "s2"]
+
+def test_pipeline_prefetches_reads_in_order():
+    import threading, time
+    reader_threads, loaded = set(), []
+
+    def read(spath):
+        reader_threads.add(threading.current_thread().name)
+        time.sleep(0.01 if spath != "sub1" else 0.05)  # sub1 finishes last; it must still be loaded second
+        if spath == "sub3":
+            raise OSError("unreadable")
+        return spath
+
+    def load(spath, read_fn):
+        try:
+            read_fn()
+        except OSError:
+            return []
+        loaded.append(spath)
+        return [ScheduledTask(spath, "t", np.zeros(10), [])]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as ex:
+        n = run_pipeline(ex, (f"sub{i}" for i in range(6)), load, lambda ex, t: ex.submit(lambda: {"ok": True}),
+                         lambda t, r: None, 2, LookaheadWindow(max_tasks=2), read_subject=read, prefetch=3)
+    assert n == 5 and loaded == ["sub0", "sub1", "sub2", "sub4", "sub5"]
+    assert reader_threads and all(name.startswith("eegspec-prefetch") for name in reader_threads)
+
+def test_prefetch_reserves_bytes_and_discards_on_abort():
+    import threading, time
+    import pytest
+    window = LookaheadWindow(max_bytes=100)
+    in_flight, lock = [], threading.Lock()
+
+    def read(spath):
+        with lock:
+            in_flight.append(window.reads)
+        time.sleep(0.01)
+        return spath
+
+    def load(spath, read_fn):
+        return [ScheduledTask(read_fn(), "t", np.zeros(1), [])]
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
+        run_pipeline(ex, (f"sub{i}" for i in range(5)), load, lambda ex, t: ex.submit(lambda: {"ok": True}),
+                     lambda t, r: None, 1, window, read_subject=read, prefetch=3, read_bytes=lambda p: 100)
+    assert max(in_flight) == 1 and window.peak_bytes == 100  # one 100-byte read fills the budget
+    assert window.reads == 0 and window.bytes == 0
+
+    loaded, discarded = [], []
+    window = LookaheadWindow(max_tasks=10)
+
+    def load_abort(spath, read_fn):
+        loaded.append(read_fn())
+        raise KeyboardInterrupt
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex, pytest.raises(KeyboardInterrupt):
+        run_pipeline(ex, (f"sub{i}" for i in range(3)), load_abort, lambda ex, t: ex.submit(lambda: {"ok": True}),
+                     lambda t, r: None, 1, window, read_subject=read, prefetch=3, read_bytes=lambda p: 10,
+                     discard_read=discarded.append)
+    assert loaded == ["sub0"] and discarded == ["sub1", "sub2"]  # no load_subject during shutdown
+    assert window.reads == 0 and window.bytes == 0
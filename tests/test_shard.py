@@ -0,0 +1,70 @@
+import os, json, subprocess, sys, time
+import pytest
+from eegspec.analyze import analyze_entry
+from eegspec.shard import WorkQueue, merge_summaries, parse_shard, shard_filter
+
+def test_parse_and_filter():
+    assert parse_shard("1/3") == (1, 3)
+    for bad in ("3/3", "a/b", "1"):
+        with pytest.raises(ValueError):
+            parse_shard(bad)
+    parts = [list(shard_filter(range(10), i, 3)) for i in range(3)]
+    assert sorted(sum(parts, [])) == list(range(10))
+
+def test_work_queue_leases(tmp_path):
+    a, b = WorkQueue(str(tmp_path), lease_timeout=60), WorkQueue(str(tmp_path), lease_timeout=60)
+    assert a.claim("s0") and not b.claim("s0")
+    a.complete("s0", ok=True)
+    assert not b.claim("s0") and b.status() == {"done": 1, "leased": 0}
+    assert b.claim("s1")
+    old = time.time() - 3600
+    os.utime(os.path.join(tmp_path, "leases", "s1.lease"), (old, old))  # b died without heartbeat
+    assert a.claim("s1") and a.reclaimed == ["s1"]
+    b.release("s1")  # no longer b's lease: must not remove a's
+    assert os.path.exists(os.path.join(tmp_path, "leases", "s1.lease"))
+
+def test_static_shards_merge(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=3)
+    out = str(tmp_path / "out")
+    for i in range(2):
+        s = analyze_entry(str(tmp_path / "in"), 250.0, out, nperseg=128, max_processors=1, shard=(i, 2), aggregate=True)
+        assert s["shard"]["tag"] == f"shard{i}of2"
+    assert not os.path.exists(os.path.join(out, "summary.json"))
+    merged = merge_summaries(out)
+    assert sorted(merged["subjects"]) == ["sub0", "sub1", "sub2"] and merged["run"]["tasks_ok"] == 6
+    assert not merged["duplicates"] and len(merged["shards"]) == 2
+
+def test_work_queue_processes(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=6)
+    wq, out = str(tmp_path / "wq"), str(tmp_path / "out")
+    os.makedirs(os.path.join(wq, "leases"))
+    with open(os.path.join(wq, "leases", "sub0.lease"), "w") as f:
+        json.dump({"owner": "deadhost:1:x"}, f)
+    old = time.time() - 3600
+    os.utime(os.path.join(wq, "leases", "sub0.lease"), (old, old))
+    cmd = [sys.executable, "-m", "eegspec", "analyze", "--input", str(tmp_path / "in"), "--sfreq", "250", "--out-dir", out,
+           "--nperseg", "128", "--max-processors", "1", "--no-cache", "--work-queue", wq, "--lease-timeout", "30", "--log-level", "WARNING"]
+    procs = [subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) for _ in range(3)]
+    for p in procs:
+        assert p.wait(timeout=300) == 0, p.stderr.read().decode()
+    subprocess.run([sys.executable, "-m", "eegspec", "merge", "--out-dir", out, "--work-queue", wq, "--aggregate"], check=True,
+                   capture_output=True)
+    with open(os.path.join(out, "summary.json")) as f:
+        merged = json.load(f)
+    assert sorted(merged["subjects"]) == [f"sub{i}" for i in range(6)]
+    assert merged["run"]["tasks_ok"] == 12 and not merged["duplicates"]
+    assert sorted(os.listdir(os.path.join(wq, "done"))) == [f"sub{i}.json" for i in range(6)] and not os.listdir(os.path.join(wq, "leases"))
+    assert os.path.exists(os.path.join(out, "aggregate.npz"))
+
+def test_failed_subjects_stay_claimable(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=2)
+    with open(tmp_path / "in" / "sub1.json", "w") as f:
+        json.dump({"rest": [[0.0] * 2000] * 4, "task": [[0.0] * 50] * 4}, f)  # "task" is shorter than nperseg
+    with open(tmp_path / "in" / "sub2.json", "w") as f:
+        f.write("{not json")
+    wq = tmp_path / "wq"
+    s = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=1, work_queue=str(wq))
+    assert s["run"]["tasks_ok"] == 3 and s["run"]["tasks_failed"] == 1 and s["run"]["subjects_failed"] == 1
+    assert os.listdir(wq / "done") == ["sub0.json"] and not os.listdir(wq / "leases")
+    q = WorkQueue(str(wq))
+    assert not q.claim("sub0") and q.claim("sub1") and q.claim("sub2")
@@ -0,0 +1,60 @@
+import json
+import numpy as np
+from eegspec.analyze import analyze_entry
+from eegspec.store import ResultStore
+
+def test_npz_store_matches_json_outputs(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in")
+    kw = dict(sfreq=250.0, nperseg=256, channels_file=None, max_processors=2)
+    analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "out_json"), output_format="json", **kw)
+    summary = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "out_npz"), output_format="npz", **kw)
+    assert summary["subjects"]["sub0"]["rest"]["store"].endswith("sub0.npz")
+
+    store = ResultStore(str(tmp_path / "out_npz"))
+    assert store.subjects() == ["sub0", "sub1"]
+    with open(tmp_path / "out_json" / "subjects" / "sub1" / "metrics_task.json") as f:
+        metrics = json.load(f)
+    with open(tmp_path / "out_json" / "subjects" / "sub1" / "psd_task.json") as f:
+        psd_json = json.load(f)
+    freqs, psd = store.load_psd("sub1", "task")
+    assert psd.dtype == np.float32
+    np.testing.assert_allclose(psd, psd_json["psd"], rtol=1e-6)
+    np.testing.assert_allclose(freqs, psd_json["freqs"])
+    alpha = store.load_feature("abs_alpha")
+    assert alpha["sub1"].shape == (2, 4)
+    np.testing.assert_allclose(alpha["sub1"][1], metrics["bands_abs"]["alpha"], rtol=1e-6)
+
+    cols = store.to_columns(features=["entropy"])
+    assert len(cols["value"]) == 2 * 2 * 4
+    sel = (cols["subject"] == "sub1") & (cols["task"] == "task")
+    np.testing.assert_allclose(cols["value"][sel], metrics["entropy"], rtol=1e-6)
+
+def test_time_resolved_features_in_store(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=1)
+    analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=1,
+                  window_sec=2.0, step_sec=1.0)
+    store = ResultStore(str(tmp_path / "out"))
+    tfr = store.load_tfr("sub0", "rest")
+    assert tfr["features"].shape == (len(tfr["times"]), 4, len(tfr["feature_names"]))
+    assert np.all(np.diff(tfr["times"]) > 0) and np.isnan(tfr["faa"]).all()
+
+def test_connectivity_stage_in_store(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=1)
+    summary = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=1,
+                            connectivity=["coh", "wpli"], conn_epoch_sec=1.0)
+    assert summary["connectivity"] == ["coh", "wpli"]
+    con = ResultStore(str(tmp_path / "out")).load_connectivity("sub0", "task")
+    assert set(con) == {"coh", "wpli", "bands", "channels"}
+    assert list(con["bands"]) == ["delta", "theta", "alpha", "beta", "gamma"]
+    assert con["coh"].shape == (5, 4, 4) and con["coh"].dtype == np.float32
+
+def test_multitaper_psd_method(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in")
+    kw = dict(sfreq=250.0, nperseg=256, max_processors=2)
+    welch = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "w"), **kw)
+    mt = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / "mt"), psd_method="multitaper", mt_adaptive=True, **kw)
+    assert mt["psd_method"] == "multitaper" and mt["run"]["tasks_ok"] == 4
+    f_w, p_w = ResultStore(str(tmp_path / "w")).load_psd("sub0", "rest")
+    f_m, p_m = ResultStore(str(tmp_path / "mt")).load_psd("sub0", "rest")
+    np.testing.assert_array_equal(f_w, f_m)
+    assert not np.allclose(p_w, p_m) and np.allclose(p_w.mean(), p_m.mean(), rtol=0.2)
@@ -0,0 +1,48 @@
+import io
+import numpy as np
+import pytest
+from eegspec.psd import compute_psd_welch
+from eegspec.stream import OnlineWelch, StreamAnalyzer, iter_frames, latency_stats, publish_synthetic
+
+def test_online_welch_matches_offline_for_any_chunking():
+    rng = np.random.default_rng(0)
+    data = rng.standard_normal((5000, 4))
+    ow = OnlineWelch(4, 250.0, nperseg=256, noverlap=100, avg_segments=1000)
+    i = 0
+    while i < len(data):
+        n = int(rng.integers(1, 700))
+        ow.push(data[i:i + n]); i += n
+    _, ref = compute_psd_welch(data, 250.0, nperseg=256, noverlap=100)
+    np.testing.assert_allclose(ow.psd(), ref, rtol=1e-10)
+
+    recent = OnlineWelch(4, 250.0, nperseg=256, noverlap=100, avg_segments=5)
+    recent.push(data)
+    n_seg = (5000 - 256) // 156 + 1
+    tail = data[(n_seg - 5) * 156:(n_seg - 1) * 156 + 256]
+    np.testing.assert_allclose(recent.psd(), compute_psd_welch(tail, 250.0, nperseg=256, noverlap=100)[1], rtol=1e-10)
+
+def test_stream_analyzer_from_byte_stream():
+    buf = io.BytesIO()
+    publish_synthetic(buf, 3, 500.0, seconds=4.0, realtime=False)
+    buf.seek(0)
+    an = StreamAnalyzer(["F3", "F4", "Oz"], 500.0, nperseg=250, latency_window=4)
+    updates = [u for chunk in iter_frames(buf, 3, chunk_samples=37) if (u := an.push(chunk)) is not None]
+    assert an.welch.n_samples == 2000 and len(updates) > 4
+    stats = latency_stats(an, 1.0)
+    assert len(an.latencies) == 4 and stats["updates"] == len(updates)  # bounded window, running totals
+    assert stats["latency_ms_max"] == pytest.approx(max(u["latency_ms"] for u in updates))
+    last = updates[-1]
+    assert last["bands_abs"]["alpha"].shape == (3,) and last["FAA"] > 0  # F4 carries more alpha than F3
+
+def test_online_welch_reuses_spectrum_buffers():
+    from eegspec import stream
+    if not stream._RFFT_OUT:
+        pytest.skip("rfft(out=) needs NumPy >= 2.0")
+    x = np.random.default_rng(1).standard_normal((2000, 2))
+    ow = OnlineWelch(2, 250.0, nperseg=128, avg_segments=3)
+    ow.push(x)
+    n_seg = (2000 - 128) // 64 + 1
+    last = x[(n_seg - 1) * 64:(n_seg - 1) * 64 + 128].T
+    np.testing.assert_allclose(ow._spec, np.fft.rfft((last - last.mean(axis=1, keepdims=True)) * ow._win), rtol=1e-10)
+    np.testing.assert_allclose(ow.psd(), compute_psd_welch(x[(n_seg - 3) * 64:(n_seg - 1) * 64 + 128], 250.0, nperseg=128)[1],
+                               rtol=1e-10)
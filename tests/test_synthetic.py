@@ -0,0 +1,29 @@
+import numpy as np
+from eegspec.synthetic import SyntheticConfig, synth_subject, write_cohort
+from eegspec.psd import compute_psd_welch
+from eegspec.iaf import estimate_iaf
+from eegspec.utils import load_subject_tasks
+
+def test_seeded_and_alpha_peak():
+    cfg = SyntheticConfig(n_channels=6, seconds=40.0, sfreq=200.0, alpha_sd=0.0)
+    a, b = synth_subject(cfg, 2), synth_subject(cfg, 2)
+    assert a["rest"].shape == (6, 8000)
+    np.testing.assert_array_equal(a["task"], b["task"])
+    assert not np.array_equal(a["rest"], synth_subject(cfg, 3)["rest"])
+    f, p_rest = compute_psd_welch(a["rest"].T, 200.0, nperseg=400)
+    _, p_task = compute_psd_welch(a["task"].T, 200.0, nperseg=400)
+    np.testing.assert_allclose(estimate_iaf(p_rest, f), 10.0, atol=1.0)
+    alpha = (f >= 8) & (f <= 12)
+    assert p_rest[:, alpha].sum() > p_task[:, alpha].sum()  # rest has the stronger alpha
+
+def test_artifacts_and_formats(tmp_path):
+    cfg = SyntheticConfig(n_channels=8, seconds=10.0, sfreq=250.0, n_subjects=2, tasks=("rest",),
+                          blink_rate=0.5, line_hz=50.0, dtype="float32")
+    x = synth_subject(cfg)["rest"]
+    assert np.abs(x[0]).max() > 3 * np.abs(x[-1]).max()  # blinks on frontal channels only
+    f, p = compute_psd_welch(x.T, 250.0, nperseg=500)
+    assert p[-1, f == 50.0][0] > 20 * p[-1, f == 45.0][0]
+    for fmt in ("json", "raw", "npz"):
+        paths = write_cohort(str(tmp_path / fmt), cfg, fmt)
+        assert len(paths) == 2
+        np.testing.assert_allclose(load_subject_tasks(paths[0])["rest"], x.T, rtol=1e-6)
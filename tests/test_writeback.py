@@ -0,0 +1,65 @@
+import os, multiprocessing, threading, time
+import numpy as np
+import pytest
+from eegspec import analyze
+from eegspec.analyze import analyze_entry
+from eegspec.writeback import BackgroundWriter
+
+def test_background_writer_bounds_queue_and_reports_errors():
+    done, gate = [], threading.Event()
+    w = BackgroundWriter(max_pending=2, batch_size=1)
+    w.submit(gate.wait)
+    t = threading.Thread(target=lambda: [w.submit(done.append, i) for i in range(5)])
+    t.start()
+    time.sleep(0.1)
+    assert t.is_alive() and len(done) == 0  # producer is held back by the full queue
+    gate.set(); t.join()
+    outcomes = []
+    w.submit(lambda: 1 / 0, label="bad", callback=outcomes.append)
+    w.submit(int, callback=outcomes.append)
+    assert w.close() == ["bad: division by zero"] and done == list(range(5))
+    assert isinstance(outcomes[0], ZeroDivisionError) and outcomes[1] is None
+    assert w.blocked_s > 0.05 and w.stats()["jobs"] == 8
+
+def test_background_outputs_match_synchronous(tmp_path, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=3)
+    kw = dict(sfreq=250.0, nperseg=128, max_processors=2)
+    for fmt in ("json", "npz"):
+        sync = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / f"{fmt}_sync"), output_format=fmt, prefetch=0, write_queue=0, **kw)
+        bg = analyze_entry(str(tmp_path / "in"), out_dir=str(tmp_path / f"{fmt}_bg"), output_format=fmt, prefetch=2, write_queue=2, **kw)
+        assert bg["run"]["tasks_ok"] == sync["run"]["tasks_ok"] == 6 and bg["io"]["prefetch"] == 2
+        for sid, tasks in bg["subjects"].items():
+            for task, entry in tasks.items():
+                for k, path in entry.items():
+                    ref = sync["subjects"][sid][task][k].replace(f"{fmt}_sync", f"{fmt}_bg")
+                    assert path == ref and os.path.exists(path)
+    assert bg["io"]["writer"]["jobs"] == 3 and bg["io"]["writer"]["errors"] == 0
+    a, b = (np.load(tmp_path / d / "subjects" / "sub2.npz") for d in ("npz_sync", "npz_bg"))
+    np.testing.assert_array_equal(a["features"], b["features"])
+
+@pytest.mark.parametrize("write_queue", [0, 2])
+def test_failed_npz_write_is_not_done(tmp_path, write_queue, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=2)
+    out, wq = tmp_path / "out", tmp_path / "wq"
+    os.makedirs(out / "subjects" / "sub0.npz")  # os.replace onto a directory fails
+    s = analyze_entry(str(tmp_path / "in"), 250.0, str(out), nperseg=128, max_processors=1, work_queue=str(wq),
+                      write_queue=write_queue)
+    assert s["run"]["writes_failed"] == 1 and s["run"]["tasks_ok"] == 2 and s["run"]["tasks_failed"] == 2
+    assert list(s["subjects"]) == ["sub1"] and s["subjects"]["sub1"]["rest"]["store"].endswith("sub1.npz")
+    assert os.listdir(wq / "done") == ["sub1.json"] and not os.listdir(wq / "leases")
+
+_write_task_outputs = analyze._write_task_outputs
+
+def _failing_write(logger, res, *args):
+    if res["subject"] == "sub0" and res["task"] == "rest":
+        raise OSError("disk full")
+    return _write_task_outputs(logger, res, *args)
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched writer")
+def test_failed_worker_json_write_counts(tmp_path, monkeypatch, make_subjects):
+    make_subjects(tmp_path / "in", n_subjects=2)
+    monkeypatch.setattr(analyze, "_write_task_outputs", _failing_write)
+    s = analyze_entry(str(tmp_path / "in"), 250.0, str(tmp_path / "out"), nperseg=128, max_processors=1,
+                      output_format="json", write_queue=2)
+    assert s["run"]["writes_failed"] == 1 and s["run"]["tasks_ok"] == 3 and s["run"]["tasks_failed"] == 1
+    assert list(s["subjects"]["sub0"]) == ["task"] and not os.path.exists(tmp_path / "out" / "subjects" / "sub0" / "psd_rest.json")